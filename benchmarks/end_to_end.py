@@ -0,0 +1,236 @@
+#!/usr/bin/python3
+"""
+End-to-end benchmark of the tty backend against a simulated receiver
+
+Runs the tty server on a pseudo terminal connected to ReceiverSimulator
+(see receiver_sim.py) and measures
+- latency: poll() and set() round trip times on an idle link
+- load: received frames/s and poll() latency with high periodic output
+- recovery: success rate and latency with dropped and corrupted frames
+
+Run as module from project root:
+python3 -m benchmarks.end_to_end [-t] [-o results.json]
+"""
+import argparse
+import json
+import logging
+import platform
+import statistics
+import time
+
+from ubxlib._version import __version__
+from ubxlib.cfgkeys import UbxKeyId
+from ubxlib.server_tty import GnssUBlox
+from ubxlib.ubx_cfg_nav5 import UbxCfgNav5Poll
+from ubxlib.ubx_cfg_prt import UbxCfgPrtPoll
+from ubxlib.ubx_cfg_rate import UbxCfgRate
+from ubxlib.ubx_cfg_valget import UbxCfgValGetPoll
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+from ubxlib.ubx_mon_ver import UbxMonVerPoll
+from ubxlib.ubx_nav_status import UbxNavStatus
+
+from .receiver_sim import ReceiverSimulator
+
+
+def latency_stats(latencies):
+    if not latencies:
+        return None
+
+    ordered = sorted(latencies)
+    return {
+        'count': len(ordered),
+        'min_s': ordered[0],
+        'median_s': statistics.median(ordered),
+        'p99_s': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+        'max_s': ordered[-1],
+    }
+
+
+def poll_frames():
+    port = UbxCfgPrtPoll()
+    port.f.PortId = 1
+    return {
+        'MON-VER': UbxMonVerPoll,
+        'CFG-NAV5': UbxCfgNav5Poll,
+        'CFG-PRT': lambda: port,
+        'CFG-VALGET': lambda: UbxCfgValGetPoll([UbxKeyId.CFG_UART1_BAUDRATE, UbxKeyId.CFG_RATE_MEAS]),
+    }
+
+
+def timed(func):
+    t_start = time.monotonic()
+    res = func()
+    return res, time.monotonic() - t_start
+
+
+def measure_polls(ubx, count):
+    results = {}
+    failed = 0
+    for name, factory in poll_frames().items():
+        latencies = []
+        for _ in range(count):
+            res, duration = timed(lambda: ubx.poll(factory()))
+            if res:
+                latencies.append(duration)
+            else:
+                failed += 1
+        results[name] = latency_stats(latencies)
+    return results, failed
+
+
+def measure_sets(ubx, count):
+    latencies = []
+    failed = 0
+    for i in range(count):
+        rate = UbxCfgRate()
+        rate.set_rate_in_hz(1 + i % 10)
+        res, duration = timed(lambda: ubx.set(rate))
+        if res:
+            latencies.append(duration)
+        else:
+            failed += 1
+    return latency_stats(latencies), failed
+
+
+def connect(sim, reader_thread):
+    ubx = GnssUBlox(sim.device_name, sim.baudrate, reader_thread=reader_thread)
+    assert ubx.setup()
+    return ubx
+
+
+def scenario_latency(args):
+    sim = ReceiverSimulator(rate_hz=1, baudrate=args.baudrate, latency_s=args.latency)
+    sim.start()
+    ubx = connect(sim, args.reader_thread)
+
+    polls, poll_failures = measure_polls(ubx, args.count)
+    sets, set_failures = measure_sets(ubx, args.count)
+
+    ubx.cleanup()
+    sim.stop()
+    return {
+        'poll': polls,
+        'set': sets,
+        'failures': poll_failures + set_failures,
+    }
+
+
+def scenario_load(args):
+    # About 80% of a 115200 bps link at 50 Hz
+    sim = ReceiverSimulator(rate_hz=args.load_rate, baudrate=args.baudrate, latency_s=args.latency,
+                            esf_meas_per_epoch=10, nmea=False)
+    sim.start()
+    ubx = connect(sim, args.reader_thread)
+
+    esf_meas = ubx.subscribe(UbxEsfMeas, max_frames=100000)
+    nav_status = ubx.subscribe(UbxNavStatus, max_frames=100000)
+    frames_out = sim.frames_out
+    bytes_out = sim.bytes_out
+    _, duration = timed(lambda: ubx.listen(args.duration))
+    frames_out = sim.frames_out - frames_out
+    bytes_out = sim.bytes_out - bytes_out
+    received = esf_meas.received + nav_status.received
+
+    polls, failures = measure_polls(ubx, max(1, args.count // 4))
+
+    ubx.cleanup()
+    sim.stop()
+    return {
+        'frames_sent': frames_out,
+        'frames_received': received,
+        'frames_per_s': received / duration,
+        'bytes_per_s': bytes_out / duration,
+        'poll': polls,
+        'failures': failures,
+    }
+
+
+def scenario_recovery(args):
+    sim = ReceiverSimulator(rate_hz=5, baudrate=args.baudrate, latency_s=args.latency,
+                            error_rate=args.error_rate, drop_rate=args.drop_rate, seed=1)
+    sim.start()
+    ubx = connect(sim, args.reader_thread)
+    ubx.set_retry_delay(500)
+
+    polls, poll_failures = measure_polls(ubx, args.count)
+    sets, set_failures = measure_sets(ubx, args.count)
+
+    timeouts = sum(stats['timeouts'] for stats in ubx.timeouts.statistics().values())
+
+    ubx.cleanup()
+    sim.stop()
+    return {
+        'error_rate': args.error_rate,
+        'drop_rate': args.drop_rate,
+        'corrupted': sim.corrupted,
+        'dropped': sim.dropped,
+        'timeouts': timeouts,
+        'poll': polls,
+        'set': sets,
+        'failures': poll_failures + set_failures,
+    }
+
+
+def print_latencies(name, stats):
+    if stats:
+        print(f"  {name:12s} median {stats['median_s'] * 1000:7.1f} ms  p99 {stats['p99_s'] * 1000:7.1f} ms  "
+              f"max {stats['max_s'] * 1000:7.1f} ms  ({stats['count']})")
+    else:
+        print(f'  {name:12s} no responses')
+
+
+def print_results(report):
+    results = report['results']
+    for scenario, res in results.items():
+        print(f"{scenario}: {res['failures']} failed requests")
+        for name, stats in res['poll'].items():
+            print_latencies(name, stats)
+        if 'set' in res:
+            print_latencies('set', res['set'])
+
+    load = results['load']
+    print(f"load: {load['frames_received']}/{load['frames_sent']} frames, "
+          f"{load['frames_per_s']:.0f} frames/s, {load['bytes_per_s'] / 1000:.1f} kB/s")
+    recovery = results['recovery']
+    print(f"recovery: {recovery['corrupted']} corrupted, {recovery['dropped']} dropped, "
+          f"{recovery['timeouts']} timeouts")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ubxlib end-to-end benchmark with simulated receiver')
+    parser.add_argument('-n', '--count', type=int, default=20, help='requests per message type')
+    parser.add_argument('-b', '--baudrate', type=int, default=115200, help='simulated baudrate')
+    parser.add_argument('-l', '--latency', type=float, default=0.020, help='receiver response latency in s')
+    parser.add_argument('-r', '--load-rate', type=float, default=50, help='navigation rate under load in Hz')
+    parser.add_argument('-d', '--duration', type=float, default=2.0, help='duration of load test in s')
+    parser.add_argument('-e', '--error-rate', type=float, default=0.05, help='corrupted frames in recovery test')
+    parser.add_argument('-x', '--drop-rate', type=float, default=0.10, help='dropped responses in recovery test')
+    parser.add_argument('-t', '--reader-thread', action='store_true', help='use tty reader thread')
+    parser.add_argument('-o', '--output', help='write results to JSON file')
+    args = parser.parse_args()
+
+    # Errors are injected on purpose, don't report them
+    logging.disable(logging.WARNING)
+
+    report = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'parameters': vars(args),
+        'results': {
+            'latency': scenario_latency(args),
+            'load': scenario_load(args),
+            'recovery': scenario_recovery(args),
+        },
+    }
+    print_results(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,287 @@
+"""
+Minimal gpsd stand-in for the gpsd backend
+
+FakeGpsd opens a serial device like gpsd does, typically the pseudo
+terminal of ReceiverSimulator (see receiver_sim.py), and serves the two
+endpoints used by ubxlib.server.GnssUBlox:
+- data socket (TCP): sends VERSION on connect, answers ?WATCH with DEVICES
+  and WATCH, then forwards device output unchanged to clients that
+  requested "raw":2
+- control socket (unix): writes "&<device>=<hex>" commands to the device
+  and answers {"class":"ACK"} or {"class":"ERROR"}
+
+Like gpsd, a control read without newline is one command. Newline
+terminated commands are handled one by one, so persistent control
+connections (GpsdControl persistent=True) work as well.
+
+Other gpsd features (JSON reports, raw hex dumps, device management) are
+not implemented.
+
+Usage:
+  sim = ReceiverSimulator()
+  sim.start()
+  gpsd = FakeGpsd(sim.device_name)
+  gpsd.start()
+  ubx = GnssUBlox(sim.device_name, data_socket=gpsd.data_address, control_socket=gpsd.control_path)
+  ...
+  gpsd.stop()
+  sim.stop()
+"""
+import binascii
+import json
+import os
+import select
+import selectors
+import socket
+import tempfile
+import threading
+import tty
+
+
+class _Client(object):
+    __slots__ = ('sock', 'rx', 'tx', 'raw')
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.rx = b''
+        self.tx = bytearray()
+        self.raw = False
+
+
+class FakeGpsd(object):
+    """ Version reported to clients, uses JSON control responses """
+    RELEASE = '3.23.1'
+
+    """ Pending output per data client before data is dropped """
+    MAX_BACKLOG = 262144
+
+    def __init__(self, device_name, data_address=('127.0.0.1', 0), control_path=None):
+        """
+        @param device_name: serial device to open
+        @param data_address: (host, port) of data socket, port 0 picks a free port
+        @param control_path: path of control socket, default in a temporary folder
+        """
+        super().__init__()
+
+        self.device_name = device_name
+        self.data_address = data_address
+        self.control_path = control_path
+
+        self.commands = 0
+        self.errors = 0
+        self.control_connections = 0
+        self.data_connections = 0
+        self.bytes_out = 0
+        self.bytes_dropped = 0
+
+        self._tmpdir = None
+        self._device = None
+        self._data_sock = None
+        self._control_sock = None
+        self._selector = None
+        self._control_rx = dict()       # Partial command per control connection
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._device = os.open(self.device_name, os.O_RDWR | os.O_NOCTTY | os.O_NONBLOCK)
+        tty.setraw(self._device)
+
+        self._data_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._data_sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._data_sock.bind(self.data_address)
+        self._data_sock.listen()
+        self.data_address = self._data_sock.getsockname()
+
+        if not self.control_path:
+            self._tmpdir = tempfile.TemporaryDirectory()
+            self.control_path = os.path.join(self._tmpdir.name, 'gpsd.sock')
+        self._control_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._control_sock.bind(self.control_path)
+        self._control_sock.listen()
+
+        self._selector = selectors.DefaultSelector()
+        self._selector.register(self._device, selectors.EVENT_READ, self._read_device)
+        self._selector.register(self._data_sock, selectors.EVENT_READ, self._accept_data)
+        self._selector.register(self._control_sock, selectors.EVENT_READ, self._accept_control)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='fake-gpsd', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+        for key in list(self._selector.get_map().values()):
+            if isinstance(key.fileobj, socket.socket):
+                key.fileobj.close()
+        self._selector.close()
+        os.close(self._device)
+        self._device = None
+
+        if self._tmpdir:
+            self._tmpdir.cleanup()
+            self._tmpdir = None
+            self.control_path = None
+        else:
+            os.unlink(self.control_path)
+
+    """
+    Private methods
+    """
+    def _run(self):
+        while not self._stop.is_set():
+            for key, events in self._selector.select(0.050):
+                if isinstance(key.data, _Client):
+                    self._serve_data(key.data, events)
+                else:
+                    key.data(key.fileobj, events)
+
+    def _accept_data(self, sock, events):
+        conn, _ = sock.accept()
+        conn.setblocking(False)
+        self.data_connections += 1
+
+        client = _Client(conn)
+        self._selector.register(conn, selectors.EVENT_READ, client)
+        self._send(client, {'class': 'VERSION', 'release': __class__.RELEASE, 'rev': __class__.RELEASE,
+                            'proto_major': 3, 'proto_minor': 15})
+
+    def _serve_data(self, client, events):
+        if events & selectors.EVENT_WRITE:
+            self._flush(client)
+
+        if events & selectors.EVENT_READ:
+            try:
+                data = client.sock.recv(4096)
+            except (BlockingIOError, ConnectionError):
+                data = None
+            if data == b'':
+                self._close(client.sock)
+                return
+            if data:
+                self._handle_watch(client, data)
+
+    def _handle_watch(self, client, data):
+        client.rx += data
+        if not client.rx.startswith(b'?WATCH'):
+            client.rx = b''
+            return
+
+        # Request is complete when its JSON object is
+        _, _, params = client.rx.partition(b'=')
+        try:
+            watch = json.loads(params.split(b';')[0]) if params else {}
+        except ValueError:
+            return
+        client.rx = b''
+
+        client.raw = watch.get('enable', True) and watch.get('raw', 0) >= 2
+        self._send(client, {'class': 'DEVICES', 'devices': [{
+            'class': 'DEVICE', 'path': self.device_name, 'driver': 'u-blox',
+            'activated': '2021-01-01T00:00:00.000Z', 'native': 1, 'bps': 115200,
+            'parity': 'N', 'stopbits': 1, 'cycle': 1.00}]})
+        self._send(client, {'class': 'WATCH', 'enable': client.raw, 'json': False, 'nmea': False,
+                            'raw': watch.get('raw', 0), 'scaled': False, 'timing': False, 'split24': False,
+                            'pps': False})
+
+    def _accept_control(self, sock, events):
+        conn, _ = sock.accept()
+        self.control_connections += 1
+        self._control_rx[conn] = b''
+        self._selector.register(conn, selectors.EVENT_READ, self._serve_control)
+
+    def _serve_control(self, conn, events):
+        try:
+            data = conn.recv(4096)
+        except ConnectionError:
+            data = b''
+        if not data:
+            del self._control_rx[conn]
+            self._close(conn)
+            return
+
+        # A read without newline is one command, newline terminated
+        # commands may be split across reads
+        data = self._control_rx[conn] + data
+        if b'\n' in data:
+            *commands, self._control_rx[conn] = data.split(b'\n')
+        else:
+            commands = [data]
+
+        for cmd in commands:
+            cmd = cmd.strip()
+            if cmd:
+                response = b'{"class":"ACK"}' if self._handle_control(cmd) else b'{"class":"ERROR"}'
+                try:
+                    conn.sendall(response + b'\r\n')
+                except OSError:
+                    pass
+
+    def _handle_control(self, cmd):
+        self.commands += 1
+        if cmd.startswith(b'&'):
+            device, _, hex_data = cmd[1:].partition(b'=')
+            if device.decode(errors='replace') == self.device_name:
+                try:
+                    self._write_device(binascii.unhexlify(hex_data))
+                    return True
+                except (binascii.Error, ValueError):
+                    pass
+
+        self.errors += 1
+        return False
+
+    def _read_device(self, fd, events):
+        try:
+            data = os.read(fd, 65536)
+        except (BlockingIOError, OSError):
+            return
+
+        clients = [key.data for key in self._selector.get_map().values() if isinstance(key.data, _Client)]
+        for client in clients:
+            if client.raw:
+                self._queue(client, data)
+
+    def _write_device(self, data):
+        view = memoryview(data)
+        while view:
+            try:
+                view = view[os.write(self._device, view):]
+            except BlockingIOError:
+                select.select([], [self._device], [], 0.1)
+
+    def _send(self, client, message):
+        self._queue(client, json.dumps(message, separators=(',', ':')).encode() + b'\r\n')
+
+    def _queue(self, client, data):
+        if client.sock.fileno() < 0:
+            return
+        if len(client.tx) + len(data) > __class__.MAX_BACKLOG:
+            self.bytes_dropped += len(data)
+            return
+
+        client.tx += data
+        self._flush(client)
+
+    def _flush(self, client):
+        try:
+            sent = client.sock.send(client.tx)
+        except BlockingIOError:
+            sent = 0
+        except OSError:
+            self._close(client.sock)
+            return
+
+        del client.tx[:sent]
+        self.bytes_out += sent
+        events = selectors.EVENT_READ | (selectors.EVENT_WRITE if client.tx else 0)
+        if self._selector.get_key(client.sock).events != events:
+            self._selector.modify(client.sock, events, client)
+
+    def _close(self, sock):
+        self._selector.unregister(sock)
+        sock.close()
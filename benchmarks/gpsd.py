@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+"""
+Benchmark of the gpsd backend against a fake gpsd
+
+Runs GnssUBlox on FakeGpsd (see fake_gpsd.py), which serves a receiver
+simulated on a pseudo terminal (see receiver_sim.py), and measures
+- setup: time to connect and select the device on the data socket, and
+  time to open a control connection
+- transmit: cost of _transmit() per frame, waiting for the gpsd response,
+  and throughput of queued frames (_transmit_nowait())
+- poll: poll() round trip times
+
+Transmit and poll are measured with a control connection per command
+(gpsd default) and with a persistent control connection.
+
+Run as module from project root:
+python3 -m benchmarks.gpsd [-o results.json]
+"""
+import argparse
+import json
+import logging
+import platform
+import socket
+import time
+
+from ubxlib._version import __version__
+from ubxlib.server import GnssUBlox
+from ubxlib.ubx_cfg_rate import UbxCfgRate
+
+from .end_to_end import latency_stats, measure_polls, print_latencies, timed
+from .fake_gpsd import FakeGpsd
+from .receiver_sim import ReceiverSimulator
+
+
+def connect(sim, gpsd, persistent):
+    ubx = GnssUBlox(sim.device_name, persistent_control=persistent,
+                    data_socket=gpsd.data_address, control_socket=gpsd.control_path)
+    ubx.setup()
+    return ubx
+
+
+def measure_setup(sim, gpsd, count):
+    data_latencies = []
+    for _ in range(count):
+        ubx = GnssUBlox(sim.device_name, data_socket=gpsd.data_address, control_socket=gpsd.control_path)
+        _, duration = timed(ubx.setup)
+        data_latencies.append(duration)
+        ubx.cleanup()
+
+    control_latencies = []
+    for _ in range(count):
+        def connect_control():
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(gpsd.control_path)
+
+        _, duration = timed(connect_control)
+        control_latencies.append(duration)
+
+    return {
+        'data': latency_stats(data_latencies),
+        'control': latency_stats(control_latencies),
+    }
+
+
+def rate_frame():
+    rate = UbxCfgRate()
+    rate.set_rate_in_hz(1)
+    return bytes(rate.to_bytes())
+
+
+def measure_transmit(ubx, count):
+    data = rate_frame()
+    latencies = []
+    failed = 0
+    for _ in range(count):
+        res, duration = timed(lambda: ubx._transmit(data))
+        if res:
+            latencies.append(duration)
+        else:
+            failed += 1
+
+    return latency_stats(latencies), failed
+
+
+def measure_queued(ubx, count):
+    """
+    Queues frames and waits until gpsd has responded to all of them
+    """
+    control = ubx.control
+    data = rate_frame()
+    accepted = control.accepted
+    done = control.accepted + control.failed + count
+
+    def run():
+        for _ in range(count):
+            ubx._transmit_nowait(data)
+        t_end = time.monotonic() + 5.0
+        while control.accepted + control.failed < done and time.monotonic() < t_end:
+            time.sleep(0.0005)
+
+    _, duration = timed(run)
+    accepted = control.accepted - accepted
+    return {
+        'frames': count,
+        'accepted': accepted,
+        'duration_s': duration,
+        'frames_per_s': count / duration,
+    }
+
+
+def scenario_control(sim, gpsd, persistent, args):
+    ubx = connect(sim, gpsd, persistent)
+    ubx.set_retry_delay(500)
+
+    transmit, transmit_failures = measure_transmit(ubx, args.count)
+    polls, poll_failures = measure_polls(ubx, args.count)
+    queued = measure_queued(ubx, args.count * 10)
+    connects = ubx.control.connects
+
+    ubx.cleanup()
+    return {
+        'transmit': transmit,
+        'queued': queued,
+        'poll': polls,
+        'connects': connects,
+        'failures': transmit_failures + poll_failures,
+    }
+
+
+def print_results(report):
+    results = report['results']
+    print('setup:')
+    print_latencies('data', results['setup']['data'])
+    print_latencies('control', results['setup']['control'])
+
+    for scenario in ('single', 'persistent'):
+        res = results[scenario]
+        print(f"{scenario}: {res['connects']} control connections, {res['failures']} failed requests")
+        print_latencies('transmit', res['transmit'])
+        queued = res['queued']
+        print(f"  {'queued':12s} {queued['frames_per_s']:7.0f} frames/s  "
+              f"({queued['accepted']}/{queued['frames']} accepted)")
+        for name, stats in res['poll'].items():
+            print_latencies(name, stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ubxlib gpsd backend benchmark with fake gpsd')
+    parser.add_argument('-n', '--count', type=int, default=50, help='requests per measurement')
+    parser.add_argument('-l', '--latency', type=float, default=0.0, help='receiver response latency in s')
+    parser.add_argument('-r', '--rate', type=float, default=1, help='navigation rate of receiver in Hz')
+    parser.add_argument('-o', '--output', help='write results to JSON file')
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    sim = ReceiverSimulator(rate_hz=args.rate, baudrate=None, latency_s=args.latency)
+    sim.start()
+    gpsd = FakeGpsd(sim.device_name)
+    gpsd.start()
+
+    results = {
+        'setup': measure_setup(sim, gpsd, args.count),
+        'single': scenario_control(sim, gpsd, False, args),
+        'persistent': scenario_control(sim, gpsd, True, args),
+    }
+
+    gpsd.stop()
+    sim.stop()
+
+    report = {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'parameters': vars(args),
+        'results': results,
+    }
+    print_results(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/python3
+"""
+Compares throughput of the UBX parser engines
+
+Feeds a synthetic stream of UBX frames interleaved with NMEA sentences
+into UbxParser (byte wise state machine) and UbxChunkParser (chunk
+scanner) and reports the achieved bytes per second.
+
+Run as module from project root:
+python3 -m benchmarks.parser_ubx
+"""
+import argparse
+import time
+
+from ubxlib.parser_ubx import UbxChunkParser, UbxParser
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+from ubxlib.ubx_mon_ver import UbxMonVer
+from ubxlib.ubx_nav_status import UbxNavStatus
+
+NMEA = b'$GNRMC,155215.00,A,4719.13883,N,00758.44996,E,0.259,,171020,2.47,E,A*3E\r\n'
+
+
+def build_stream(repeat):
+    nav_status = UbxNavStatus()
+    nav_status.f.iTow = 123456
+    nav_status.f.gpsFix = 3
+    nav_status.pack()
+
+    esf_meas = UbxEsfMeas()
+    esf_meas.f.timeTag = 1000
+    esf_meas.f.data = (11 << 24) | 500
+    esf_meas.pack()
+
+    mon_ver = UbxMonVer()
+    mon_ver.data = b'ROM CORE 3.01 (107888)'.ljust(30, b'\x00') + b'00080000'.ljust(10, b'\x00')
+    mon_ver.data += b'PROTVER=18.00'.ljust(30, b'\x00') * 4
+
+    block = nav_status.to_bytes() + NMEA + esf_meas.to_bytes() + NMEA + mon_ver.to_bytes()
+    return bytes(block * repeat), 3 * repeat
+
+
+def run(parser, stream, chunk_size):
+    t_start = time.perf_counter()
+    for ofs in range(0, len(stream), chunk_size):
+        parser.process(stream[ofs:ofs + chunk_size])
+    return time.perf_counter() - t_start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='UBX parser throughput benchmark')
+    parser.add_argument('-r', '--repeat', type=int, default=2000, help='number of frame blocks in stream')
+    parser.add_argument('-c', '--chunk', type=int, default=4096, help='bytes per process() call')
+    args = parser.parse_args()
+
+    stream, frames = build_stream(args.repeat)
+    print(f'stream: {len(stream)} bytes, {frames} ubx frames, chunk size {args.chunk} bytes')
+
+    for engine in (UbxParser, UbxChunkParser):
+        uut = engine(None)
+        duration = run(uut, stream, args.chunk)
+        assert uut.frames_rx == frames
+        print(f'{engine.__name__:16s} {len(stream) / duration / 1e6:8.2f} MB/s  {frames / duration:10.0f} frames/s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,265 @@
+"""
+Simulated u-blox receiver on a pseudo terminal
+
+The simulator opens a pty pair and behaves like a receiver connected to
+the slave side (device_name), so the tty backend can be used without
+hardware:
+- emits periodic NMEA sentences and UBX frames at a configurable rate
+- limits output to the configured baudrate
+- answers polls for all message classes known by stream.py after a
+  configurable latency, CFG polls are followed by ACK-ACK
+- acknowledges set frames with ACK-ACK, or ACK-NAK for CIDs in nak_cids
+- optionally corrupts or drops frames to exercise recovery
+
+Usage:
+  sim = ReceiverSimulator(rate_hz=10)
+  sim.start()
+  ubx = GnssUBlox(sim.device_name)
+  ...
+  sim.stop()
+"""
+import heapq
+import os
+import random
+import select
+import threading
+import time
+import tty
+
+from ubxlib.cid import UbxCID
+from ubxlib.parser_ubx import UbxChunkParser
+from ubxlib.ubx_ack import UbxAckAck, UbxAckNak
+from ubxlib.ubx_cfg_prt import UbxCfgPrtPoll
+from ubxlib.ubx_cfg_tp5 import UbxCfgTp5Poll
+from ubxlib.ubx_cfg_valget import UbxCfgValGet
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+from ubxlib.ubx_nav_status import UbxNavStatus
+
+from .stream import FRAME_CATALOG, NMEA_SENTENCES, nmea_sentence
+
+
+class ReceiverSimulator(object):
+    """ Payload length of poll requests, default is 0 """
+    POLL_LENGTH = {
+        UbxCfgPrtPoll.CID: 1,
+        UbxCfgTp5Poll.CID: 1,
+    }
+
+    """ Message classes the simulator accepts """
+    CLASSES = (UbxCID.CLASS_NAV, UbxCID.CLASS_ACK, UbxCID.CLASS_CFG, UbxCID.CLASS_UPD,
+               UbxCID.CLASS_MON, UbxCID.CLASS_MGA, UbxCID.CLASS_ESF)
+
+    def __init__(self, rate_hz=1.0, baudrate=115200, latency_s=0.020,
+                 esf_meas_per_epoch=4, nmea=True, error_rate=0.0, drop_rate=0.0, seed=0):
+        """
+        @param rate_hz: navigation rate of periodic output, 0 to disable
+        @param baudrate: simulated line speed, None for unlimited
+        @param latency_s: time until poll and set requests are answered
+        @param esf_meas_per_epoch: ESF-MEAS frames per navigation epoch
+        @param nmea: output NMEA sentences each epoch
+        @param error_rate: probability that an output frame is corrupted
+        @param drop_rate: probability that a response is not sent
+        """
+        super().__init__()
+
+        self.rate_hz = rate_hz
+        self.baudrate = baudrate
+        self.latency_s = latency_s
+        self.esf_meas_per_epoch = esf_meas_per_epoch
+        self.nmea = nmea
+        self.error_rate = error_rate
+        self.drop_rate = drop_rate
+        self.nak_cids = set()
+
+        self.device_name = None
+        self.polls = 0
+        self.sets = 0
+        self.dropped = 0
+        self.corrupted = 0
+        self.frames_out = 0
+        self.bytes_out = 0
+        self.bytes_in = 0
+
+        self._rng = random.Random(seed)
+        self._responders = {cls.CID: (cls, builder) for cls, builder, _ in FRAME_CATALOG}
+        self._parser = UbxChunkParser(UbxCID(0x00, 0x02))
+        self._parser.set_filters([UbxCID(cls, id) for cls in __class__.CLASSES for id in range(256)])
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._scheduled = []        # heap of (due time, sequence, data)
+        self._sequence = 0
+        self._output = bytearray()
+
+    def start(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        os.set_blocking(self._master, False)
+        self.device_name = os.ttyname(self._slave)
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='receiver-sim', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = None
+        self._slave = None
+
+    """
+    Private methods
+    """
+    def _run(self):
+        period = 1.0 / self.rate_hz if self.rate_hz else None
+        next_epoch = time.monotonic()
+        budget = 0.0
+        t_last = time.monotonic()
+
+        while not self._stop.is_set():
+            now = time.monotonic()
+
+            if period and now >= next_epoch:
+                self._output += self._epoch()
+                next_epoch += period
+
+            while self._scheduled and self._scheduled[0][0] <= now:
+                self._output += heapq.heappop(self._scheduled)[2]
+
+            # Transmit budget in bytes, 10 bits per character
+            if self.baudrate:
+                budget = min(budget + (now - t_last) * self.baudrate / 10, 4096.0)
+            t_last = now
+
+            timeout = 0.050
+            if period:
+                timeout = min(timeout, next_epoch - now)
+            if self._scheduled:
+                timeout = min(timeout, self._scheduled[0][0] - now)
+            writable = self._output and (not self.baudrate or budget >= 1.0)
+            if self._output and not writable:
+                timeout = min(timeout, 0.001)
+
+            try:
+                readable, ready, _ = select.select([self._master], [self._master] if writable else [], [],
+                                                   max(timeout, 0.0))
+            except (OSError, ValueError):
+                break
+
+            if readable:
+                self._read()
+            if ready:
+                budget -= self._write(budget)
+
+    def _read(self):
+        try:
+            data = os.read(self._master, 4096)
+        except OSError:
+            return
+
+        self.bytes_in += len(data)
+        self._handle_input(data)
+
+    def _write(self, budget):
+        """
+        Writes pending output within transmit budget
+
+        @return: number of bytes written
+        """
+        length = len(self._output) if not self.baudrate else min(len(self._output), int(budget))
+        try:
+            sent = os.write(self._master, self._output[:length])
+        except OSError:
+            return 0
+
+        del self._output[:sent]
+        self.bytes_out += sent
+        return sent
+
+    def _epoch(self):
+        rng = self._rng
+        data = bytearray()
+
+        nav_status = UbxNavStatus()
+        nav_status.f.iTow = int(time.monotonic() * 1000) & 0xFFFFFFFF
+        nav_status.f.gpsFix = 3
+        nav_status.pack()
+        data += self._frame(nav_status)
+
+        for _ in range(self.esf_meas_per_epoch):
+            esf_meas = UbxEsfMeas()
+            esf_meas.f.timeTag = rng.getrandbits(32)
+            esf_meas.f.data = (11 << 24) | rng.getrandbits(24)
+            esf_meas.pack()
+            data += self._frame(esf_meas)
+
+        if self.nmea:
+            for body in NMEA_SENTENCES:
+                data += nmea_sentence(body)
+
+        return data
+
+    def _frame(self, frame):
+        """
+        Returns frame in binary form, possibly corrupted
+        """
+        data = bytearray(frame.to_bytes())
+        self.frames_out += 1
+        if self.error_rate and self._rng.random() < self.error_rate:
+            data[-1] ^= 0xFF
+            self.corrupted += 1
+        return data
+
+    def _handle_input(self, data):
+        self._parser.process(data)
+        while True:
+            cid, payload = self._parser.packet()
+            if not cid:
+                break
+            if cid == self._parser.crc_error_cid:
+                continue
+
+            responses = bytearray()
+            if self._is_poll(cid, payload):
+                self.polls += 1
+                cls, builder = self._responders[cid]
+                response = cls()
+                response.data = builder(self._rng)
+                responses += self._frame(response)
+                if cid.cls == UbxCID.CLASS_CFG:
+                    responses += self._frame(self._ack(UbxAckAck, cid))
+            elif cid.cls == UbxCID.CLASS_CFG:
+                self.sets += 1
+                ack_class = UbxAckNak if cid in self.nak_cids else UbxAckAck
+                responses += self._frame(self._ack(ack_class, cid))
+            else:
+                continue
+
+            if self.drop_rate and self._rng.random() < self.drop_rate:
+                self.dropped += 1
+                continue
+
+            self._sequence += 1
+            heapq.heappush(self._scheduled, (time.monotonic() + self.latency_s, self._sequence, bytes(responses)))
+
+    def _is_poll(self, cid, payload):
+        if cid not in self._responders:
+            return False
+        if cid == UbxCfgValGet.CID:
+            return True
+        return len(payload) == __class__.POLL_LENGTH.get(cid, 0)
+
+    @staticmethod
+    def _ack(ack_class, cid):
+        ack = ack_class()
+        ack.f.clsId = cid.cls
+        ack.f.msgId = cid.id
+        ack.pack()
+        return ack
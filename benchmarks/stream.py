@@ -0,0 +1,246 @@
+"""
+Synthetic receiver output for benchmarks
+
+Generates reproducible byte streams as seen on a receiver port: UBX frames
+of all message classes implemented in ubxlib, NMEA sentences, UBX frames
+with corrupted checksum, truncated UBX frames and garbage bytes.
+
+Usage:
+  stream = StreamGenerator(seed=1).generate(1000)
+  stream.data      -> bytes
+  stream.frames    -> list of (cid, payload) of all valid UBX frames
+"""
+import random
+import struct
+
+from ubxlib.cfgkeys import CfgKeyData, UbxKeyId
+from ubxlib.ubx_ack import UbxAckAck, UbxAckNak
+from ubxlib.ubx_cfg_esfalg import UbxCfgEsfAlg
+from ubxlib.ubx_cfg_esfla import UbxCfgEsfla
+from ubxlib.ubx_cfg_gnss import UbxCfgGnss
+from ubxlib.ubx_cfg_nav5 import UbxCfgNav5
+from ubxlib.ubx_cfg_navx5 import UbxCfgNavx5
+from ubxlib.ubx_cfg_nmea import UbxCfgNmea
+from ubxlib.ubx_cfg_prt import UbxCfgPrtUart
+from ubxlib.ubx_cfg_rate import UbxCfgRate
+from ubxlib.ubx_cfg_tp5 import UbxCfgTp5
+from ubxlib.ubx_cfg_valget import UbxCfgValGet
+from ubxlib.ubx_esf_alg import UbxEsfAlg
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+from ubxlib.ubx_esf_status import UbxEsfStatus
+from ubxlib.ubx_mga_ack_data0 import UbxMgaAckData0
+from ubxlib.ubx_mon_ver import UbxMonVer
+from ubxlib.ubx_nav_status import UbxNavStatus
+from ubxlib.ubx_upd_sos import UbxUpdSos
+
+
+NMEA_SENTENCES = [
+    'GNRMC,155215.00,A,4719.13883,N,00758.44996,E,0.259,,171020,2.47,E,A',
+    'GNGGA,155215.00,4719.13883,N,00758.44996,E,1,12,0.62,442.3,M,47.3,M,,',
+    'GNGSA,A,3,05,13,15,18,20,23,24,29,,,,,1.09,0.62,0.90,1',
+    'GPGSV,3,1,11,05,35,301,41,13,51,211,44,15,62,064,46,18,23,112,38,1',
+    'GLGSV,2,1,08,65,19,321,33,71,40,068,39,72,72,327,42,73,29,153,40,1',
+    'GNVTG,,T,,M,0.259,N,0.480,K,A',
+    'GNTXT,01,01,02,ANTSTATUS=OK',
+]
+
+
+def nmea_sentence(body, valid=True):
+    checksum = 0
+    for c in body.encode():
+        checksum ^= c
+    if not valid:
+        checksum ^= 0x55
+    return f'${body}*{checksum:02X}\r\n'.encode()
+
+
+def _packed(frame):
+    frame.pack()
+    return bytes(frame.data)
+
+
+def _esf_status_payload(rng):
+    num_sens = rng.randint(1, 6)
+    data = struct.pack('<IBBB5xB2xB', rng.getrandbits(32), 2, 0x14, 0x0a, 1, num_sens)
+    for sensor in range(num_sens):
+        data += struct.pack('<BBBB', 0x40 | (5 + sensor), 0x0f, 100, 0)
+    return data
+
+
+def _cfg_gnss_payload(rng):
+    blocks = [0, 1, 2, 3, 5, 6]
+    data = struct.pack('<BBBB', 0, 32, 32, len(blocks))
+    for gnss_id in blocks:
+        data += struct.pack('<BBBxI', gnss_id, 4, 16, 0x01010001)
+    return data
+
+
+def _cfg_esfla_payload(rng):
+    num_configs = rng.randint(1, 5)
+    data = struct.pack('<BB2x', 0, num_configs)
+    for arm in range(num_configs):
+        data += struct.pack('<BxhhH', arm, rng.randint(-500, 500), rng.randint(-500, 500), rng.randint(0, 300))
+    return data
+
+
+def _mon_ver_payload(rng):
+    data = b'ROM CORE 3.01 (107888)'.ljust(30, b'\x00') + b'00080000'.ljust(10, b'\x00')
+    for extension in (b'ROM BASE 0x118B2060', b'FWVER=ADR 4.21', b'PROTVER=19.20', b'MOD=NEO-M8L-0'):
+        data += extension.ljust(30, b'\x00')
+    return data
+
+
+def _cfg_valget_payload(rng):
+    data = struct.pack('<BBH', 1, 0, 0)
+    for key, value in ((UbxKeyId.CFG_UART1_BAUDRATE, 115200),
+                       (UbxKeyId.CFG_NAVSPG_DYNMODEL, 4),
+                       (UbxKeyId.CFG_RATE_MEAS, 100),
+                       (UbxKeyId.CFG_SFCORE_USE_SF, 1),
+                       (UbxKeyId.CFG_TP_PERIOD_TP2, 1000000)):
+        data += CfgKeyData.from_key(key, value).pack()
+    return data
+
+
+def _esf_meas_payload(rng):
+    frame = UbxEsfMeas()
+    frame.f.timeTag = rng.getrandbits(32)
+    frame.f.data = (11 << 24) | rng.getrandbits(24)
+    return _packed(frame)
+
+
+def _nav_status_payload(rng):
+    frame = UbxNavStatus()
+    frame.f.iTow = rng.getrandbits(32)
+    frame.f.gpsFix = 3
+    frame.f.ttff = rng.getrandbits(32)
+    return _packed(frame)
+
+
+"""
+Frame classes with payload builder and relative frequency
+
+Periodic navigation and sensor frames dominate, configuration responses
+are rare.
+"""
+FRAME_CATALOG = [
+    (UbxEsfMeas, _esf_meas_payload, 40),
+    (UbxNavStatus, _nav_status_payload, 10),
+    (UbxEsfStatus, _esf_status_payload, 10),
+    (UbxEsfAlg, lambda rng: _packed(UbxEsfAlg()), 10),
+    (UbxAckAck, lambda rng: _packed(UbxAckAck()), 3),
+    (UbxAckNak, lambda rng: _packed(UbxAckNak()), 1),
+    (UbxMgaAckData0, lambda rng: _packed(UbxMgaAckData0()), 2),
+    (UbxMonVer, _mon_ver_payload, 1),
+    (UbxCfgEsfAlg, lambda rng: _packed(UbxCfgEsfAlg()), 1),
+    (UbxCfgEsfla, _cfg_esfla_payload, 1),
+    (UbxCfgGnss, _cfg_gnss_payload, 1),
+    (UbxCfgNav5, lambda rng: _packed(UbxCfgNav5()), 1),
+    (UbxCfgNavx5, lambda rng: _packed(UbxCfgNavx5()), 1),
+    (UbxCfgNmea, lambda rng: _packed(UbxCfgNmea()), 1),
+    (UbxCfgPrtUart, lambda rng: _packed(UbxCfgPrtUart()), 1),
+    (UbxCfgRate, lambda rng: _packed(UbxCfgRate()), 1),
+    (UbxCfgTp5, lambda rng: _packed(UbxCfgTp5()), 1),
+    (UbxCfgValGet, _cfg_valget_payload, 1),
+    (UbxUpdSos, lambda rng: _packed(UbxUpdSos()), 1),
+]
+
+
+def ubx_frame(cls, payload):
+    frame = cls()
+    frame.data = payload
+    return bytes(frame.to_bytes())
+
+
+class Stream(object):
+    def __init__(self):
+        super().__init__()
+        self.data = b''
+        self.frames = []            # (cid, payload) of valid UBX frames
+        self.nmea_sentences = 0     # Valid NMEA sentences
+        self.nmea_errors = 0
+        self.crc_errors = 0
+        self.truncated = 0
+        self.garbage_bytes = 0
+
+
+class StreamGenerator(object):
+    """
+    Builds reproducible mixed receiver streams
+
+    Item types are drawn with the given probabilities, the remaining share
+    are valid UBX frames. Garbage never contains UBX or NMEA sync
+    characters, so that the number of valid frames is exactly known.
+    """
+
+    """ Probabilities of stream items other than valid UBX frames """
+    NMEA = 0.30
+    NMEA_ERROR = 0.01
+    CRC_ERROR = 0.01
+    TRUNCATED = 0.01
+    GARBAGE = 0.02
+
+    def __init__(self, seed=0):
+        super().__init__()
+        self.rng = random.Random(seed)
+        self.classes = [entry[0] for entry in FRAME_CATALOG]
+        self.weights = [entry[2] for entry in FRAME_CATALOG]
+        self.builders = {entry[0]: entry[1] for entry in FRAME_CATALOG}
+
+    def generate(self, items):
+        """
+        Generates stream with given number of items
+        """
+        rng = self.rng
+        stream = Stream()
+        chunks = []
+
+        limits = []
+        total = 0.0
+        for probability in (__class__.NMEA, __class__.NMEA_ERROR, __class__.CRC_ERROR,
+                            __class__.TRUNCATED, __class__.GARBAGE):
+            total += probability
+            limits.append(total)
+
+        for _ in range(items):
+            r = rng.random()
+            if r < limits[0]:
+                chunks.append(nmea_sentence(rng.choice(NMEA_SENTENCES)))
+                stream.nmea_sentences += 1
+            elif r < limits[1]:
+                chunks.append(nmea_sentence(rng.choice(NMEA_SENTENCES), valid=False))
+                stream.nmea_errors += 1
+            elif r < limits[2]:
+                frame = bytearray(self._frame()[1])
+                frame[-1] ^= 0xFF
+                chunks.append(bytes(frame))
+                stream.crc_errors += 1
+            elif r < limits[3]:
+                frame = self._frame()[1]
+                chunks.append(frame[:rng.randint(2, len(frame) - 1)])
+                stream.truncated += 1
+            elif r < limits[4]:
+                garbage = bytes(b for b in (rng.getrandbits(8) for _ in range(rng.randint(1, 64))) if b not in b'\xb5$')
+                chunks.append(garbage)
+                stream.garbage_bytes += len(garbage)
+            else:
+                cid_payload, frame = self._frame()
+                chunks.append(frame)
+                stream.frames.append(cid_payload)
+
+        stream.data = b''.join(chunks)
+        return stream
+
+    def frames(self, count):
+        """
+        Returns list of (frame class, payload) for decode benchmarks
+        """
+        res = []
+        for _ in range(count):
+            cls = self.rng.choices(self.classes, self.weights)[0]
+            res.append((cls, self.builders[cls](self.rng)))
+        return res
+
+    def _frame(self):
+        cls = self.rng.choices(self.classes, self.weights)[0]
+        payload = self.builders[cls](self.rng)
+        return (cls.CID, payload), ubx_frame(cls, payload)
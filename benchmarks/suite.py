@@ -0,0 +1,245 @@
+#!/usr/bin/python3
+"""
+Throughput benchmark suite
+
+Measures bytes/s and frames/s of the ubxlib hot paths on synthetic
+receiver streams (see stream.py):
+- UbxParser and UbxChunkParser
+- NmeaParser
+- DemuxParser (UBX, NMEA and RTCM3 in one pass)
+- Checksum
+- Fields pack() and unpack()
+- FrameFactory.build_with_data(), with and without frame pools
+- EsfMeasDecoder batch decoding (NumPy only)
+
+Results are printed and can be stored as JSON, so that runs of different
+releases can be compared.
+
+Run as module from project root:
+python3 -m benchmarks.suite [-o results.json]
+"""
+import argparse
+import json
+import logging
+import platform
+import time
+
+from ubxlib._version import __version__
+from ubxlib import esf_meas_decoder
+from ubxlib.checksum import Checksum
+from ubxlib.esf_meas_decoder import EsfMeasDecoder
+from ubxlib.frame_factory import FrameFactory
+from ubxlib.parser_demux import DemuxParser
+from ubxlib.parser_nmea import NmeaParser
+from ubxlib.parser_ubx import UbxChunkParser, UbxParser
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+
+from .stream import FRAME_CATALOG, StreamGenerator
+
+
+def measure(func, rounds):
+    """
+    Returns best duration of func() over given number of rounds
+    """
+    best = None
+    for _ in range(rounds):
+        t_start = time.perf_counter()
+        func()
+        duration = time.perf_counter() - t_start
+        if best is None or duration < best:
+            best = duration
+    return best
+
+
+def result(duration, num_bytes, num_frames):
+    return {
+        'duration_s': duration,
+        'bytes': num_bytes,
+        'frames': num_frames,
+        'bytes_per_s': num_bytes / duration,
+        'frames_per_s': num_frames / duration,
+    }
+
+
+def bench_ubx_parser(engine, stream, chunk_size, rounds):
+    parsers = []
+
+    def run():
+        parser = engine(None)
+        for ofs in range(0, len(stream.data), chunk_size):
+            parser.process(stream.data[ofs:ofs + chunk_size])
+        parsers.append(parser)
+
+    duration = measure(run, rounds)
+    return result(duration, len(stream.data), parsers[-1].frames_rx)
+
+
+def bench_nmea_parser(stream, chunk_size, rounds):
+    parsers = []
+
+    def run():
+        parser = NmeaParser()
+        for ofs in range(0, len(stream.data), chunk_size):
+            parser.process(stream.data[ofs:ofs + chunk_size])
+        parsers.append(parser)
+
+    duration = measure(run, rounds)
+    return result(duration, len(stream.data), parsers[-1].frames_rx)
+
+
+def bench_demux_parser(stream, chunk_size, rounds):
+    parsers = []
+
+    def run():
+        parser = DemuxParser(None)
+        for ofs in range(0, len(stream.data), chunk_size):
+            parser.process(stream.data[ofs:ofs + chunk_size])
+        parsers.append(parser)
+
+    duration = measure(run, rounds)
+    return result(duration, len(stream.data), parsers[-1].frames_rx + parsers[-1].nmea_rx)
+
+
+def bench_checksum(frames, rounds):
+    payloads = [payload for _, payload in frames]
+
+    def run():
+        for payload in payloads:
+            Checksum.compute(payload)
+
+    duration = measure(run, rounds)
+    return result(duration, sum(len(p) for p in payloads), len(payloads))
+
+
+def bench_fields(frames, rounds):
+    decoded = []
+    for cls, payload in frames:
+        decoded.append(cls.construct(payload))
+    num_bytes = sum(len(payload) for _, payload in frames)
+
+    def run_unpack():
+        for frame in decoded:
+            frame.f.unpack(frame.data)
+
+    def run_pack():
+        for frame in decoded:
+            frame.f.pack()
+
+    return {
+        'unpack': result(measure(run_unpack, rounds), num_bytes, len(decoded)),
+        'pack': result(measure(run_pack, rounds), num_bytes, len(decoded)),
+    }
+
+
+def bench_frame_factory(frames, rounds, pool_size=0):
+    factory = FrameFactory.getInstance()
+    for cls, _, _ in FRAME_CATALOG:
+        factory.register(cls)
+        factory.set_pool(cls.CID, pool_size)
+    packets = [(cls.CID, payload) for cls, payload in frames]
+
+    def run():
+        for cid, payload in packets:
+            factory.build_with_data(cid, payload)
+
+    duration = measure(run, rounds)
+    FrameFactory.destroy()
+    return result(duration, sum(len(p) for _, p in packets), len(packets))
+
+
+def bench_esf_meas_decoder(frames, rounds):
+    # Batch decoding is meant for logs, repeat frames to get a reasonably sized batch
+    messages = [cls.construct(payload).to_bytes() for cls, payload in frames if cls is UbxEsfMeas] * 100
+    data = b''.join(messages)
+
+    def run():
+        EsfMeasDecoder().decode(data)
+
+    duration = measure(run, rounds)
+    return result(duration, len(data), len(messages))
+
+
+def run_suite(items, frames, chunk_size, rounds, seed):
+    generator = StreamGenerator(seed)
+    stream = generator.generate(items)
+    decode_frames = generator.frames(frames)
+
+    results = {
+        'ubx_parser': bench_ubx_parser(UbxParser, stream, chunk_size, rounds),
+        'ubx_chunk_parser': bench_ubx_parser(UbxChunkParser, stream, chunk_size, rounds),
+        'nmea_parser': bench_nmea_parser(stream, chunk_size, rounds),
+        'demux_parser': bench_demux_parser(stream, chunk_size, rounds),
+        'checksum': bench_checksum(decode_frames, rounds),
+        'fields': bench_fields(decode_frames, rounds),
+        'frame_factory': bench_frame_factory(decode_frames, rounds),
+        'frame_factory_pooled': bench_frame_factory(decode_frames, rounds, pool_size=1),
+    }
+    if esf_meas_decoder.numpy:
+        results['esf_meas_decoder'] = bench_esf_meas_decoder(decode_frames, rounds)
+
+    return {
+        'version': __version__,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'parameters': {
+            'items': items,
+            'frames': frames,
+            'chunk_size': chunk_size,
+            'rounds': rounds,
+            'seed': seed,
+        },
+        'stream': {
+            'bytes': len(stream.data),
+            'ubx_frames': len(stream.frames),
+            'nmea_sentences': stream.nmea_sentences,
+            'nmea_errors': stream.nmea_errors,
+            'crc_errors': stream.crc_errors,
+            'truncated': stream.truncated,
+            'garbage_bytes': stream.garbage_bytes,
+        },
+        'results': results,
+    }
+
+
+def print_results(report):
+    stream = report['stream']
+    print(f"ubxlib {report['version']}, python {report['python']}")
+    print(f"stream: {stream['bytes']} bytes, {stream['ubx_frames']} ubx frames, "
+          f"{stream['nmea_sentences']} nmea sentences")
+
+    def line(name, res):
+        print(f"{name:24s} {res['bytes_per_s'] / 1e6:8.2f} MB/s  {res['frames_per_s']:10.0f} frames/s")
+
+    for name, res in report['results'].items():
+        if 'bytes_per_s' in res:
+            line(name, res)
+        else:
+            for sub_name, sub_res in res.items():
+                line(f'{name}.{sub_name}', sub_res)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ubxlib throughput benchmark suite')
+    parser.add_argument('-n', '--items', type=int, default=5000, help='number of items in stream')
+    parser.add_argument('-f', '--frames', type=int, default=2000, help='number of frames for decode benchmarks')
+    parser.add_argument('-c', '--chunk', type=int, default=4096, help='bytes per process() call')
+    parser.add_argument('-r', '--rounds', type=int, default=3, help='runs per benchmark, best is reported')
+    parser.add_argument('-s', '--seed', type=int, default=1, help='seed of stream generator')
+    parser.add_argument('-o', '--output', help='write results to JSON file')
+    args = parser.parse_args()
+
+    # Corrupted frames are expected, don't report them
+    logging.disable(logging.WARNING)
+
+    report = run_suite(args.items, args.frames, args.chunk, args.rounds, args.seed)
+    print_results(report)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f'results written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -26,7 +26,6 @@ import gpiod
 
 from ubxlib.server import GnssUBlox
 from ubxlib.ubx_cfg_tp5 import UbxCfgTp5Poll
-from ubxlib.ubx_esf_meas import UbxEsfMeas
 
 FORMAT = '%(asctime)-15s %(levelname)-8s %(message)s'
 logging.basicConfig(format=FORMAT)
@@ -71,12 +70,6 @@ def io_event_loop(ubx):
     lines.request(consumer='esf_speed_tp.py', type=gpiod.LINE_REQ_EV_RISING_EDGE)
     logger.info(f'initialized {lines}')
 
-    # ESF Measure Frame to report speed to modem
-    # 24.12.2 UBX-ESF-MEAS (0x10 0x02)
-    esf_speed = UbxEsfMeas()
-    esf_speed.f.flags = 0x0000          # No timemark, no calibration tag
-    esf_speed.f.id = 0                  # Identification number of data provider, shall be 0
-
     count = 0
     while True:
         ev_lines = lines.event_wait(sec=10)
@@ -86,11 +79,8 @@ def io_event_loop(ubx):
                 time_event = event.sec + event.nsec / 1e9
                 time_event_ms = int(time_event * 1000) & 0xFFFFFFFF
 
-                # Prepare next frame
-                esf_speed.f.timeTag = time_event_ms
-                esf_speed.f.data = (speed & 0xFFFFFF) | data_type_speed << 24
-                # logger.info(f'sending frame {i}')
-                ubx.fire_and_forget(esf_speed)
+                # Report speed to modem with UBX-ESF-MEAS (0x10 0x02)
+                ubx.send_esf_meas(time_event_ms, [(data_type_speed, speed)])
 
                 # Update simulated speed information
                 speed += direction
@@ -107,6 +97,7 @@ def io_event_loop(ubx):
 
                     if count % 20 == 0:
                         logger.info(f'jitter {jitter_sec*1e3:.3f} msecs, max. {max_jitter*1e3:.3f} msecs')
+                        logger.info(f'send {ubx.esf_stats}')
 
                 time_last = time_event
                 count += 1
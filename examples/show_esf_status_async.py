@@ -0,0 +1,50 @@
+#!/usr/bin/python3
+"""
+Shows version and streams sensor fusion status using the asyncio backend
+
+The version is polled once, then ESF-STATUS and NAV-STATUS frames are
+consumed as the receiver outputs them (output must be enabled in
+receiver configuration). Other coroutines keep running meanwhile.
+
+Run as module from project root:
+python3 -m examples.show_esf_status_async
+"""
+import asyncio
+import logging
+
+from ubxlib.server_tty_async import AsyncGnssUBlox     # TTY direct backend
+# from ubxlib.server_async import AsyncGnssUBlox       # gpsd backend
+from ubxlib.ubx_esf_status import UbxEsfStatus
+from ubxlib.ubx_mon_ver import UbxMonVerPoll
+from ubxlib.ubx_nav_status import UbxNavStatus
+
+
+FORMAT = '%(asctime)-15s %(levelname)-8s %(message)s'
+logging.basicConfig(format=FORMAT)
+logger = logging.getLogger('ubxlib')
+logger.setLevel(logging.INFO)
+
+
+async def main():
+    ubx = AsyncGnssUBlox('/dev/gnss0', 115200)
+    res = await ubx.setup()
+    if not res:
+        print('Cannot setup library')
+        return
+
+    res = await ubx.poll(UbxMonVerPoll())
+    if res:
+        print(f'SW Version: {res.f.swVersion}')
+
+    try:
+        async for frame in ubx.frames([UbxEsfStatus, UbxNavStatus]):
+            print(frame)
+    finally:
+        await ubx.cleanup()
+
+
+if __name__ == '__main__':
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        print('Done')
@@ -16,6 +16,7 @@ setuptools.setup(
     long_description_content_type="text/markdown",
     url="https://github.com/renestraub/ubxlib",
     packages=setuptools.find_packages(exclude=("tests",)),
+    package_data={"ubxlib": ["data/*.csv"]},
     classifiers=[
         'Programming Language :: Python :: 3.7',
         "License :: OSI Approved :: MIT License",
@@ -1,3 +1,5 @@
+import struct
+
 import pytest
 
 from ubxlib.cfgkeys import CfgKeyData, UbxKeyId
@@ -17,6 +19,13 @@ class TestCfgKeyUnpack:
         assert u.item_id == 0x02D
         assert u.value == 0x44332211
 
+    def test_unpack_offset(self):
+        u = CfgKeyData('test')
+        consumed = u.unpack(bytearray.fromhex('ff ff 2D 00 06 40 11 22 33 44'), 2)
+        assert consumed == 8
+        assert u.item_id == 0x02D
+        assert u.value == 0x44332211
+
     def test_basic_ids(self):
         u = CfgKeyData('test')
         consumed = u.unpack(bytearray.fromhex('FF 03 FF 40 11 22 33 44'))
@@ -166,7 +175,7 @@ class TestCfgKeyCreation:
         assert u.value == 250
         assert u.group_id == 0x21
         assert u.item_id == 0x001
-        assert str(u) == '<anon>: key: CFG-RATE_MEAS, bits: 16, value: 250 (0x00fa)'
+        assert str(u) == '<anon>: key: CFG-RATE-MEAS, bits: 16, value: 250 (0x00fa)'
 
     def test2(self):
         u = CfgKeyData.from_key(UbxKeyId.CFG_SIGNAL_GPS_ENA, True)
@@ -204,6 +213,60 @@ class TestCfgKeyCreation:
         assert str(u) == '<anon>: key: CFG-SFIMU-IMU_MNTALG_ROLL, bits: 16, value: -12345'
 
 
+class TestCfgKeyTypes:
+    def test_r8(self):
+        u = CfgKeyData('test')
+        consumed = u.unpack(bytearray.fromhex('2a 00 05 50') + struct.pack('<d', 12.5))
+        assert consumed == 12
+        assert u.bits == 64
+        assert u.value_type == 'R8'
+        assert u.value == 12.5
+        assert str(u) == 'test: key: CFG-TP-DUTY_TP1, bits: 64, value: 12.5'
+
+    def test_r4(self):
+        u = CfgKeyData.from_key(0x40110064, -1.25)      # CFG-NAVSPG-USRDAT_DX
+        assert u.value_type == 'R4'
+        assert u.signed is False
+        data = u.pack()
+        assert data == bytearray.fromhex('64 00 11 40') + struct.pack('<f', -1.25)
+
+        u = CfgKeyData('test')
+        u.unpack(data)
+        assert u.value == -1.25
+
+    def test_signed_from_database(self):
+        # CFG-TP-ANT_CABLEDELAY, I2
+        u = CfgKeyData('test')
+        u.unpack(bytearray.fromhex('01 00 05 30 FE FF'))
+        assert u.value_type == 'I2'
+        assert u.signed is True
+        assert u.value == -2
+
+    def test_unknown_key(self):
+        u = CfgKeyData('test')
+        u.unpack(bytearray.fromhex('FF 03 FF 40 FE FF FF FF'))
+        assert u.value_type is None
+        assert u.signed is False
+        assert u.value == 0xFFFFFFFE
+
+    def test_key_info(self):
+        info = UbxKeyId.info(UbxKeyId.CFG_SFIMU_IMU_MNTALG_PITCH)
+        assert info.name == 'CFG-SFIMU-IMU_MNTALG_PITCH'
+        assert info.signed is True
+        assert info.value_type == 'I2'
+        assert info.scale == pytest.approx(0.01)
+        assert info.unit == 'deg'
+        assert UbxKeyId.info(0x40FF03FF) is None
+
+        assert UbxKeyId.from_str('CFG-RATE-MEAS') == UbxKeyId.CFG_RATE_MEAS
+        assert UbxKeyId.from_str('CFG-RATE-UNKNOWN') is None
+
+    def test_former_names(self):
+        assert UbxKeyId.from_str('CFG-RATE_MEAS') == UbxKeyId.CFG_RATE_MEAS
+        assert UbxKeyId.from_str('CFG-SFCORE-USE-SF') == UbxKeyId.CFG_SFCORE_USE_SF
+        assert UbxKeyId.to_str(UbxKeyId.CFG_SFCORE_USE_SF) == 'CFG-SFCORE-USE_SF'
+
+
 class TestCfgKeyPack:
     def test_u64(self):
         u = CfgKeyData('test0', 0x06, 0x2d, 64, 0x8877665544332211)
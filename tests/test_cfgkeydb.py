@@ -0,0 +1,82 @@
+import json
+import pkgutil
+
+import pytest
+
+from ubxlib import cfgkeydb
+from ubxlib.cfgkeydb import CfgKeyDatabase, database
+
+
+def record(name, key, value_type, scale=None, unit=''):
+    return {'name': name, 'id': key, 'type': value_type, 'scale': scale, 'unit': unit}
+
+
+class TestCfgKeyDatabase:
+    def test_lookup(self):
+        uut = database()
+        assert len(uut) > 400
+        assert uut.name(0x30210001) == 'CFG-RATE-MEAS'
+        assert uut.value_type(0x30210001) == 'U2'
+        assert uut.lookup(0x30210001) == ('CFG-RATE-MEAS', 'U2', 0.001, 's')
+        assert uut.lookup(0x1031001f) == ('CFG-SIGNAL-GPS_ENA', 'L', None, '')
+        assert 0x5005002a in uut
+        assert 0x40FF03FF not in uut
+        assert uut.name(0x40FF03FF) is None
+        assert uut.lookup(0) is None
+
+    def test_all_names(self):
+        uut = database()
+        for index in range(len(uut)):
+            key = uut._ids[index]
+            assert uut.key(uut.name(key)) == key
+        assert uut.key('CFG-UNKNOWN') is None
+        assert uut.key('') is None
+
+    def test_lazy(self, monkeypatch):
+        monkeypatch.setattr(cfgkeydb, '_database', None)
+        uut = database()
+        assert uut is database()
+        assert cfgkeydb._database is uut
+
+    def test_generate(self):
+        table = CfgKeyDatabase.generate([
+            record('CFG-B', '0x40110064', 'r4', '', 'm'),
+            record('CFG-A', 0x3006002e, 'I2', '0.01', 'deg'),
+        ])
+        assert table.splitlines() == [
+            'name,id,type,scale,unit',
+            'CFG-A,0x3006002e,I2,0.01,deg',
+            'CFG-B,0x40110064,R4,,m',
+        ]
+
+        uut = CfgKeyDatabase.from_csv(table)
+        assert uut.lookup(0x40110064) == ('CFG-B', 'R4', None, 'm')
+        assert uut.key('CFG-A') == 0x3006002e
+
+    def test_generate_errors(self):
+        with pytest.raises(ValueError):
+            # Size of key id is 2 bytes, type 4 bytes
+            CfgKeyDatabase.generate([record('CFG-A', 0x3006002e, 'U4')])
+
+        with pytest.raises(ValueError):
+            CfgKeyDatabase.generate([record('CFG-A', 0x3006002e, 'S2')])
+
+        with pytest.raises(ValueError):
+            CfgKeyDatabase.generate([record('CFG-A', 0x3006002e, 'I2'), record('CFG-B', 0x3006002e, 'I2')])
+
+        with pytest.raises(ValueError):
+            CfgKeyDatabase.generate([record('CFG-A', 0x3006002e, 'I2'), record('CFG-A', 0x3006002f, 'I2')])
+
+    def test_main(self, tmp_path):
+        source = tmp_path / 'keys.json'
+        source.write_text(json.dumps([record('CFG-TP-DUTY_TP1', '0x5005002a', 'R8', None, '%')]))
+        output = tmp_path / 'cfgkeys.csv'
+        cfgkeydb.main([str(source), '-o', str(output)])
+        assert output.read_text() == 'name,id,type,scale,unit\nCFG-TP-DUTY_TP1,0x5005002a,R8,,%\n'
+
+    def test_shipped_table(self):
+        # Shipped table is normalized generator output
+        text = pkgutil.get_data('ubxlib', 'data/cfgkeys.csv').decode()
+        rows = list(CfgKeyDatabase._read_csv(text))
+        records = [record(name, key, value_type, scale, unit) for name, key, value_type, scale, unit in rows]
+        assert CfgKeyDatabase.generate(records) == text
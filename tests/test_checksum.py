@@ -1,3 +1,4 @@
+from ubxlib import checksum
 from ubxlib.checksum import Checksum
 
 
@@ -106,3 +107,42 @@ class TestChecksum:
 
         # print(f'{dut._cka:02x} {dut._ckb:02x}')
         assert dut.matches(0xb6, 0xb1)
+
+    FRAME = bytes([
+        0x13, 0x40, 0x18, 0x00, 0x10, 0x00, 0x00, 0x12, 0xE4, 0x07, 0x09, 0x05, 0x06, 0x28,
+        0x30, 0x00, 0x40, 0x28, 0xEF, 0x0C, 0x0A, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+    ])
+
+    def test_compute(self):
+        assert Checksum.compute(self.FRAME) == (0x51, 0xAC)
+
+    def test_compute_slice(self):
+        data = b'\xb5\x62' + self.FRAME + b'\x51\xac'
+        assert Checksum.compute(data, 2, len(data) - 2) == (0x51, 0xAC)
+        assert Checksum.compute(memoryview(data), 2, len(data) - 2) == (0x51, 0xAC)
+
+    def test_update(self):
+        dut = Checksum()
+        dut.update(self.FRAME[:5])
+        dut.add(self.FRAME[5])
+        dut.update(self.FRAME[6:])
+        assert dut.matches(0x51, 0xAC)
+
+    def test_update_matches_add(self):
+        data = bytes(range(256)) * 20
+        ref = Checksum()
+        for byte in data:
+            ref.add(byte)
+
+        dut = Checksum()
+        dut.update(data)
+        assert dut.value() == ref.value()
+
+    def test_pure_python(self, monkeypatch):
+        monkeypatch.setattr(checksum, 'numpy', None)
+        data = bytes(range(256)) * 20
+        ref = Checksum()
+        for byte in data:
+            ref.add(byte)
+
+        assert Checksum.compute(data) == ref.value()
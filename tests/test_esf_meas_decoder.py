@@ -0,0 +1,84 @@
+import struct
+
+import pytest
+
+from ubxlib import esf_meas_decoder
+from ubxlib.esf_meas_decoder import EsfMeasDecoder
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+
+
+def esf_meas(time_tag, measurements, calib_ttag=None):
+    flags = len(measurements) << 11
+    if calib_ttag is not None:
+        flags |= 0x08
+    payload = struct.pack('<IHH', time_tag, flags, 0)
+    for data_type, value in measurements:
+        payload += struct.pack('<I', (data_type << 24) | (value & 0xFFFFFF))
+    if calib_ttag is not None:
+        payload += struct.pack('<I', calib_ttag)
+    return UbxEsfMeas.construct(payload).to_bytes()
+
+
+class TestEsfMeasDecoder:
+    def test_decode(self):
+        data = esf_meas(1000, [(11, 1500)])
+        data += b'\x01\x02garbage'
+        data += esf_meas(1010, [(14, -5), (13, 8388607), (5, -8388608)], calib_ttag=77)
+        data += esf_meas(1020, [(16, 1), (17, 2)])
+
+        uut = EsfMeasDecoder()
+        res = uut.decode(data)
+        assert uut.frames_rx == 3
+        assert res['timeTag'].tolist() == [1000, 1010, 1010, 1010, 1020, 1020]
+        assert res['dataType'].tolist() == [11, 14, 13, 5, 16, 17]
+        assert res['value'].tolist() == [1500, -5, 8388607, -8388608, 1, 2]
+        assert res['calibTtag'].tolist() == [0, 77, 77, 77, 0, 0]
+
+    def test_compare_frame(self):
+        data = esf_meas(123456, [(11, -1234)])
+        res = EsfMeasDecoder().decode(data)
+
+        frame = UbxEsfMeas.construct(data[6:-2])
+        assert res['timeTag'][0] == frame.f.timeTag
+        assert res['dataType'][0] == frame.f.data >> 24
+        assert res['value'][0] & 0xFFFFFF == frame.f.data & 0xFFFFFF
+
+    def test_chunks(self):
+        data = b''.join(esf_meas(i, [(11, i), (12, -i)]) for i in range(100))
+
+        uut = EsfMeasDecoder()
+        parts = [uut.decode(data[ofs:ofs + 7]) for ofs in range(0, len(data), 7)]
+        values = [v for part in parts for v in part['value'].tolist()]
+        assert values == [v for i in range(100) for v in (i, -i)]
+        assert uut.frames_rx == 100
+        assert uut.buffer == b''
+
+    def test_checksum_error(self):
+        bad = bytearray(esf_meas(1, [(11, 1)]))
+        bad[-1] ^= 0xFF
+        uut = EsfMeasDecoder()
+        res = uut.decode(bytes(bad) + esf_meas(2, [(11, 2)]))
+        assert uut.crc_errors == 1
+        assert res['timeTag'].tolist() == [2]
+
+    def test_sync_in_payload(self):
+        # Sync sequence within payload of a valid frame is skipped
+        time_tag = int.from_bytes(b'\xb5\x62\x10\x02', 'little')
+        uut = EsfMeasDecoder()
+        res = uut.decode(esf_meas(time_tag, [(11, 5)]))
+        assert res['timeTag'].tolist() == [time_tag]
+        assert uut.crc_errors == 0
+
+    def test_length_error(self):
+        # numMeas doesn't match payload length
+        payload = struct.pack('<IHHI', 1, 2 << 11, 0, 0)
+        uut = EsfMeasDecoder()
+        res = uut.decode(UbxEsfMeas.construct(payload).to_bytes())
+        assert uut.length_errors == 1
+        assert len(res) == 0
+        assert res.dtype.names == ('timeTag', 'dataType', 'value', 'calibTtag')
+
+    def test_no_numpy(self, monkeypatch):
+        monkeypatch.setattr(esf_meas_decoder, 'numpy', None)
+        with pytest.raises(ImportError):
+            EsfMeasDecoder()
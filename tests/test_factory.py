@@ -1,8 +1,11 @@
+import struct
+
 import pytest
 
 from ubxlib.cid import UbxCID
 from ubxlib.frame_factory import FrameFactory
 from ubxlib.ubx_ack import UbxAckAck
+from ubxlib.ubx_esf_status import UbxEsfStatus
 from ubxlib.ubx_mon_ver import UbxMonVer
 
 
@@ -53,6 +56,61 @@ class TestFactory:
         assert f.f.clsId == 0x11
         assert f.f.msgId == 0x22
 
+    def test_frame_detach(self, frame_factory):
+        frame_factory.register(UbxAckAck)
+
+        data = memoryview(bytes.fromhex('aa 11 22'))[1:]
+        f = frame_factory.build_with_data(UbxAckAck.CID, data)
+        assert f.data.obj is data.obj
+
+        f.detach()
+        assert type(f.data) is bytes
+        assert f.data == bytes.fromhex('11 22')
+        assert f.f.clsId == 0x11
+
+    def test_pool(self, frame_factory):
+        frame_factory.register(UbxAckAck)
+        frame_factory.set_pool(UbxAckAck.CID, 2)
+
+        f1 = frame_factory.build_with_data(UbxAckAck.CID, bytes.fromhex('11 22'))
+        f2 = frame_factory.build_with_data(UbxAckAck.CID, bytes.fromhex('33 44'))
+        assert f1 is not f2
+        kept = f1.copy()
+
+        f3 = frame_factory.build_with_data(UbxAckAck.CID, bytes.fromhex('55 66'))
+        assert f3 is f1
+        assert f3.f.clsId == 0x55
+        assert kept.f.clsId == 0x11
+        assert frame_factory.build_with_data(UbxAckAck.CID, bytes.fromhex('77 88')) is f2
+
+        frame_factory.set_pool(UbxAckAck.CID, 0)
+        assert frame_factory.build_with_data(UbxAckAck.CID, bytes.fromhex('11 22')) not in (f1, f2)
+
+    def test_pool_esf_status(self, frame_factory):
+        def payload(num_sens, freq):
+            data = struct.pack('<IBBB5xB2xB', 1000, 2, 0x14, 0x0a, 1, num_sens)
+            for sensor in range(num_sens):
+                data += struct.pack('<BBBB', 0x40 | (5 + sensor), 0x0f, freq, 0)
+            return data
+
+        frame_factory.register(UbxEsfStatus)
+        frame_factory.set_pool(UbxEsfStatus.CID, 1)
+
+        f1 = frame_factory.build_with_data(UbxEsfStatus.CID, payload(2, 10))
+        fields = f1.f
+        f2 = frame_factory.build_with_data(UbxEsfStatus.CID, payload(2, 20))
+        assert f2 is f1
+        assert f2.f is fields
+        assert f2.f.freq_1 == 20
+
+        f3 = frame_factory.build_with_data(UbxEsfStatus.CID, payload(3, 30))
+        assert f3.f.numSens == 3
+        assert f3.f.freq_2 == 30
+
+    def test_pool_unknown_frame(self, frame_factory):
+        with pytest.raises(KeyError):
+            frame_factory.set_pool(UbxAckAck.CID, 1)
+
     def test_construct_unkown_frame(self, frame_factory):
         with pytest.raises(KeyError):
             data = bytearray.fromhex('11 22')
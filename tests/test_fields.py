@@ -1,7 +1,13 @@
+import struct
+
 import pytest
 
 from ubxlib.types import Fields
-from ubxlib.types import Padding, U1, I4, U4
+from ubxlib.cfgkeys import CfgKeyData
+from ubxlib.types import CH, Padding, U1, U2, I2, I4, U4, RepeatedLayout
+from ubxlib.ubx_cfg_esfla import UbxCfgEsfla
+from ubxlib.ubx_cfg_gnss import UbxCfgGnss
+from ubxlib.ubx_mon_ver import UbxMonVer
 
 
 class TestFields:
@@ -68,11 +74,74 @@ class TestFields:
         assert data == bytearray.fromhex('10 32 54 76 AF 00 00')
 
     def test_unpack(self):
-        # single U8
-        # single integer
-        # combined message
-        # string
-        pass
+        u = Fields()
+        u.add(U1('val'))
+        u.add(Padding(1, 'res1'))
+        u.add(I2('neg'))
+        u.add(U4('test'))
+        u.add(CH(4, 'string'))
+
+        rest = u.unpack(bytearray.fromhex('AF 00 FE FF be ba fe ca 41 42 00 00 12 34'))
+        assert u.val == 0xAF
+        assert u.neg == -2
+        assert u.test == 0xcafebabe
+        assert u.string == 'AB'
+        assert rest == bytearray.fromhex('12 34')
+
+    def test_unpack_too_short(self):
+        u = Fields()
+        u.add(U2('val'))
+        u.add(U4('test'))
+
+        with pytest.raises(ValueError):
+            u.unpack(bytearray.fromhex('01 02 03 04 05'))
+
+    def test_layout_shared(self):
+        u1 = Fields()
+        u1.add(U1('val'))
+        u1.add(U4('test'))
+        u1.pack()
+
+        u2 = Fields()
+        u2.add(U1('other'))
+        u2.add(U4('name'))
+        u2.pack()
+
+        assert u1._layout() is u2._layout()
+        assert u1._layout().size == 5
+
+    def test_layout_invalidated_on_add(self):
+        u = Fields()
+        u.add(U1('val'))
+        u.val = 1
+        assert u.pack() == bytearray.fromhex('01')
+
+        u.add(U2('test'))
+        u.test = 0x0302
+        assert u.pack() == bytearray.fromhex('01 02 03')
+
+    def test_dynamic_fields(self):
+        u = Fields()
+        u.add(U1('val'))
+        u.add(CfgKeyData('data0'))
+        assert u._layout() is None
+
+        rest = u.unpack(bytearray.fromhex('05 01 00 93 20 29 ff'))
+        assert u.val == 5
+        assert u.data0 == 0x29
+        assert rest == bytearray.fromhex('ff')
+
+    def test_unpack_memoryview(self):
+        u = Fields()
+        u.add(U1('val'))
+        u.add(CfgKeyData('data0'))
+
+        data = memoryview(bytes.fromhex('aa 05 01 00 93 20 29 ff'))[1:]
+        rest = u.unpack(data)
+        assert u.val == 5
+        assert u.data0 == 0x29
+        assert isinstance(rest, memoryview)
+        assert rest.obj is data.obj
 
     def test_no_duplicate_fields(self):
         u = Fields()
@@ -81,3 +150,149 @@ class TestFields:
         # Must fail as name 'test1' is already used
         with pytest.raises(KeyError):
             u.add(I4('test1'))
+
+    def test_item_value_shared(self):
+        u = Fields()
+        u.add(U1('cmd'))
+        u.cmd = 5
+        assert u.get('cmd').value == 5
+
+        u.get('cmd').value = 7
+        assert u.cmd == 7
+
+    def test_value_kept_on_add(self):
+        item = U4('test')
+        item.value = 0x1234
+        u = Fields()
+        u.add(item)
+        assert u.test == 0x1234
+
+    def test_padding_access(self):
+        u = Fields()
+        u.add(U1('cmd'))
+        u.add(Padding(2, 'res1'))
+        assert u.res1 == 0
+
+    def test_compact(self):
+        u = Fields()
+        u.add(U1('cmd'))
+        assert not hasattr(u, '__dict__')
+        assert not hasattr(u.get('cmd'), '__dict__')
+
+        with pytest.raises(AttributeError):
+            u.unknown = 1
+
+    def test_class_shared(self):
+        u1 = Fields()
+        u1.add(U1('cmd'))
+        u1.add(U2('val'))
+        u2 = Fields()
+        u2.add(U1('cmd'))
+        u2.add(U2('val'))
+        assert type(u1) is type(u2)
+        assert isinstance(u1, Fields)
+
+        u1.val = 1
+        u2.val = 2
+        assert u1.val == 1
+
+    def test_class_per_layout(self):
+        # Intermediate layouts while adding fields don't create classes
+        classes = len(Fields._classes)
+        u = Fields()
+        for i in range(10):
+            u.add(U1(f'layout_test_{i}'))
+        assert type(u) is Fields
+        assert u.layout_test_9 == 0
+        assert len(Fields._classes) == classes + 1
+
+        # Adding a field after named access selects class again
+        u.add(U1('layout_test_extra'))
+        u.layout_test_extra = 5
+        assert u.layout_test_extra == 5 and u.layout_test_0 == 0
+
+    def test_class_cache_bounded(self, monkeypatch):
+        monkeypatch.setattr(Fields, 'MAX_CLASSES', 4)
+        for i in range(10):
+            u = Fields()
+            u.add(U1(f'bounded_test_{i}'))
+            u.get(f'bounded_test_{i}').value = i
+            assert getattr(u, f'bounded_test_{i}') == i
+            assert len(Fields._classes) <= 4
+
+
+class TestRepeatedLayout:
+    LAYOUT = RepeatedLayout(
+        header=[(U1, 'version'), (U1, 'num'), (Padding, 2, 'res1')],
+        record=[(U1, 'id'), (Padding, 1, 'res2'), (I2, 'value')],
+        count='num')
+
+    def test_unpack(self):
+        data = struct.pack('<BB2xBxhBxh', 1, 2, 7, -100, 8, 200)
+        f, records = self.LAYOUT.unpack(data)
+        assert f.num == 2
+        assert f.id_0 == 7 and f.value_0 == -100
+        assert f.id_1 == 8 and f.value_1 == 200
+        assert records == [(7, -100), (8, 200)]
+        assert records[1].value == 200
+        assert f.pack() == data
+
+    def test_fields_reused(self):
+        f1, _ = self.LAYOUT.unpack(struct.pack('<BB2xBxh', 1, 1, 7, 1))
+        f2, records = self.LAYOUT.unpack(struct.pack('<BB2xBxh', 1, 1, 8, 2), f1)
+        assert f2 is f1
+        assert records == [(8, 2)]
+
+        f3, records = self.LAYOUT.unpack(struct.pack('<BB2x', 1, 0), f2)
+        assert f3 is not f1
+        assert records == []
+
+    def test_too_short(self):
+        with pytest.raises(ValueError):
+            self.LAYOUT.unpack(struct.pack('<BB2xBxh', 1, 2, 7, 1))
+        with pytest.raises(ValueError):
+            self.LAYOUT.unpack(b'\x01')
+
+    def test_count_from_length(self):
+        layout = RepeatedLayout(header=[(CH, 4, 'name')], record=[(CH, 3, 'ext')])
+        f, records = layout.unpack(b'abc\x00' + b'x\x00\x00yz\x00zz')
+        assert f.name == 'abc'
+        assert f.ext_1 == 'yz'
+        assert [r.ext for r in records] == ['x', 'yz']
+
+    def test_layout_cached(self):
+        data = struct.pack('<BB2xBxhBxh', 1, 2, 7, -100, 8, 200)
+        f1, _ = self.LAYOUT.unpack(data)
+        f2, records = self.LAYOUT.unpack(data)
+        assert f2 is not f1
+        assert type(f2) is type(f1)
+        assert f2.get('value_1') is not f1.get('value_1')
+        assert f2.value_1 == 200 and records[1].value == 200
+        assert f2.pack() == data
+
+    def test_mon_ver(self):
+        data = b'ROM SPG 5.10'.ljust(30, b'\x00') + b'00190000'.ljust(10, b'\x00')
+        data += b'PROTVER=34.10'.ljust(30, b'\x00') + b'GPS;GLO;GAL;BDS'.ljust(30, b'\x00')
+        uut = UbxMonVer.construct(data)
+        assert uut.f.hwVersion == '00190000'
+        assert uut.f.extension_1 == 'GPS;GLO;GAL;BDS'
+        assert [r.extension for r in uut.records] == ['PROTVER=34.10', 'GPS;GLO;GAL;BDS']
+
+    def test_cfg_gnss(self):
+        data = struct.pack('<BBBB', 0, 32, 32, 2)
+        data += struct.pack('<BBBxI', UbxCfgGnss.GNSS_GPS, 8, 16, 0x01010001)
+        data += struct.pack('<BBBxI', UbxCfgGnss.GNSS_GLONASS, 8, 14, 0x01010000)
+        uut = UbxCfgGnss.construct(data)
+        assert uut.f.gnssId_1 == UbxCfgGnss.GNSS_GLONASS
+        assert uut.records[1].maxTrkCh == 14
+        assert uut.records[1].flags == 0x01010000
+        assert uut.f.pack() == data
+
+    def test_cfg_esfla(self):
+        data = struct.pack('<BB2x', 0, 2)
+        data += struct.pack('<Bxhhh', UbxCfgEsfla.TYPE_VRP_Antenna, 10, -20, 30)
+        data += struct.pack('<Bxhhh', UbxCfgEsfla.TYPE_VRP_IMU, 1, 2, 3)
+        uut = UbxCfgEsfla.construct(data)
+        assert uut.f.leverArmY_0 == -20
+        assert uut.lever_arm(UbxCfgEsfla.TYPE_VRP_IMU) == {'x': 1, 'y': 2, 'z': 3}
+        assert uut.lever_arm(4) is None
@@ -0,0 +1,162 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from ubxlib.gpsd_control import GpsdControl
+
+
+class FakeControlSocket(object):
+    """
+    Minimal gpsd control socket, responds to each received command line
+    """
+    def __init__(self, path, max_commands=None, delay=0.0, linger=0.0):
+        self.commands = []
+        self.max_commands = max_commands    # Close connection after n commands
+        self.delay = delay                  # Response delay in seconds
+        self.linger = linger                # Delay before closing, data received meanwhile is dropped
+        self.connections = 0
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.bind(path)
+        self.sock.listen()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.sock.close()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+
+            self.connections += 1
+            with conn:
+                self._handle(conn)
+
+    def _handle(self, conn):
+        count = 0
+        data = b''
+        while True:
+            chunk = conn.recv(4096)
+            if not chunk:
+                break
+
+            # Single commands are not newline terminated
+            data += chunk
+            if b'\n' in data:
+                *lines, data = data.split(b'\n')
+            else:
+                lines, data = [data], b''
+
+            for line in lines:
+                self.commands.append(line)
+                time.sleep(self.delay)
+                if line.endswith(b'=mute'):
+                    pass
+                elif line.startswith(b'&'):
+                    conn.sendall(b'{"class":"ACK"}\r\n')
+                else:
+                    conn.sendall(b'{"class":"ERROR"}\r\n')
+
+                count += 1
+                if self.max_commands and count >= self.max_commands:
+                    time.sleep(self.linger)
+                    return
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'gpsd.sock')
+
+
+class TestGpsdControl:
+    def test_single(self, path):
+        server = FakeControlSocket(path)
+        uut = GpsdControl(path)
+        assert uut.send(b'&/dev/ttyS3=b562')
+        assert not uut.send(b'?invalid')
+        uut.close()
+        server.close()
+
+        assert server.commands == [b'&/dev/ttyS3=b562', b'?invalid']
+        assert server.connections == 2
+        assert uut.accepted == 1 and uut.failed == 1
+
+    def test_no_server(self, path):
+        uut = GpsdControl(path)
+        assert not uut.send(b'&/dev/ttyS3=b562')
+        uut.close()
+
+    def test_persistent(self, path):
+        server = FakeControlSocket(path)
+        uut = GpsdControl(path, persistent=True)
+        for i in range(10):
+            assert uut.send(f'&/dev/ttyS3={i:02x}'.encode(), wait=False)
+        assert uut.send(b'&/dev/ttyS3=ff')
+        uut.close()
+        server.close()
+
+        assert len(server.commands) == 11
+        assert server.commands[0] == b'&/dev/ttyS3=00'
+        assert server.connections == 1
+        assert uut.accepted == 11
+
+    def test_persistent_reconnect(self, path):
+        server = FakeControlSocket(path, max_commands=2)
+        uut = GpsdControl(path, persistent=True)
+        for i in range(6):
+            assert uut.send(f'&/dev/ttyS3={i:02x}'.encode())
+        uut.close()
+        server.close()
+
+        assert uut.accepted == 6
+        assert uut.connects == 3
+
+    def test_persistent_closed_with_pending(self, path):
+        # Second command is sent before gpsd closes the connection
+        server = FakeControlSocket(path, max_commands=1, linger=0.05)
+        uut = GpsdControl(path, persistent=True)
+        assert uut.send(b'&/dev/ttyS3=00')
+        assert uut.send(b'&/dev/ttyS3=01')
+        uut.close()
+        server.close()
+
+        assert server.commands == [b'&/dev/ttyS3=00', b'&/dev/ttyS3=01']
+        assert uut.accepted == 2
+        assert uut.connects == 2
+
+    def test_cancelled(self, path, monkeypatch):
+        monkeypatch.setattr(GpsdControl, 'READ_TIMEOUT', 0.5)
+        monkeypatch.setattr(GpsdControl, 'RESPONSE_TIMEOUT', 0.05)
+        server = FakeControlSocket(path, delay=0.15)
+        uut = GpsdControl(path)
+        assert uut.send(b'&/dev/ttyS3=00', wait=False)
+
+        # Caller gives up while first command is sent, second is skipped
+        assert not uut.send(b'&/dev/ttyS3=01')
+        uut.close()
+        server.close()
+
+        assert server.commands == [b'&/dev/ttyS3=00']
+        assert uut.cancelled == 1
+
+    def test_persistent_overdue(self, path, monkeypatch):
+        monkeypatch.setattr(GpsdControl, 'RESPONSE_TIMEOUT', 0.1)
+        server = FakeControlSocket(path)
+        uut = GpsdControl(path, persistent=True)
+        assert uut.send(b'&/dev/ttyS3=00')
+        assert not uut.send(b'&/dev/ttyS3=mute')
+
+        # Missing response does not shift responses of following commands
+        time.sleep(0.1)
+        assert uut.send(b'?invalid') is False
+        assert uut.send(b'&/dev/ttyS3=01')
+        uut.close()
+        server.close()
+
+        assert uut.connects == 2
+        assert uut.accepted == 2
@@ -0,0 +1,87 @@
+import datetime
+
+import pytest
+
+from ubxlib.nmea_sentence import NmeaGga, NmeaGsa, NmeaGsv, NmeaRmc, NmeaSentence
+from ubxlib.parser_nmea import NmeaParser
+
+
+def sentence(body):
+    return b'$' + body + f'*{NmeaParser.checksum(body):02X}\r\n'.encode()
+
+
+class TestNmeaSentence:
+    def test_create(self):
+        assert type(NmeaSentence.create(b'GNGGA,155215.00')) is NmeaGga
+        assert type(NmeaSentence.create(b'GPRMC,155215.00')) is NmeaRmc
+        assert type(NmeaSentence.create(b'GNTXT,01,01,02,ANTSTATUS=OK')) is NmeaSentence
+        assert type(NmeaSentence.create(b'PUBX,00,081350.00')) is NmeaSentence
+
+    def test_parser_typed(self):
+        data = sentence(b'GNGGA,155215.00,4719.13883,N,00758.44996,E,1,12,0.62,442.3,M,47.3,M,,')
+        data += sentence(b'GNTXT,01,01,02,ANTSTATUS=OK')
+        sentences = NmeaParser().sentences(data)
+        assert [type(s) for s in sentences] == [NmeaGga, NmeaSentence]
+
+    def test_gga(self):
+        uut = NmeaSentence.create(b'GNGGA,155215.00,4719.13883,S,00758.44996,W,1,12,0.62,442.3,M,47.3,M,,')
+        assert uut.talker == 'GN'
+        assert uut.time == datetime.time(15, 52, 15)
+        assert uut.lat == pytest.approx(-(47 + 19.13883 / 60))
+        assert uut.lon == pytest.approx(-(7 + 58.44996 / 60))
+        assert uut.quality == 1
+        assert uut.numSV == 12
+        assert uut.hdop == pytest.approx(0.62)
+        assert uut.alt == pytest.approx(442.3)
+        assert uut.sep == pytest.approx(47.3)
+        assert uut.diffAge is None
+        assert uut.diffStation == ''
+
+    def test_rmc(self):
+        uut = NmeaSentence.create(b'GNRMC,155215.50,A,4719.13883,N,00758.44996,E,0.259,,171020,2.47,E,A,V')
+        assert uut.valid
+        assert uut.timestamp == datetime.datetime(2020, 10, 17, 15, 52, 15, 500000, tzinfo=datetime.timezone.utc)
+        assert uut.lat == pytest.approx(47 + 19.13883 / 60)
+        assert uut.spd == pytest.approx(0.259)
+        assert uut.cog is None
+        assert uut.mv == pytest.approx(2.47)
+        assert uut.posMode == 'A'
+        assert uut.navStatus == 'V'
+
+    def test_rmc_no_fix(self):
+        uut = NmeaSentence.create(b'GPRMC,,V,,,,,,,,,,N')
+        assert not uut.valid
+        assert uut.time is None
+        assert uut.lat is None
+        assert uut.timestamp is None
+        assert uut.navStatus == ''
+
+    def test_gsa(self):
+        uut = NmeaSentence.create(b'GNGSA,A,3,05,13,15,18,20,23,24,29,,,,,1.09,0.62,0.90,1')
+        assert type(uut) is NmeaGsa
+        assert uut.opMode == 'A'
+        assert uut.navMode == 3
+        assert uut.svid == [5, 13, 15, 18, 20, 23, 24, 29]
+        assert uut.pdop == pytest.approx(1.09)
+        assert uut.hdop == pytest.approx(0.62)
+        assert uut.vdop == pytest.approx(0.90)
+        assert uut.systemId == 1
+
+    def test_gsv(self):
+        uut = NmeaSentence.create(b'GPGSV,3,1,11,05,35,301,41,13,51,211,44,15,62,064,,18,23,112,38,1')
+        assert type(uut) is NmeaGsv
+        assert uut.numMsg == 3
+        assert uut.msgNum == 1
+        assert uut.numSV == 11
+        assert uut.satellites == [(5, 35, 301, 41), (13, 51, 211, 44), (15, 62, 64, None), (18, 23, 112, 38)]
+        assert uut.signalId == 1
+
+    def test_lazy(self):
+        uut = NmeaSentence.create(b'GNGGA,155215.00,4719.13883,N,00758.44996,E,1,12,0.62,442.3,M,47.3,M,,')
+        assert uut._fields is None
+        assert uut.talker == 'GN' and uut.type == 'GGA'
+        assert uut._fields is None
+
+        assert uut.alt == pytest.approx(442.3)
+        assert list(uut._values) == ['alt']
+        assert uut.alt is uut.alt
@@ -0,0 +1,192 @@
+import random
+
+from ubxlib.cid import UbxCID
+from ubxlib.parser_demux import DemuxParser
+
+
+class TestParserDemux:
+    UBX_FRAME = bytes([
+        0xB5, 0x62, 0x13, 0x40, 0x18, 0x00, 0x10, 0x00, 0x00, 0x12, 0xE4, 0x07, 0x09, 0x05, 0x06,
+        0x28, 0x30, 0x00, 0x40, 0x28, 0xEF, 0x0C, 0x0A, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00, 0x00,
+        0x51, 0xAC,
+    ])
+
+    NMEA = b'$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n'
+
+    # RTCM3 message 1005 with CRC-24Q
+    RTCM3 = bytes.fromhex('D300133ED7D30202980EDEEF34B4BD62AC0941986F33360B98')
+
+    @staticmethod
+    def nmea(body):
+        checksum = 0
+        for c in body:
+            checksum ^= c
+        return b'$' + body + f'*{checksum:02X}\r\n'.encode()
+
+    def test_mixed_stream(self):
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(self.NMEA + self.UBX_FRAME + self.RTCM3 + self.NMEA + b'\x01\x02\x03' + self.UBX_FRAME)
+
+        assert uut.frames_rx == 2
+        assert uut.nmea_rx == 2
+        assert uut.rtcm_rx == 1
+        assert uut.garbage_bytes == 3
+        assert uut.crc_errors == 0 and uut.nmea_errors == 0 and uut.rtcm_errors == 0
+
+        cid, payload = uut.packet()
+        assert cid == UbxCID(0x13, 0x40)
+        assert payload == self.UBX_FRAME[6:-2]
+        assert uut.packet()[0] == UbxCID(0x13, 0x40)
+        assert uut.packet() == (None, None)
+
+    def test_ubx_sync_in_nmea_text(self):
+        # 'µb' in Latin-1 is the UBX sync sequence
+        sentence = self.nmea(b'GNTXT,01,01,02,HW \xb5b\xb5b 00080000')
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.process(sentence + self.UBX_FRAME)
+
+        assert uut.nmea_rx == 1
+        assert uut.frames_rx == 1
+        assert uut.crc_errors == 0
+        assert uut.packet() == (None, None)
+
+    def test_byte_wise(self):
+        data = self.NMEA + self.UBX_FRAME + self.RTCM3 + self.NMEA
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        for i in range(len(data)):
+            uut.process(data[i:i + 1])
+
+        assert uut.frames_rx == 1
+        assert uut.nmea_rx == 2
+        assert uut.rtcm_rx == 1
+        assert uut.garbage_bytes == 0
+
+    def test_long_nmea(self):
+        # PUBX,03 with 100 satellites
+        sentence = self.nmea(b'PUBX,03,100' + b',123,U,045,32,43,064' * 100)
+        sentences = []
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.nmea_handler = lambda frame: sentences.append(bytes(frame))
+        uut.process(sentence[:1000])
+        uut.process(sentence[1000:] + self.UBX_FRAME)
+        assert sentences == [sentence]
+        assert uut.frames_rx == 1
+        assert uut.garbage_bytes == 0
+
+    def test_nmea_checksum_error(self):
+        data = self.NMEA.replace(b'*6A', b'*6B')
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.process(data + self.NMEA)
+        assert uut.nmea_errors == 1
+        assert uut.nmea_rx == 1
+
+    def test_no_sentence(self):
+        # '$' in binary data resumes search right after it
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.process(b'$\x00\x01' + self.UBX_FRAME)
+        assert uut.frames_rx == 1
+        assert uut.garbage_bytes == 3
+
+    def test_rtcm3_crc_error(self):
+        data = bytearray(self.RTCM3)
+        data[-1] ^= 0xFF
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.process(bytes(data) + self.UBX_FRAME)
+        assert uut.rtcm_rx == 0
+
+        # 0xD3 0x02 in the message looks like the header of a 517 byte
+        # frame, it is dropped because a valid UBX frame follows
+        assert uut.rtcm_errors == 2
+        assert uut.frames_rx == 1
+
+    def test_stray_rtcm3_preamble(self):
+        # Response must not wait for 0x3ff bytes of a false RTCM3 frame
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(b'\xd3\x03\xff' + self.UBX_FRAME[:10])
+        assert uut.frames_rx == 0
+        uut.process(self.UBX_FRAME[10:])
+        assert uut.frames_rx == 1
+        assert uut.packet()[0] == UbxCID(0x13, 0x40)
+        assert uut.buffer == b''
+
+    def test_stray_rtcm3_header_before_ubx(self):
+        # UBX sync directly after 0xD3 0x00, i.e. inside false RTCM3 header
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(b'\xd3\x00' + self.UBX_FRAME)
+        assert uut.frames_rx == 1
+        assert uut.packet()[0] == UbxCID(0x13, 0x40)
+        assert uut.buffer == b''
+
+    def test_stray_rtcm3_header_before_nmea(self):
+        sentences = []
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.nmea_handler = lambda frame: sentences.append(bytes(frame))
+        uut.process(b'\xd3\x01')
+        uut.process(self.NMEA)
+        assert sentences == [self.NMEA]
+        assert uut.buffer == b''
+
+    def test_stray_rtcm3_fuzz(self):
+        # Random mix of frames, sentences and stray 0xD3 headers, fed in random
+        # chunks. UBX frames and NMEA sentences must be delivered at once.
+        rng = random.Random(1)
+        frames = [self.UBX_FRAME, self.NMEA, self.RTCM3]
+        for _ in range(50):
+            sentences = []
+            uut = DemuxParser(UbxCID(0x00, 0x02))
+            uut.nmea_handler = lambda frame: sentences.append(bytes(frame))
+            data = b''
+            for _ in range(20):
+                segment = rng.choice(frames)
+                if rng.random() < 0.5:
+                    segment = bytes([0xD3, rng.randrange(4)])[:rng.randrange(1, 3)] + segment
+                data += segment
+
+                pos = 0
+                while pos < len(segment):
+                    size = rng.randrange(1, 64)
+                    uut.process(segment[pos:pos + size])
+                    pos += size
+
+                assert uut.frames_rx == data.count(self.UBX_FRAME)
+                assert sentences == [self.NMEA] * data.count(self.NMEA)
+
+            uut.process(self.UBX_FRAME)
+            assert uut.rtcm_rx == data.count(self.RTCM3)
+            assert uut.crc_errors == 0 and uut.nmea_errors == 0
+            assert uut.buffer == b''
+
+    def test_rtcm3_split(self):
+        # Incomplete RTCM3 frame is kept, even with UBX sync in message
+        data = self.RTCM3.replace(bytes.fromhex('BD62'), bytes.fromhex('B562'))
+        data = data[:-3] + DemuxParser._crc(data, 0, len(data) - 3).to_bytes(3, 'big')
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.process(data[:20])
+        uut.process(data[20:])
+        assert uut.rtcm_rx == 1
+        assert uut.rtcm_errors == 0
+
+    def test_ubx_crc_error(self):
+        data = bytearray(self.UBX_FRAME)
+        data[-1] ^= 0xFF
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.process(bytes(data))
+        assert uut.crc_errors == 1
+        assert uut.packet() == (UbxCID(0x00, 0x02), None)
+
+    def test_handlers(self):
+        sentences = []
+        messages = []
+        uut = DemuxParser(UbxCID(0x00, 0x02))
+        uut.nmea_handler = lambda frame: sentences.append(bytes(frame))
+        uut.rtcm_handler = lambda frame: messages.append(bytes(frame))
+        uut.process(self.NMEA + self.RTCM3)
+
+        assert sentences == [self.NMEA]
+        assert messages == [self.RTCM3]
+
+    def test_crc24q(self):
+        assert DemuxParser._crc(self.RTCM3, 0, len(self.RTCM3) - 3) == 0x360B98
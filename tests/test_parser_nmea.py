@@ -1,3 +1,4 @@
+from ubxlib import parser_nmea
 from ubxlib.parser_nmea import NmeaParser
 
 
@@ -47,3 +48,67 @@ class TestParserNmea:
         uut = NmeaParser()
         uut.process(data2)
         assert uut.frames_rx == 0
+
+    def test_sentences(self):
+        data = b'$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n'
+        uut = NmeaParser()
+        sentences = uut.sentences(data)
+        assert len(sentences) == 1
+        assert sentences[0].talker == 'GP'
+        assert sentences[0].type == 'RMC'
+        assert sentences[0].fields == ['123519', 'A', '4807.038', 'N', '01131.000', 'E', '022.4', '084.4',
+                                       '230394', '003.1', 'W']
+
+    def test_proprietary(self):
+        body = b'PUBX,00,081350.00,4717.113210,N'
+        uut = NmeaParser()
+        data = b'$' + body + f'*{NmeaParser.checksum(body):02X}\r\n'.encode()
+        sentence = uut.sentences(data)[0]
+        assert sentence.talker == 'P'
+        assert sentence.type == 'UBX'
+        assert sentence.fields[0] == '00'
+
+    def test_long_proprietary(self):
+        # PUBX,03 with 100 satellites
+        body = b'PUBX,03,100' + b',123,U,045,32,43,064' * 100
+        data = b'$' + body + f'*{NmeaParser.checksum(body):02X}\r\n'.encode()
+        assert len(data) > 2000
+
+        uut = NmeaParser()
+        uut.process(data[:1000])
+        sentences = uut.sentences(data[1000:])
+        assert len(sentences) == 1
+        assert sentences[0].type == 'UBX'
+        assert sentences[0].fields[:2] == ['03', '100']
+        assert uut.crc_errors == 0
+
+    def test_split(self):
+        data = b'\xb5\x62\x24\x01$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n' * 3
+        uut = NmeaParser()
+        for i in range(len(data)):
+            uut.process(data[i:i + 1])
+        assert uut.frames_rx == 3
+        assert uut.crc_errors == 0
+
+    def test_checksum_error_count(self):
+        data = b'$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6B\r\n'
+        uut = NmeaParser()
+        assert uut.sentences(data) == []
+        assert uut.crc_errors == 1
+
+    def test_batch(self, monkeypatch):
+        line = b'$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n'
+        data = line * 40 + line.replace(b'*6A', b'*6B') + line * 9
+        for numpy in (parser_nmea.numpy, None):
+            monkeypatch.setattr(parser_nmea, 'numpy', numpy)
+            uut = NmeaParser()
+            assert len(uut.sentences(data)) == 49
+            assert uut.frames_rx == 49
+            assert uut.crc_errors == 1
+
+    def test_restart(self):
+        uut = NmeaParser()
+        uut.process(b'$GPRMC,123519,A,4807.038')
+        uut.restart()
+        uut.process(b',N,01131.000,E,022.4,084.4,230394,003.1,W*6A\r\n')
+        assert uut.frames_rx == 0
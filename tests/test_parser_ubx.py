@@ -1,5 +1,6 @@
+from ubxlib.checksum import Checksum
 from ubxlib.cid import UbxCID
-from ubxlib.parser_ubx import UbxParser
+from ubxlib.parser_ubx import UbxChunkParser, UbxParser
 
 
 class TestParserUbx:
@@ -97,3 +98,121 @@ class TestParserUbx:
         assert len(uut.wait_cids) == 2
         assert UbxCID(0x05, 0x00) in uut.wait_cids
         assert UbxCID(0x05, 0x01) in uut.wait_cids
+
+
+class TestChunkParserUbx:
+    FRAME_1 = TestParserUbx.FRAME_1
+
+    def test_no_frames(self):
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        packet = uut.packet()
+        assert packet == (None, None)
+
+    def test_process(self):
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(self.FRAME_1)
+        cid, packet = uut.packet()
+        assert cid == UbxCID(0x13, 0x40)
+        assert packet == bytes(self.FRAME_1[6:-2])
+        assert uut.frames_rx == 1
+
+    def test_large_frame(self):
+        # Payload above Checksum.NUMPY_THRESHOLD
+        payload = bytes(range(256)) * 2
+        header = bytes([0x13, 0x40, len(payload) & 0xFF, len(payload) >> 8])
+        ref = Checksum()
+        for byte in header + payload:
+            ref.add(byte)
+        frame = b'\xb5\x62' + header + payload + bytes(ref.value())
+        assert len(payload) >= Checksum.NUMPY_THRESHOLD
+
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(frame[:-1] + bytes([frame[-1] ^ 0x01]))
+        uut.process(frame)
+        assert uut.packet() == (UbxCID(0x00, 0x02), None)
+        cid, packet = uut.packet()
+        assert cid == UbxCID(0x13, 0x40)
+        assert packet == payload
+        assert uut.frames_rx == 1
+        assert uut.crc_errors == 1
+
+    def test_payload_view(self):
+        data = bytearray(self.FRAME_1)
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(data)
+        _, packet = uut.packet()
+        assert isinstance(packet, memoryview)
+
+        # Caller may reuse its receive buffer
+        data[6:-2] = bytes(len(data) - 8)
+        assert packet == bytes(self.FRAME_1[6:-2])
+
+    def test_dropped(self):
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x41))
+        uut.process(self.FRAME_1)
+        cid, packet = uut.packet()
+        assert cid is None and packet is None
+        assert uut.frames_rx == 1
+
+    def test_split_frame(self):
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        for i in range(len(self.FRAME_1)):
+            uut.process(self.FRAME_1[i:i + 1])
+        cid, packet = uut.packet()
+        assert cid == UbxCID(0x13, 0x40)
+        assert packet == bytes(self.FRAME_1[6:-2])
+
+    def test_multiple_frames_with_garbage(self):
+        data = b'$GNTXT,\xb5' + bytes(self.FRAME_1) + b'\x00\xb5\x62\xb5' + bytes(self.FRAME_1)
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(data)
+        assert uut.packet()[0] == UbxCID(0x13, 0x40)
+        assert uut.packet()[0] == UbxCID(0x13, 0x40)
+        assert uut.packet() == (None, None)
+
+    def test_crc_error(self):
+        frame = list(self.FRAME_1)
+        frame[-1] += 1
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(frame + self.FRAME_1)
+        cid, packet = uut.packet()
+        assert cid == UbxCID(0x00, 0x02)
+        cid, packet = uut.packet()
+        assert cid == UbxCID(0x13, 0x40)
+
+    def test_invalid_length(self):
+        frame = list(self.FRAME_1)
+        frame[4:6] = [0xe9, 0x03]
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(frame + self.FRAME_1)
+        cid, packet = uut.packet()
+        assert cid == UbxCID(0x13, 0x40)
+        assert uut.packet() == (None, None)
+
+    def test_restart_drops_partial_frame(self):
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filter(UbxCID(0x13, 0x40))
+        uut.process(self.FRAME_1[:10])
+        uut.restart()
+        uut.process(self.FRAME_1[10:])
+        assert uut.packet() == (None, None)
+
+    def test_filter_map(self):
+        uut = UbxChunkParser(UbxCID(0x00, 0x02))
+        uut.set_filters([UbxCID(0x05, 0x00), UbxCID(0x13, 0x40)])
+        assert uut.filter_map[0x0500] == 1
+        assert uut.filter_map[0x1340] == 1
+        assert sum(uut.filter_map) == 2
+
+        # Previous entries are removed
+        uut.set_filter(UbxCID(0x05, 0x01))
+        assert uut.filter_map[0x0501] == 1
+        assert sum(uut.filter_map) == 1
@@ -0,0 +1,50 @@
+from ubxlib.ring_buffer import RingBuffer
+
+
+class TestRingBuffer:
+    def test_empty(self):
+        uut = RingBuffer(8)
+        assert len(uut) == 0
+        assert uut.read() == b''
+
+    def test_write_read(self):
+        uut = RingBuffer(8)
+        uut.write(b'1234')
+        assert len(uut) == 4
+        assert uut.read() == b'1234'
+        assert len(uut) == 0
+
+    def test_partial_read(self):
+        uut = RingBuffer(8)
+        uut.write(b'123456')
+        assert uut.read(2) == b'12'
+        assert uut.read() == b'3456'
+
+    def test_wrap_around(self):
+        uut = RingBuffer(8)
+        uut.write(b'123456')
+        assert uut.read(4) == b'1234'
+        uut.write(b'abcdef')
+        assert len(uut) == 8
+        assert uut.read() == b'56abcdef'
+        assert uut.overruns == 0
+
+    def test_overrun(self):
+        uut = RingBuffer(8)
+        uut.write(b'123456')
+        uut.write(b'abcd')
+        assert uut.overruns == 2
+        assert uut.read() == b'3456abcd'
+
+    def test_overrun_large_write(self):
+        uut = RingBuffer(4)
+        uut.write(b'12')
+        uut.write(b'abcdef')
+        assert uut.overruns == 4
+        assert uut.read() == b'cdef'
+
+    def test_clear(self):
+        uut = RingBuffer(4)
+        uut.write(b'12')
+        uut.clear()
+        assert uut.read() == b''
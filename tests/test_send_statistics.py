@@ -0,0 +1,34 @@
+import pytest
+
+from ubxlib.send_statistics import SendStatistics
+
+
+class TestSendStatistics:
+    def test_jitter(self):
+        uut = SendStatistics()
+        uut.record(1000, 10.000, 10.001, True)
+        uut.record(1100, 10.100, 10.103, True)     # 2 ms late
+        uut.record(1200, 10.200, 10.201, True)     # 2 ms early
+
+        assert uut.count == 3
+        assert uut.jitter_count == 2
+        assert uut.jitter_max == pytest.approx(0.002)
+        assert uut.jitter_min == pytest.approx(-0.002)
+        assert uut.jitter_mean == pytest.approx(0.0)
+        assert uut.jitter_rms == pytest.approx(0.002)
+        assert uut.send_max == pytest.approx(0.003)
+
+    def test_time_tag_wrap(self):
+        uut = SendStatistics()
+        uut.record(0xFFFFFFCE, 1.0, 1.0, True)
+        uut.record(50, 1.1, 1.1, True)
+        assert uut.last_jitter == pytest.approx(0.0)
+
+    def test_failed_restarts(self):
+        uut = SendStatistics()
+        uut.record(1000, 1.0, 1.0, True)
+        uut.record(1100, 1.1, 1.1, False)
+        uut.record(1200, 1.5, 1.5, True)
+        assert uut.failed == 1
+        assert uut.jitter_count == 0
+        assert 'failed 1' in str(uut)
@@ -0,0 +1,88 @@
+import socket
+import threading
+import time
+
+import pytest
+
+from ubxlib.server import GnssUBlox
+
+
+@pytest.fixture
+def connection():
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(('127.0.0.1', 0))
+    server.listen()
+
+    uut = GnssUBlox(rx_buffer_size=4096)
+    uut.gpsd_data_socket = server.getsockname()
+    uut._open_port()
+    peer, _ = server.accept()
+
+    yield uut, peer
+
+    peer.close()
+    uut._close_port()
+    server.close()
+
+
+class TestReceive:
+    def test_idle(self, connection):
+        uut, _ = connection
+        t_start = time.monotonic()
+        assert uut._receive() is None
+        assert time.monotonic() - t_start >= GnssUBlox.RX_TIMEOUT * 0.9
+
+    def test_burst(self, connection):
+        uut, peer = connection
+        data = bytes(range(256)) * 12
+        peer.sendall(data)
+
+        received = b''
+        while len(received) < len(data):
+            chunk = uut._receive()
+            assert isinstance(chunk, memoryview)
+            assert len(chunk) <= 4096
+            received += chunk
+
+        assert received == data
+
+    def test_returns_when_data_arrives(self, connection):
+        uut, peer = connection
+        peer.sendall(b'\xb5\x62')
+        t_start = time.monotonic()
+        assert uut._receive() == b'\xb5\x62'
+        assert time.monotonic() - t_start < GnssUBlox.RX_TIMEOUT / 2
+
+
+class TestSetup:
+    def test_endpoints(self):
+        uut = GnssUBlox(data_socket=('127.0.0.1', 12947), control_socket='/tmp/gpsd.sock')
+        assert uut.gpsd_data_socket == ('127.0.0.1', 12947)
+        assert uut.control.path == '/tmp/gpsd.sock'
+        assert GnssUBlox.gpsd_control_socket == '/var/run/gpsd.sock'
+
+    def test_devices_followed_by_raw_data(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(('127.0.0.1', 0))
+        server.listen()
+
+        def serve():
+            peer, _ = server.accept()
+            peer.sendall(b'{"class":"VERSION","release":"3.23.1"}\r\n')
+            peer.recv(4096)
+            # JSON and raw receiver data in one segment
+            peer.sendall(b'{"class":"DEVICES","devices":[{"path":"/dev/ttyS3"}]}\r\n\xb5\x62\x01\x03\xff\xfe')
+            peer.recv(4096)
+            peer.close()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+
+        uut = GnssUBlox(data_socket=server.getsockname())
+        uut.setup()
+        assert uut.selected_device == '/dev/ttyS3'
+        assert uut.release == '3.23.1'
+
+        uut.cleanup()
+        thread.join()
+        server.close()
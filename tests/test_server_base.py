@@ -0,0 +1,358 @@
+import struct
+import threading
+import time
+
+import pytest
+
+from ubxlib.frame_factory import FrameFactory
+from ubxlib.server_base import UbxServerBase_
+from ubxlib.ubx_ack import UbxAckAck, UbxAckNak
+from ubxlib.ubx_cfg_tp5 import UbxCfgTp5, UbxCfgTp5Poll
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+from ubxlib.ubx_mon_ver import UbxMonVerPoll
+from ubxlib.ubx_nav_status import UbxNavStatus, UbxNavStatusPoll
+
+
+class LoopbackServer(UbxServerBase_):
+    """
+    Backend that answers requests with prepared frames
+
+    responder(request_bytes) returns list of frames to be received
+    """
+    def __init__(self, responder):
+        super().__init__()
+        self.responder = responder
+        self.rx_data = bytearray()
+        self.sent = []
+        self.retry_delay_in_ms = 50
+
+    def _recover(self):
+        pass
+
+    def _receive(self):
+        data = bytes(self.rx_data)
+        self.rx_data.clear()
+        return data
+
+    def _transmit(self, data):
+        self.sent.append(bytes(data))
+        for frame in self.responder(bytes(data)):
+            frame.pack()
+            self.rx_data += frame.to_bytes()
+        return True
+
+
+def ack(cid, frame_class=UbxAckAck):
+    frame = frame_class()
+    frame.f.clsId = cid.cls
+    frame.f.msgId = cid.id
+    return frame
+
+
+def respond(request):
+    cls, id = request[2], request[3]
+    if (cls, id) == (UbxNavStatusPoll.CID.cls, UbxNavStatusPoll.CID.id):
+        frame = UbxNavStatus()
+        frame.f.iTow = 1234
+        return [frame]
+    elif (cls, id) == (UbxCfgTp5Poll.CID.cls, UbxCfgTp5Poll.CID.id):
+        frame = UbxCfgTp5()
+        frame.f.tpIdx = request[6]
+        return [frame, ack(UbxCfgTp5Poll.CID)]
+    return []
+
+
+def esf_meas(time_tag, data):
+    return UbxEsfMeas.construct(struct.pack('<IHHI', time_tag, 1 << 11, 0, data)).to_bytes()
+
+
+@pytest.fixture(scope="function")
+def server():
+    uut = LoopbackServer(respond)
+    uut.setup()
+    yield uut
+    uut.cleanup()
+    FrameFactory.destroy()
+
+
+class TestPollMany:
+    def test_poll_single(self, server):
+        res = server.poll(UbxNavStatusPoll())
+        assert res.f.iTow == 1234
+
+    def test_poll_many(self, server):
+        tp0 = UbxCfgTp5Poll()
+        tp0.f.tpIdx = 0
+        tp1 = UbxCfgTp5Poll()
+        tp1.f.tpIdx = 1
+
+        res = server.poll_many([UbxNavStatusPoll(), tp0, tp1])
+        assert len(server.sent) == 3
+        assert res[0].f.iTow == 1234
+        assert res[1].f.tpIdx == 0
+        assert res[2].f.tpIdx == 1
+
+    def test_poll_many_missing(self, server):
+        server.max_retries = 1
+        res = server.poll_many([UbxNavStatusPoll(), UbxMonVerPoll()])
+        assert res[0].f.iTow == 1234
+        assert res[1] is None
+
+        # Only unanswered request is retried
+        assert len(server.sent) == 3
+        assert server.sent[2] == UbxMonVerPoll().to_bytes()
+
+    def test_learned_timeout(self, server):
+        server.retry_delay_in_ms = 1000
+        for _ in range(10):
+            server.poll(UbxNavStatusPoll())
+        server.poll_many([UbxNavStatusPoll()])
+
+        stats = server.timeouts.statistics()[UbxNavStatusPoll.CID]
+        assert stats['count'] == 11
+        assert server._response_timeout(UbxNavStatusPoll.CID) < 0.5
+        assert server._response_timeout(UbxMonVerPoll.CID) == 1.0
+
+    def test_poll_many_nak(self):
+        def respond_nak(request):
+            return [ack(UbxCfgTp5Poll.CID, UbxAckNak)]
+
+        uut = LoopbackServer(respond_nak)
+        uut.setup()
+        res = uut.poll_many([UbxCfgTp5Poll()])
+        assert res == [None]
+        assert len(uut.sent) == 1
+        uut.cleanup()
+        FrameFactory.destroy()
+
+
+class TestSubscribe:
+    @staticmethod
+    def nav_status(itow):
+        frame = UbxNavStatus()
+        frame.f.iTow = itow
+        frame.pack()
+        return frame.to_bytes()
+
+    def test_listen(self, server):
+        sub = server.subscribe(UbxNavStatus)
+        server.rx_data += self.nav_status(1) + self.nav_status(2)
+        server.listen(0.01)
+
+        assert len(sub) == 2
+        assert [frame.f.iTow for frame in sub] == [1, 2]
+        assert len(sub) == 0
+
+    def test_queued_frames_detached(self, server):
+        # Queued frames must not reference the receive chunk
+        sub = server.subscribe(UbxNavStatus)
+        server.rx_data += self.nav_status(1)
+        server.listen(0.01)
+
+        assert isinstance(sub.get().data, bytes)
+
+    def test_callback(self, server):
+        received = []
+        server.subscribe(UbxNavStatus, received.append)
+        server.rx_data += self.nav_status(1)
+        server.listen(0.01)
+
+        assert received[0].f.iTow == 1
+
+    def test_dispatch_during_poll(self, server):
+        sub = server.subscribe(UbxNavStatus)
+        server.rx_data += self.nav_status(7)
+        res = server.poll(UbxCfgTp5Poll())
+
+        assert res.CID == UbxCfgTp5.CID
+        assert sub.get().f.iTow == 7
+
+    def test_queued_frames_before_request(self):
+        def respond_with_status(request):
+            return respond(request) + [UbxCfgTp5()]
+
+        uut = LoopbackServer(respond_with_status)
+        uut.setup()
+        sub = uut.subscribe(UbxCfgTp5)
+
+        # Frame following the response stays in parser queue ..
+        uut.poll(UbxNavStatusPoll())
+        assert len(sub) == 0
+
+        # .. and is delivered when the next request starts
+        uut.poll(UbxNavStatusPoll())
+        assert sub.received == 1
+        uut.cleanup()
+        FrameFactory.destroy()
+
+    def test_drops(self, server):
+        sub = server.subscribe(UbxNavStatus, max_frames=2)
+        for i in range(5):
+            server.rx_data += self.nav_status(i)
+        server.listen(0.01)
+
+        assert sub.received == 5
+        assert sub.dropped == 3
+        assert [frame.f.iTow for frame in sub] == [3, 4]
+
+    def test_unsubscribe(self, server):
+        sub = server.subscribe(UbxNavStatus)
+        server.unsubscribe(sub)
+        assert UbxNavStatus.CID not in server.parser.wait_cids
+
+        server.rx_data += self.nav_status(1)
+        server.listen(0.01)
+        assert len(sub) == 0
+
+    def test_frame_pool(self, server):
+        received = []
+        server.set_frame_pool(UbxNavStatus)
+        server.subscribe(UbxNavStatus, lambda frame: received.append((frame, frame.f.iTow)))
+        server.rx_data += self.nav_status(1) + self.nav_status(2)
+        server.listen(0.01)
+
+        assert [itow for _, itow in received] == [1, 2]
+        assert received[0][0] is received[1][0]
+
+
+class DelayedServer(LoopbackServer):
+    """
+    Backend that provides responses from another thread after a delay
+    """
+    def __init__(self, responder, delay_in_s):
+        super().__init__(responder)
+        self.delay_in_s = delay_in_s
+        self.receive_calls = 0
+        self.cond = threading.Condition()
+
+    def _wait_readable(self, timeout_in_s):
+        with self.cond:
+            self.cond.wait_for(lambda: self.rx_data, timeout_in_s)
+            return bool(self.rx_data)
+
+    def _receive(self):
+        with self.cond:
+            self.receive_calls += 1
+            return super()._receive()
+
+    def _transmit(self, data):
+        responses = bytearray()
+        for frame in self.responder(bytes(data)):
+            frame.pack()
+            responses += frame.to_bytes()
+
+        def deliver():
+            with self.cond:
+                self.rx_data += responses
+                self.cond.notify_all()
+
+        threading.Timer(self.delay_in_s, deliver).start()
+        return True
+
+
+class TestWait:
+    def test_wakeup_on_data(self):
+        uut = DelayedServer(respond, 0.05)
+        uut.retry_delay_in_ms = 2000
+        uut.setup()
+
+        t_start = time.monotonic()
+        res = uut.poll(UbxNavStatusPoll())
+        assert res.f.iTow == 1234
+        assert time.monotonic() - t_start < 1.0
+        assert uut.receive_calls == 1
+
+        uut.cleanup()
+        FrameFactory.destroy()
+
+    def test_timeout_without_data(self):
+        uut = DelayedServer(lambda request: [], 0.0)
+        uut.retry_delay_in_ms = 50
+        uut.max_retries = 0
+        uut.setup()
+
+        t_start = time.monotonic()
+        assert uut.poll(UbxNavStatusPoll()) is None
+        assert time.monotonic() - t_start >= 0.045
+        assert uut.receive_calls == 0
+
+        uut.cleanup()
+        FrameFactory.destroy()
+
+
+class TestLearnedTimeout:
+    def test_slow_response_after_learning(self):
+        uut = DelayedServer(respond, 0.0)
+        uut.retry_delay_in_ms = 1000
+        uut.setup()
+        for _ in range(10):
+            uut.poll(UbxNavStatusPoll())
+        assert uut._response_timeout(UbxNavStatusPoll.CID) < 0.2
+
+        # Response slower than learned timeout, retry waits for static timeout
+        uut.delay_in_s = 0.3
+        res = uut.poll(UbxNavStatusPoll())
+        assert res.f.iTow == 1234
+        assert uut.timeouts.statistics()[UbxNavStatusPoll.CID]['timeouts'] == 1
+        assert uut._response_timeout(UbxNavStatusPoll.CID) > 0.2
+        assert uut._response_timeout(UbxNavStatusPoll.CID, retry=1) == 1.0
+
+        time.sleep(0.3)
+        uut.cleanup()
+        FrameFactory.destroy()
+
+    def test_latency_step(self):
+        # Each response carries the number of the request it answers
+        requests = []
+
+        def respond_numbered(request):
+            requests.append(request)
+            frame = UbxNavStatus()
+            frame.f.iTow = len(requests)
+            return [frame]
+
+        uut = DelayedServer(respond_numbered, 0.05)
+        uut.retry_delay_in_ms = 1000
+        uut.setup()
+        for _ in range(10):
+            uut.poll(UbxNavStatusPoll())
+        assert uut._response_timeout(UbxNavStatusPoll.CID) < 0.3
+
+        # Late response to retried request must not be taken by next poll
+        uut.delay_in_s = 0.3
+        for _ in range(5):
+            first = len(requests) + 1
+            res = uut.poll(UbxNavStatusPoll())
+            assert first <= res.f.iTow <= len(requests)
+
+        assert uut.timeouts.statistics()[UbxNavStatusPoll.CID]['timeouts'] == 1
+        assert uut._response_timeout(UbxNavStatusPoll.CID) > 0.3
+
+        time.sleep(0.4)
+        uut.cleanup()
+        FrameFactory.destroy()
+
+
+class TestSendEsfMeas:
+    def test_send(self, server):
+        assert server.send_esf_meas(1000, [(11, 1500)])
+        assert server.send_esf_meas(1100, [(11, -2), (10, 7)])
+
+        data = struct.pack('<IIII', 1100, 2 << 11, (11 << 24) | 0xFFFFFE, (10 << 24) | 7)
+        assert server.sent[1] == UbxEsfMeas.construct(data).to_bytes()
+
+        assert server.esf_stats.count == 2
+        assert server.esf_stats.jitter_count == 1
+
+    def test_template_reused(self, server):
+        server.send_esf_meas(1000, [(11, 1)])
+        server.send_esf_meas(1100, [(11, 2)])
+        assert list(server._esf_templates) == [1]
+        assert server.sent[0] != server.sent[1]
+        assert server.sent[1] == esf_meas(1100, (11 << 24) | 2)
+
+    def test_send_failed(self, server):
+        server._transmit = lambda data: False
+        assert not server.send_esf_meas(1000, [(11, 1)])
+        assert server.esf_stats.failed == 1
+        assert server.esf_stats.count == 0
@@ -0,0 +1,200 @@
+import asyncio
+
+from ubxlib.frame_factory import FrameFactory
+from ubxlib.server_async import AsyncGnssUBlox
+from ubxlib.server_base_async import AsyncUbxServerBase_
+from ubxlib.ubx_ack import UbxAckAck
+from ubxlib.ubx_cfg_cfg import UbxCfgCfgAction
+from ubxlib.ubx_cfg_tp5 import UbxCfgTp5, UbxCfgTp5Poll
+from ubxlib.ubx_esf_meas import UbxEsfMeas
+from ubxlib.ubx_mon_ver import UbxMonVerPoll
+from ubxlib.ubx_nav_status import UbxNavStatus, UbxNavStatusPoll
+
+
+class AsyncLoopbackServer(AsyncUbxServerBase_):
+    """
+    Backend that answers requests with prepared frames
+    """
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+        self.retry_delay_in_ms = 50
+
+    async def _transmit(self, data):
+        self.sent.append(bytes(data))
+        cls, id = data[2], data[3]
+        frames = []
+        if (cls, id) == (UbxNavStatusPoll.CID.cls, UbxNavStatusPoll.CID.id):
+            frame = UbxNavStatus()
+            frame.f.iTow = 1234
+            frames = [frame]
+        elif (cls, id) == (UbxCfgTp5Poll.CID.cls, UbxCfgTp5Poll.CID.id):
+            frame = UbxCfgTp5()
+            frame.f.tpIdx = data[6]
+            frames = [frame, self.ack(UbxCfgTp5Poll.CID)]
+
+        # Deliver answers asynchronously, in one chunk
+        answer = bytearray()
+        for frame in frames:
+            frame.pack()
+            answer += frame.to_bytes()
+        asyncio.get_running_loop().call_soon(self._data_received, bytes(answer))
+        return True
+
+    def push(self, frame):
+        frame.pack()
+        self._data_received(bytes(frame.to_bytes()))
+
+    @staticmethod
+    def ack(cid):
+        frame = UbxAckAck()
+        frame.f.clsId = cid.cls
+        frame.f.msgId = cid.id
+        return frame
+
+
+def run(test):
+    async def wrapper():
+        uut = AsyncLoopbackServer()
+        await uut.setup()
+        try:
+            return await test(uut)
+        finally:
+            await uut.cleanup()
+            FrameFactory.destroy()
+
+    return asyncio.run(wrapper())
+
+
+class TestAsyncServer:
+    def test_poll(self):
+        async def test(uut):
+            res = await uut.poll(UbxNavStatusPoll())
+            assert res.f.iTow == 1234
+
+        run(test)
+
+    def test_poll_cfg_with_ack(self):
+        async def test(uut):
+            poll = UbxCfgTp5Poll()
+            poll.f.tpIdx = 1
+            res = await uut.poll(poll)
+            assert res.f.tpIdx == 1
+            assert len(uut.sent) == 1
+
+        run(test)
+
+    def test_poll_timeout(self):
+        async def test(uut):
+            uut.max_retries = 1
+            res = await uut.poll(UbxMonVerPoll())
+            assert res is None
+            assert len(uut.sent) == 2
+
+        run(test)
+
+    def test_poll_many(self):
+        async def test(uut):
+            tp0 = UbxCfgTp5Poll()
+            tp0.f.tpIdx = 0
+            res = await uut.poll_many([tp0, UbxNavStatusPoll()])
+            assert res[0].f.tpIdx == 0
+            assert res[1].f.iTow == 1234
+
+        run(test)
+
+    def test_set(self):
+        async def test(uut):
+            frame = UbxCfgCfgAction()
+            res = await uut.set(frame)
+            assert res is None      # Loopback does not ACK this frame
+
+            asyncio.get_running_loop().call_later(0.01, uut.push, uut.ack(UbxCfgCfgAction.CID))
+            res = await uut.set(frame)
+            assert res.CID == UbxAckAck.CID
+
+        run(test)
+
+    def test_frames(self):
+        async def test(uut):
+            received = []
+
+            async def consume():
+                async for frame in uut.frames([UbxNavStatus]):
+                    received.append(frame.f.iTow)
+                    if len(received) == 3:
+                        break
+
+            task = asyncio.ensure_future(consume())
+            await asyncio.sleep(0)
+            for i in range(3):
+                frame = UbxNavStatus()
+                frame.f.iTow = i
+                uut.push(frame)
+            await asyncio.wait_for(task, 1.0)
+
+            assert received == [0, 1, 2]
+            assert uut._subscribers == []
+
+        run(test)
+
+    def test_listen(self):
+        async def test(uut):
+            sub = uut.subscribe(UbxNavStatus)
+            asyncio.get_running_loop().call_later(0.01, uut.push, UbxNavStatus())
+            await uut.listen(0.05)
+            assert len(sub) == 1
+
+        run(test)
+
+    def test_stream_dropped(self):
+        async def test(uut):
+            uut._register_response(UbxNavStatus)
+            with uut._subscription([UbxNavStatus.CID], 2) as queue:
+                for _ in range(5):
+                    uut.push(UbxNavStatus())
+                assert queue.qsize() == 2
+                assert uut.stream_dropped == 3
+
+        run(test)
+
+    def test_send_esf_meas(self):
+        async def test(uut):
+            assert await uut.send_esf_meas(1000, [(11, 1500)])
+            assert await uut.send_esf_meas(1100, [(11, 1600)])
+
+            frame = UbxEsfMeas.construct(uut.sent[1][6:-2])
+            assert frame.f.timeTag == 1100
+            assert frame.f.data == (11 << 24) | 1600
+            assert uut.esf_stats.count == 2
+
+        run(test)
+
+
+class TestAsyncGpsdTransmit:
+    def test_close_on_timeout(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(AsyncGnssUBlox, 'CONTROL_TIMEOUT', 0.02)
+        path = str(tmp_path / 'gpsd.sock')
+
+        async def test():
+            closed = []
+
+            async def handle(reader, writer):
+                # Never respond, wait for client to close connection
+                await reader.read(100)
+                closed.append(await reader.read(100) == b'')
+                writer.close()
+
+            server = await asyncio.start_unix_server(handle, path)
+            uut = AsyncGnssUBlox(control_socket=path)
+            uut.selected_device = '/dev/ttyS1'
+            uut.cmd_header = b'&/dev/ttyS1='
+
+            assert await uut._transmit(b'\xb5\x62') is False
+            await asyncio.sleep(0.05)
+            assert closed == [True]
+
+            server.close()
+            await server.wait_closed()
+
+        asyncio.run(test())
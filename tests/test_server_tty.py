@@ -0,0 +1,67 @@
+import os
+import pty
+import time
+import tty
+
+import pytest
+
+from ubxlib.server_tty import GnssUBlox
+
+
+@pytest.fixture
+def connection():
+    master, slave = pty.openpty()
+    tty.setraw(slave)
+
+    uut = GnssUBlox(os.ttyname(slave), reader_thread=True)
+    uut._open_port()
+    uut._start_reader()
+
+    yield uut, master
+
+    uut._close_port()
+    os.close(master)
+    os.close(slave)
+
+
+def wait_for(condition, timeout_in_s=1.0):
+    t_end = time.monotonic() + timeout_in_s
+    while not condition() and time.monotonic() < t_end:
+        time.sleep(0.005)
+    return condition()
+
+
+class TestReaderThread:
+    def test_receive(self, connection):
+        uut, master = connection
+        os.write(master, b'\x01\x02\x03')
+        assert wait_for(lambda: len(uut._rx_ring) == 3)
+        assert uut._receive() == b'\x01\x02\x03'
+
+    def test_paused(self, connection):
+        uut, master = connection
+        with uut._reader_paused():
+            os.write(master, b'\x01\x02\x03')
+            time.sleep(0.05)
+            assert len(uut._rx_ring) == 0
+
+        assert wait_for(lambda: len(uut._rx_ring) == 3)
+
+    def test_flush(self, connection):
+        uut, master = connection
+        os.write(master, b'stale')
+        assert wait_for(lambda: len(uut._rx_ring) == 5)
+
+        uut._flush_input()
+        os.write(master, b'\x01')
+        assert wait_for(lambda: len(uut._rx_ring) == 1)
+        assert uut._receive() == b'\x01'
+
+    def test_recover(self, connection):
+        uut, master = connection
+        uut._recover()
+        uut.set_baudrate(9600)
+        assert uut.serial_port.baudrate == 9600
+
+        os.write(master, b'\x01')
+        assert wait_for(lambda: len(uut._rx_ring) == 1)
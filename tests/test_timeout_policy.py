@@ -0,0 +1,109 @@
+from ubxlib.cid import UbxCID
+from ubxlib.timeout_policy import LatencyHistogram, TimeoutPolicy
+
+
+CID = UbxCID(0x01, 0x03)
+
+
+class TestLatencyHistogram:
+    def test_empty(self):
+        uut = LatencyHistogram()
+        assert uut.percentile(0.99) is None
+
+    def test_percentile(self):
+        uut = LatencyHistogram()
+        for _ in range(99):
+            uut.add(0.004)
+        uut.add(0.150)
+        assert uut.count == 100
+        assert uut.percentile(0.5) == 0.005
+        assert uut.percentile(0.99) == 0.005
+        assert uut.percentile(1.0) == 0.150
+
+    def test_limited_to_max(self):
+        uut = LatencyHistogram()
+        uut.add(0.003)
+        assert uut.percentile(0.99) == 0.003
+
+    def test_above_last_bin(self):
+        uut = LatencyHistogram()
+        uut.add(12.0)
+        assert uut.percentile(0.99) == 12.0
+
+
+class TestTimeoutPolicy:
+    def test_fallback_without_samples(self):
+        uut = TimeoutPolicy()
+        for _ in range(TimeoutPolicy.MIN_SAMPLES - 1):
+            uut.record(CID, 0.010)
+        assert uut.timeout(CID, 1.8) == 1.8
+
+    def test_learned(self):
+        uut = TimeoutPolicy()
+        for _ in range(TimeoutPolicy.MIN_SAMPLES):
+            uut.record(CID, 0.010)
+        assert uut.timeout(CID, 1.8) == 0.010 + TimeoutPolicy.MARGIN_IN_S
+
+        # Never more than fallback
+        assert uut.timeout(CID, 0.05) == 0.05
+
+        # Other messages are not affected
+        assert uut.timeout(UbxCID(0x06, 0x31), 1.8) == 1.8
+
+    def test_not_adaptive(self):
+        uut = TimeoutPolicy()
+        for _ in range(TimeoutPolicy.MIN_SAMPLES):
+            uut.record(CID, 0.010)
+        uut.adaptive = False
+        assert uut.timeout(CID, 1.8) == 1.8
+
+    def test_backoff_after_timeout(self):
+        uut = TimeoutPolicy()
+        for _ in range(TimeoutPolicy.MIN_SAMPLES):
+            uut.record(CID, 0.010)
+        uut.record_timeout(CID)
+        assert uut.timeout(CID, 1.8) == 1.8
+
+        # Late response widens learned timeout
+        uut.record(CID, 0.600)
+        assert uut.timeout(CID, 1.8) == 0.600 + TimeoutPolicy.MARGIN_IN_S
+
+    def test_timeout_widens(self):
+        uut = TimeoutPolicy()
+        for _ in range(TimeoutPolicy.MIN_SAMPLES):
+            uut.record(CID, 0.010)
+        learned = uut.timeout(CID, 1.8)
+
+        # Expired wait is a lower bound of the latency
+        uut.record_timeout(CID, learned)
+        uut.record(CID, 0.010)
+        assert uut.timeout(CID, 1.8) == learned + TimeoutPolicy.MARGIN_IN_S
+
+    def test_batch_timeout(self):
+        uut = TimeoutPolicy()
+        other = UbxCID(0x0a, 0x04)
+        for _ in range(TimeoutPolicy.MIN_SAMPLES):
+            uut.record(CID, 0.010)
+            uut.record(other, 0.050)
+
+        # Longest timeout plus median latency of each request
+        assert uut.batch_timeout([CID, other, other], 1.8) == 0.050 + TimeoutPolicy.MARGIN_IN_S + 0.010 + 2 * 0.050
+        assert uut.batch_timeout([CID, other], 1.8, escalate=True) == 1.8 + 0.010 + 0.050
+
+        # Without learned latencies the static timeout is used
+        assert uut.batch_timeout([UbxCID(0x06, 0x31)] * 3, 1.8) == 1.8
+
+    def test_statistics(self):
+        uut = TimeoutPolicy()
+        uut.record(CID, 0.010)
+        uut.record(CID, 0.030)
+        uut.record_timeout(CID)
+
+        stats = uut.statistics()[CID]
+        assert stats['count'] == 2
+        assert stats['timeouts'] == 1
+        assert stats['p50'] == 0.010
+        assert stats['max'] == 0.030
+
+        uut.reset()
+        assert uut.statistics() == {}
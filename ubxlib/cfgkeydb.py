@@ -0,0 +1,261 @@
+#
+# Configuration key database, generated from u-blox interface descriptions
+#
+import argparse
+import bisect
+import csv
+import io
+import json
+import pkgutil
+import zlib
+from array import array
+
+
+class CfgKeyDatabase(object):
+    """
+    Table of configuration keys with name, type, scale and unit
+
+    The table is stored column wise in compact arrays instead of one
+    Python object per key:
+    - ids: sorted key ids, index of a key is found with bisect
+    - names: all names in one string, with start offsets per key
+    - types, units: indices into TYPES and a list of unique units
+    - scales: scale factor, 0.0 if the key has no scale
+
+    Names are looked up with an open addressing hash table (CRC32 of name,
+    linear probing) that holds the key indices.
+
+    The shipped table ubxlib/data/cfgkeys.csv is read on first use of
+    database(). It is created from a machine readable interface
+    description (CSV or JSON) with
+
+        python3 -m ubxlib.cfgkeydb description.json -o ubxlib/data/cfgkeys.csv
+    """
+
+    """ Value types: L bit, U/I unsigned/signed, E enumeration, X bitfield, R float """
+    TYPES = ('L', 'U1', 'I1', 'E1', 'X1', 'U2', 'I2', 'E2', 'X2', 'U4', 'I4', 'E4', 'X4', 'R4', 'U8', 'I8', 'X8', 'R8')
+
+    """ Size field of key id (bits 28..30) per value size in bytes, 0 for bit values """
+    SIZE_FROM_BYTES = {0: 1, 1: 2, 2: 3, 4: 4, 8: 5}
+
+    """ Columns of table """
+    COLUMNS = ('name', 'id', 'type', 'scale', 'unit')
+
+    def __init__(self, rows):
+        """
+        @param rows: iterable of (name, id, type, scale, unit) sorted by id,
+                     scale None and unit '' if not present
+        """
+        super().__init__()
+
+        self._ids = array('I')
+        self._offsets = array('I', [0])
+        self._types = array('B')
+        self._scales = array('d')
+        self._units = array('B')
+        self._unit_names = ['']
+
+        names = []
+        length = 0
+        type_index = {t: i for i, t in enumerate(__class__.TYPES)}
+        unit_index = {'': 0}
+        for name, key, value_type, scale, unit in rows:
+            if self._ids and key <= self._ids[-1]:
+                raise ValueError(f'key ids not sorted or duplicate at {name}')
+
+            self._ids.append(key)
+            names.append(name)
+            length += len(name)
+            self._offsets.append(length)
+            self._types.append(type_index[value_type])
+            self._scales.append(scale or 0.0)
+            if unit not in unit_index:
+                unit_index[unit] = len(self._unit_names)
+                self._unit_names.append(unit)
+            self._units.append(unit_index[unit])
+
+        self._names = ''.join(names)
+        self._table = self._build_table(names)
+
+    @classmethod
+    def from_csv(cls, text):
+        """
+        Creates database from table in CSV format, see generate()
+        """
+        return cls(__class__._read_csv(text))
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, key):
+        return self._index(key) is not None
+
+    def name(self, key):
+        """
+        @return: name of key id, None if unknown
+        """
+        index = self._index(key)
+        return self._name(index) if index is not None else None
+
+    def value_type(self, key):
+        """
+        @return: value type of key id, e.g. 'U2' or 'R8', None if unknown
+        """
+        index = self._index(key)
+        return __class__.TYPES[self._types[index]] if index is not None else None
+
+    def lookup(self, key):
+        """
+        @return: tuple (name, type, scale, unit) of key id, None if unknown
+        """
+        index = self._index(key)
+        if index is None:
+            return None
+
+        scale = self._scales[index]
+        return (self._name(index), __class__.TYPES[self._types[index]], scale if scale else None,
+                self._unit_names[self._units[index]])
+
+    def key(self, name):
+        """
+        @return: key id of name, None if unknown
+        """
+        mask = len(self._table) - 1
+        slot = zlib.crc32(name.encode()) & mask
+        while True:
+            index = self._table[slot]
+            if index == -1:
+                return None
+            if self._name(index) == name:
+                return self._ids[index]
+            slot = (slot + 1) & mask
+
+    """
+    Table generation
+    """
+    @staticmethod
+    def generate(records):
+        """
+        Validates and normalizes key descriptions, sorted by id
+
+        @param records: iterable of dicts with name, id, type and optional
+                        scale and unit. id can be an int or a string like
+                        '0x10310001'
+        @return: table in CSV format
+        """
+        rows = []
+        names = set()
+        for record in records:
+            name = str(record['name']).strip()
+            key = record['id']
+            if isinstance(key, str):
+                key = int(key, 0)
+            value_type = str(record['type']).strip().upper()
+            scale = record.get('scale')
+            scale = float(scale) if scale not in (None, '', '-') else None
+            unit = str(record.get('unit') or '').strip()
+            if unit == '-':
+                unit = ''
+
+            if value_type not in CfgKeyDatabase.TYPES:
+                raise ValueError(f'{name}: unknown type {value_type}')
+
+            size = 0 if value_type == 'L' else int(value_type[1:])
+            if (key >> 28) & 0x7 != CfgKeyDatabase.SIZE_FROM_BYTES[size]:
+                raise ValueError(f'{name}: size of key id 0x{key:08x} does not match type {value_type}')
+
+            if name in names:
+                raise ValueError(f'{name}: duplicate name')
+            names.add(name)
+            rows.append((key, name, value_type, scale, unit))
+
+        rows.sort()
+        for (key, name, *_), (next_key, next_name, *_) in zip(rows, rows[1:]):
+            if key == next_key:
+                raise ValueError(f'{name}, {next_name}: duplicate key id 0x{key:08x}')
+
+        out = io.StringIO()
+        writer = csv.writer(out, lineterminator='\n')
+        writer.writerow(CfgKeyDatabase.COLUMNS)
+        for key, name, value_type, scale, unit in rows:
+            writer.writerow((name, f'0x{key:08x}', value_type, repr(scale) if scale else '', unit))
+        return out.getvalue()
+
+    """
+    Private methods
+    """
+    def _index(self, key):
+        index = bisect.bisect_left(self._ids, key)
+        if index < len(self._ids) and self._ids[index] == key:
+            return index
+        return None
+
+    def _name(self, index):
+        return self._names[self._offsets[index]:self._offsets[index + 1]]
+
+    @staticmethod
+    def _build_table(names):
+        """
+        Hash table of name indices, at most half filled, -1 marks empty slots
+        """
+        size = 16
+        while size < 2 * len(names):
+            size *= 2
+
+        table = array('i', [-1]) * size
+        mask = size - 1
+        for index, name in enumerate(names):
+            slot = zlib.crc32(name.encode()) & mask
+            while table[slot] != -1:
+                slot = (slot + 1) & mask
+            table[slot] = index
+        return table
+
+    @staticmethod
+    def _read_csv(text):
+        reader = csv.reader(io.StringIO(text))
+        header = next(reader)
+        if tuple(header) != CfgKeyDatabase.COLUMNS:
+            raise ValueError(f'unexpected columns {header}')
+
+        for name, key, value_type, scale, unit in reader:
+            yield name, int(key, 16), value_type, float(scale) if scale else None, unit
+
+
+_database = None
+
+
+def database():
+    """
+    Key database shipped with package, loaded on first call
+    """
+    global _database
+    if _database is None:
+        text = pkgutil.get_data(__package__, 'data/cfgkeys.csv').decode()
+        _database = CfgKeyDatabase.from_csv(text)
+    return _database
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='Generates configuration key table from interface description')
+    parser.add_argument('source', help='interface description, .json (list of objects) or .csv with columns '
+                                       'name, id, type and optional scale, unit')
+    parser.add_argument('-o', '--output', help='output file, default stdout')
+    args = parser.parse_args(args)
+
+    with open(args.source, encoding='utf-8') as f:
+        if args.source.endswith('.json'):
+            records = json.load(f)
+        else:
+            records = list(csv.DictReader(f))
+
+    table = CfgKeyDatabase.generate(records)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            f.write(table)
+    else:
+        print(table, end='')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,16 +3,26 @@
 #
 import struct
 
+from .cfgkeydb import database
 from .types import Item
 
 
 class KeyInfo():
-    def __init__(self, name, signed=False):
+    def __init__(self, name, signed=False, value_type=None, scale=None, unit=''):
         self.name = name
         self.signed = signed
+        self.value_type = value_type
+        self.scale = scale
+        self.unit = unit
 
 
 class UbxKeyId(object):
+    """
+    Configuration key ids
+
+    Constants for frequently used keys. Names, value types, scales and
+    units of all known keys come from the key database (cfgkeydb.py).
+    """
     CFG_SIGNAL_GPS_ENA = 0x1031001f
     CFG_SIGNAL_GPS_L1CA_ENA = 0x10310001
     CFG_SIGNAL_SBAS_ENA = 0x10310020
@@ -55,65 +65,54 @@ class UbxKeyId(object):
     CFG_TP_PERIOD_LOCK_TP2 = 0x4005000e
     CFG_TP_LEN_LOCK_TP2 = 0x40050010
 
-    KEY_INFO = {
-        CFG_SIGNAL_GPS_ENA: KeyInfo("CFG-SIGNAL-GPS_ENA"),
-        CFG_SIGNAL_GPS_L1CA_ENA: KeyInfo("CFG-SIGNAL-GPS_L1CA_ENA"),
-        CFG_SIGNAL_SBAS_ENA: KeyInfo("CFG-SIGNAL-SBAS_ENA"),
-        CFG_SIGNAL_SBAS_L1CA_ENA: KeyInfo("CFG-SIGNAL-SBAS_L1CA_ENA"),
-        CFG_SIGNAL_GAL_ENA: KeyInfo("CFG-SIGNAL-GAL_ENA"),
-        CFG_SIGNAL_GAL_E1_ENA: KeyInfo("CFG-SIGNAL-GAL_E1_ENA"),
-        CFG_SIGNAL_BDS_ENA: KeyInfo("CFG-SIGNAL-BDS_ENA"),
-        CFG_SIGNAL_BDS_B1_ENA: KeyInfo("CFG-SIGNAL-BDS_B1_ENA"),
-        CFG_SIGNAL_GLO_ENA: KeyInfo("CFG-SIGNAL-GLO_ENA"),
-        CFG_SIGNAL_GLO_L1_ENA: KeyInfo("CFG-SIGNAL-GLO_L1_ENA"),
-        CFG_SIGNAL_QZSS_ENA: KeyInfo("CFG-SIGNAL-QZSS_ENA"),
-        CFG_SIGNAL_QZSS_L1CA_ENA: KeyInfo("CFG-SIGNAL-QZSS_L1CA_ENA"),
-        CFG_SIGNAL_QZSS_L1S_ENA: KeyInfo("CFG-SIGNAL-QZSS_L1S_ENA"),
-
-        CFG_NMEA_PROTVER: KeyInfo("CFG-NMEA-PROTVER"),
-        CFG_UART1_BAUDRATE: KeyInfo("CFG-UART1-BAUDRATE"),
-
-        CFG_NAVSPG_FIXMODE: KeyInfo("CFG-NAVSPG-FIXMODE"),
-        CFG_NAVSPG_DYNMODEL: KeyInfo("CFG-NAVSPG-DYNMODEL"),
-
-        CFG_RATE_MEAS: KeyInfo("CFG-RATE_MEAS"),
-        CFG_RATE_NAV: KeyInfo("CFG-RATE-NAV"),
-        CFG_RATE_NAV_PRIO: KeyInfo("CFG-RATE-NAV_PRIO"),
-
-        CFG_SFCORE_USE_SF: KeyInfo("CFG-SFCORE-USE-SF"),
-        CFG_SFIMU_IMU_MNTALG_YAW: KeyInfo("CFG-SFIMU-IMU_MNTALG_YAW"),
-        CFG_SFIMU_IMU_MNTALG_PITCH: KeyInfo("CFG-SFIMU-IMU_MNTALG_PITCH", True),    # Signed value
-        CFG_SFIMU_IMU_MNTALG_ROLL: KeyInfo("CFG-SFIMU-IMU_MNTALG_ROLL", True),    # Signed value
-
-        CFG_TP_PULSE_DEF: KeyInfo("CFG-TP-PULSE_DEF"),
-        CFG_TP_PULSE_LENGTH_DEF: KeyInfo("CFG-TP-PULSE_LENGTH_DEF"),
-        CFG_TP_TP2_ENA: KeyInfo("CFG-TP-TP2_ENA"),
-        CFG_TP_PERIOD_TP2: KeyInfo("CFG-TP-PERIOD_TP2"),
-        CFG_TP_LEN_TP2: KeyInfo("CFG-TP-LEN_TP2"),
-        CFG_TP_TIMEGRID_TP2: KeyInfo("CFG-TP-TIMEGRID_TP2"),
-        CFG_TP_ALIGN_TO_TOW_TP2: KeyInfo("CFG-TP-ALIGN_TO_TOW_TP2"),
-        CFG_TP_USE_LOCKED_TP2: KeyInfo("CFG-TP-USE_LOCKED_TP2"),
-        CFG_TP_POL_TP2: KeyInfo("CFG-TP-POL_TP2"),
-        CFG_TP_PERIOD_LOCK_TP2: KeyInfo("CFG-TP-PERIOD_LOCK_TP2"),
-        CFG_TP_LEN_LOCK_TP2: KeyInfo("CFG-TP-LEN_LOCK_TP2"),
+    """ Former names of keys renamed to their u-blox names, accepted by from_str() """
+    ALIASES = {
+        'CFG-RATE_MEAS': CFG_RATE_MEAS,
+        'CFG-SFCORE-USE-SF': CFG_SFCORE_USE_SF,
     }
 
     @staticmethod
     def sign(key):
-        if key in UbxKeyId.KEY_INFO:
-            return UbxKeyId.KEY_INFO[key].signed
-        else:
-            return False
+        value_type = database().value_type(key)
+        return value_type is not None and value_type[0] == 'I'
+
+    @staticmethod
+    def value_type(key):
+        """
+        @return: value type of key, e.g. 'U2', 'I4', 'R8', None if unknown
+        """
+        return database().value_type(key)
 
     @staticmethod
     def to_str(key):
-        if key in UbxKeyId.KEY_INFO:
-            return UbxKeyId.KEY_INFO[key].name
-        else:
+        return database().name(key)
+
+    @staticmethod
+    def from_str(name):
+        """
+        @return: key id of key name, e.g. 'CFG-RATE-MEAS', None if unknown
+        """
+        key = database().key(name)
+        if key is None:
+            key = UbxKeyId.ALIASES.get(name)
+        return key
+
+    @staticmethod
+    def info(key):
+        """
+        @return: KeyInfo of key, None if unknown
+        """
+        entry = database().lookup(key)
+        if entry is None:
             return None
 
+        name, value_type, scale, unit = entry
+        return KeyInfo(name, value_type[0] == 'I', value_type, scale, unit)
+
 
 class CfgKeyData(Item):
+    __slots__ = ('group_id', 'item_id', 'bits', 'signed', 'value_type')
+
     # Mapping of UBX header size information to bit sizes of value
     SIZE_FROM_BITS = {1: 1, 8: 2, 16: 3, 32: 4, 64: 5}
     BITS_FROM_SIZE = [0, 1, 8, 16, 32, 64, 0, 0]
@@ -122,12 +121,16 @@ class CfgKeyData(Item):
     # Note the special case for (one) bit values
     BYTES_FROM_BITS = {1: 1, 8: 1, 16: 2, 32: 4, 64: 8}
 
-    def __init__(self, name, group_id=None, item_id=None, bits=0, value=None, signed=False):
+    # struct formats of values for given bitlength: unsigned, signed, float
+    FORMATS = {8: ('<B', '<b', None), 16: ('<H', '<h', None), 32: ('<I', '<i', '<f'), 64: ('<Q', '<q', '<d')}
+
+    def __init__(self, name, group_id=None, item_id=None, bits=0, value=None, signed=False, value_type=None):
         super().__init__(name)
         self.group_id = group_id
         self.item_id = item_id
         self.bits = bits
         self.signed = signed
+        self.value_type = value_type
         self.value = value
 
     @classmethod
@@ -135,10 +138,11 @@ class CfgKeyData(Item):
         bits = CfgKeyData._bits_from_key(key)
         group_id = CfgKeyData._group_from_key(key)
         item_id = CfgKeyData._item_from_key(key)
-        # Whether value type is signed int can't be determined from key information
+        # Whether value type is signed int or float can't be determined from key information
         # Check key database
-        signed = UbxKeyId.sign(key)
-        return cls('<anon>', group_id, item_id, bits, value, signed)
+        value_type = UbxKeyId.value_type(key)
+        signed = value_type is not None and value_type[0] == 'I'
+        return cls('<anon>', group_id, item_id, bits, value, signed, value_type)
 
     @staticmethod
     def _bits_from_key(header):
@@ -200,94 +204,72 @@ class CfgKeyData(Item):
     def _pack_value(self):
         if self.bits == 1:
             value = struct.pack("<B", 1 if self.value else 0)
-        elif self.bits == 8:
-            if self.signed:
-                value = struct.pack("<b", self.value)
-            else:
-                value = struct.pack("<B", self.value)
-        elif self.bits == 16:
-            if self.signed:
-                value = struct.pack("<h", self.value)
-            else:
-                value = struct.pack("<H", self.value)
-        elif self.bits == 32:
-            if self.signed:
-                value = struct.pack("<i", self.value)
-            else:
-                value = struct.pack("<I", self.value)
-        elif self.bits == 64:
-            if self.signed:
-                value = struct.pack("<q", self.value)
-            else:
-                value = struct.pack("<Q", self.value)
         else:
-            raise ValueError
+            value = struct.pack(self._value_format(), self.value)
         return value
 
-    def unpack(self, data):
+    def _value_format(self):
+        """
+        struct format of value, depends on bits, signedness and float type (R4, R8)
+        """
+        try:
+            unsigned, signed, real = CfgKeyData.FORMATS[self.bits]
+        except KeyError:
+            raise ValueError
+
+        if self.is_float:
+            if real is None:
+                raise ValueError
+            return real
+        return signed if self.signed else unsigned
+
+    @property
+    def is_float(self):
+        return self.value_type is not None and self.value_type[0] == 'R'
+
+    def unpack(self, data, offset=0):
         """
         Unpacks configuration item key and data
         - Data length is dynamic and depends on key[30..28], invalid length raise ValueError
 
-        @param data: bytearray to extract data from
+        @param data: bytes-like object to extract data from
+        @param offset: position of key in data
         @return: number of bytes consumed
         """
-        if len(data) < 4:
+        if len(data) - offset < 4:
             raise ValueError
 
-        results = struct.unpack('<I', data[:4])     # extract 32 unsigned bits in little endian mode
+        results = struct.unpack_from('<I', data, offset)    # extract 32 unsigned bits in little endian mode
         key = results[0]
-        data = data[4:]
         bytes_consumed = 4
 
         self.bits = CfgKeyData._bits_from_key(key)
         self.group_id = CfgKeyData._group_from_key(key)
         self.item_id = CfgKeyData._item_from_key(key)
-        self.signed = UbxKeyId.sign(key)    # Signedness can't be decoded from data, query KeyId class
+        # Signedness and float types can't be decoded from data, query key database
+        self.value_type = UbxKeyId.value_type(key)
+        self.signed = self.value_type is not None and self.value_type[0] == 'I'
 
         try:
-            bytes_consumed += self._unpack_value(data)
+            bytes_consumed += self._unpack_value(data, offset + 4)
         except struct.error:
             raise ValueError
 
         return bytes_consumed
 
-    def _unpack_value(self, data):
+    def _unpack_value(self, data, offset):
         bytes_needed = CfgKeyData._bytes_for_size(self.bits)
         if self.bits == 1:
-            results = struct.unpack("<B", data[:bytes_needed])
+            results = struct.unpack_from("<B", data, offset)
             if results[0] == 0:
                 self.value = False
             elif results[0] == 1:
                 self.value = True
             else:
                 raise ValueError
-        elif self.bits == 8:
-            if self.signed:
-                results = struct.unpack("<b", data[:bytes_needed])
-            else:
-                results = struct.unpack("<B", data[:bytes_needed])
-            self.value = results[0]
-        elif self.bits == 16:
-            if self.signed:
-                results = struct.unpack("<h", data[:bytes_needed])
-            else:
-                results = struct.unpack("<H", data[:bytes_needed])
-            self.value = results[0]
-        elif self.bits == 32:
-            if self.signed:
-                results = struct.unpack("<i", data[:bytes_needed])
-            else:
-                results = struct.unpack("<I", data[:bytes_needed])
-            self.value = results[0]
-        elif self.bits == 64:
-            if self.signed:
-                results = struct.unpack("<q", data[:bytes_needed])
-            else:
-                results = struct.unpack("<Q", data[:bytes_needed])
-            self.value = results[0]
         else:
-            raise ValueError
+            results = struct.unpack_from(self._value_format(), data, offset)
+            self.value = results[0]
 
         return bytes_needed
 
@@ -309,6 +291,8 @@ class CfgKeyData(Item):
         if self.bits == 1:
             str = "True" if self.value else "False"
             res += f', value: {str}'
+        elif self.is_float:
+            res += f', value: {self.value:g}'
         elif self.bits == 8:
             if self.signed:
                 res += f', value: {self.value:d}'
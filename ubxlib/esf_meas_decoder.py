@@ -0,0 +1,199 @@
+import logging
+import re
+
+try:
+    import numpy
+except ImportError:     # pragma: no cover
+    numpy = None
+
+from .frame import UbxFrame
+from .ubx_esf_meas import UbxEsfMeas
+
+logger = logging.getLogger(__name__)
+
+
+class EsfMeasDecoder(object):
+    """
+    Batch decoder of UBX-ESF-MEAS frames into NumPy arrays
+
+    Intended for post-processing of sensor logs. decode() takes a buffer
+    with many frames and returns all measurements as structured array with
+    one row per measurement:
+    - timeTag: time tag of the frame
+    - dataType: sensor data type (bits 24..29 of data)
+    - value: data field (bits 0..23 of data), sign extended. Note that wheel
+      tick types use bit 23 as direction flag.
+    - calibTtag: calibration time tag, 0 if not present in frame
+
+    Frame starts are located with a regular expression, everything else is
+    done with array operations on all frames of the same length at once:
+    checksums, splitting of the data words, sign extension. Other frames
+    and garbage in the buffer are skipped. Data of an incomplete frame at
+    the end of the buffer is kept for the next call, so that large logs
+    can be processed in chunks.
+
+    Requires NumPy.
+    """
+
+    """ Structured array type of decoded measurements """
+    DTYPE = [('timeTag', '<u4'), ('dataType', 'u1'), ('value', '<i4'), ('calibTtag', '<u4')]
+
+    """ UBX frame header (sync, class, id, length) and checksum size """
+    HEADER_SIZE = 6
+    CHECKSUM_SIZE = 2
+
+    """ Payload size without measurements (timeTag, flags, id), maximum payload size """
+    MIN_PAYLOAD = 8
+    MAX_PAYLOAD = 8 + 31 * 4 + 4
+
+    _frame_start = re.compile(re.escape(bytes([UbxFrame.SYNC_1, UbxFrame.SYNC_2, UbxEsfMeas.CID.cls, UbxEsfMeas.CID.id])))
+
+    def __init__(self):
+        super().__init__()
+
+        if numpy is None:
+            raise ImportError('EsfMeasDecoder requires numpy')
+
+        self.frames_rx = 0
+        self.crc_errors = 0
+        self.length_errors = 0
+        self.buffer = b''
+
+    def restart(self):
+        self.buffer = b''
+
+    def decode(self, data):
+        """
+        Decodes all complete ESF-MEAS frames in kept data and data
+
+        @param data: bytes-like object with UBX frames
+        @return: structured array of measurements, see DTYPE
+        """
+        if self.buffer:
+            buf = self.buffer + bytes(data)
+        else:
+            buf = bytes(data)
+
+        values = numpy.frombuffer(buf, dtype=numpy.uint8)
+        starts, lengths = self._frames(buf, values)
+        self.frames_rx += len(starts)
+        return self._measurements(values, starts, lengths)
+
+    """
+    Private methods
+    """
+    def _frames(self, buf, values):
+        """
+        Locates frames with valid checksum, keeps incomplete frame in buffer
+
+        @return: tuple (start, payload length) arrays of frames
+        """
+        n = len(buf)
+        starts = numpy.fromiter((m.start() for m in __class__._frame_start.finditer(buf)), dtype=numpy.int64)
+
+        # Frame length, candidates without length field get an invalid length
+        lengths = numpy.full(len(starts), -1, dtype=numpy.int64)
+        has_length = starts + __class__.HEADER_SIZE <= n
+        s = starts[has_length]
+        lengths[has_length] = values[s + 4].astype(numpy.int64) | (values[s + 5].astype(numpy.int64) << 8)
+
+        ends = starts + __class__.HEADER_SIZE + lengths + __class__.CHECKSUM_SIZE
+        complete = has_length & (ends <= n)
+        plausible = (lengths >= __class__.MIN_PAYLOAD) & (lengths <= __class__.MAX_PAYLOAD) & (lengths % 4 == 0)
+        valid = numpy.zeros(len(starts), dtype=bool)
+        check = complete & plausible
+        valid[check] = self._checksums(values, starts[check], lengths[check])
+
+        # Frames must not overlap, sync sequences within accepted frames are skipped
+        accepted = []
+        end = 0
+        keep = max(n - 3, 0)
+        candidates = zip(starts.tolist(), ends.tolist(), has_length.tolist(), complete.tolist(),
+                         plausible.tolist(), valid.tolist())
+        for i, (start, frame_end, is_header, is_complete, is_plausible, is_valid) in enumerate(candidates):
+            if start < end:
+                continue
+
+            if not is_header or (is_plausible and not is_complete):
+                keep = start
+                break
+
+            if is_valid:
+                accepted.append(i)
+                end = frame_end
+            elif is_plausible:
+                logger.warning('checksum error in frame, discarding')
+                self.crc_errors += 1
+
+        self.buffer = buf[max(keep, end):]
+        return starts[accepted], lengths[accepted]
+
+    @staticmethod
+    def _checksums(values, starts, lengths):
+        """
+        Checks checksums of all frames, frames of the same length at once
+
+        @return: bool array, True if checksum matches
+        """
+        valid = numpy.zeros(len(starts), dtype=bool)
+        for length in numpy.unique(lengths).tolist():
+            selected = lengths == length
+            s = starts[selected]
+
+            # Checksum covers class, id, length and payload
+            size = length + 4
+            frames = values[(s + 2)[:, None] + numpy.arange(size)].astype(numpy.uint32)
+            cka = frames.sum(axis=1) & 0xFF
+            ckb = (frames @ numpy.arange(size, 0, -1, dtype=numpy.uint32)) & 0xFF
+            valid[selected] = (cka == values[s + 6 + length]) & (ckb == values[s + 7 + length])
+
+        return valid
+
+    def _measurements(self, values, starts, lengths):
+        """
+        Splits frames into measurements
+
+        Frames with the same payload length and number of measurements are
+        decoded as one 2D array of 32 bit words.
+        """
+        columns = []
+        for length in numpy.unique(lengths).tolist():
+            selected = numpy.flatnonzero(lengths == length)
+            payload = values[(starts[selected] + __class__.HEADER_SIZE)[:, None] + numpy.arange(length)]
+            words = payload.view('<u4')
+
+            flags = words[:, 1] & 0xFFFF
+            num_meas = (flags >> 11) & 0x1F
+            calib_valid = (flags >> 3) & 0x1
+            consistent = __class__.MIN_PAYLOAD + 4 * (num_meas + calib_valid) == length
+            self.length_errors += int(numpy.count_nonzero(~consistent))
+
+            for num in numpy.unique(num_meas[consistent]).tolist():
+                if num == 0:
+                    continue
+
+                rows = numpy.flatnonzero(consistent & (num_meas == num))
+                data = words[rows, 2:2 + num].ravel()
+                if num * 4 + __class__.MIN_PAYLOAD < length:
+                    calib = words[rows, 2 + num]
+                else:
+                    calib = numpy.zeros(len(rows), dtype=numpy.uint32)
+
+                # Measurements are sorted by frame position and index in frame
+                order = (selected[rows][:, None] * 32 + numpy.arange(num)).ravel()
+                columns.append((order, numpy.repeat(words[rows, 0], num), data, numpy.repeat(calib, num)))
+
+        result = numpy.empty(sum(len(c[0]) for c in columns), dtype=__class__.DTYPE)
+        if not columns:
+            return result
+
+        order, time_tag, data, calib = (numpy.concatenate(c) for c in zip(*columns))
+        index = numpy.argsort(order, kind='stable')
+        data = data[index]
+
+        result['timeTag'] = time_tag[index]
+        result['dataType'] = (data >> 24) & 0x3F
+        # Sign extension of 24 bit value: move to top of 32 bit, arithmetic shift back
+        result['value'] = (data << 8).view(numpy.int32) >> 8
+        result['calibTtag'] = calib[index]
+        return result
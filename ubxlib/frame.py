@@ -32,16 +32,11 @@ class UbxFrame(object):
         self.f = Fields()
 
     def to_bytes(self):
-        self._calc_checksum()
+        header = self._header()
+        self._calc_checksum(header)
 
         msg = bytearray([UbxFrame.SYNC_1, UbxFrame.SYNC_2])
-        msg.append(self.CID.cls)
-        msg.append(self.CID.id)
-
-        length = len(self.data)
-        msg.append((length >> 0) % 0xFF)
-        msg.append((length >> 8) % 0xFF)
-
+        msg += header
         msg += self.data
         msg.append(self.cka)
         msg.append(self.ckb)
@@ -57,18 +52,40 @@ class UbxFrame(object):
     def unpack(self):
         return self.f.unpack(self.data)
 
-    def _calc_checksum(self):
-        self.checksum.reset()
-
-        self.checksum.add(self.CID.cls)
-        self.checksum.add(self.CID.id)
-
+    def copy(self):
+        """
+        Returns new frame with a copy of the payload
+
+        Use it to keep frames that are reused by the server, see
+        FrameFactory.set_pool().
+        """
+        return self.construct(bytes(self.data))
+
+    def detach(self):
+        """
+        Copies payload, so that frame no longer references parser data
+
+        Frames built from received data hold a memoryview of the parser's
+        receive chunk. Call detach() before storing a frame for a long time.
+        """
+        if isinstance(self.data, memoryview):
+            self.data = bytes(self.data)
+        return self
+
+    def _header(self):
+        """
+        Returns class, id and little endian length of payload
+        """
         length = len(self.data)
-        self.checksum.add((length >> 0) & 0xFF)
-        self.checksum.add((length >> 8) & 0xFF)
+        return bytes([self.CID.cls, self.CID.id, length & 0xFF, (length >> 8) & 0xFF])
 
-        for d in self.data:
-            self.checksum.add(d)
+    def _calc_checksum(self, header=None):
+        if header is None:
+            header = self._header()
+
+        self.checksum.reset()
+        self.checksum.update(header)
+        self.checksum.update(self.data)
 
         self.cka, self.ckb = self.checksum.value()
 
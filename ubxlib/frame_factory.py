@@ -3,6 +3,36 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+class FramePool(object):
+    """
+    Frame instances of one class that are used in turn
+
+    Up to size frames are constructed, afterwards the least recently
+    returned frame is decoded again with the new payload. A frame is
+    therefore valid until size more frames of its CID are received.
+    """
+    def __init__(self, frame_class, size):
+        super().__init__()
+
+        assert size > 0
+        self.frame_class = frame_class
+        self.size = size
+        self.frames = []
+        self.next = 0
+
+    def get(self, data):
+        if len(self.frames) < self.size:
+            frame = self.frame_class.construct(data)
+            self.frames.append(frame)
+            return frame
+
+        frame = self.frames[self.next]
+        self.next = (self.next + 1) % self.size
+        frame.data = data
+        frame.unpack()
+        return frame
+
+
 class FrameFactory(object):
     __instance = None
 
@@ -27,6 +57,7 @@ class FrameFactory(object):
 
         super().__init__()
         self.__frames = dict()
+        self.__pools = dict()
 
     def register(self, frame_class):
         """
@@ -43,7 +74,29 @@ class FrameFactory(object):
         if not isinstance(frame_class, type):
             raise Exception("Can only register classes not instances (objects)")
 
-        self.__frames[frame_class.CID] = frame_class
+        cid = frame_class.CID
+        pool = self.__pools.get(cid)
+        if pool and pool.frame_class is not frame_class:
+            self.__pools[cid] = FramePool(frame_class, pool.size)
+
+        self.__frames[cid] = frame_class
+
+    def set_pool(self, cid, size):
+        """
+        Reuses frame instances for received frames of given CID
+
+        Instead of constructing a new frame per received payload, a pool
+        of size frames is decoded again in turn. Consumers that keep a
+        frame longer must call frame.copy().
+
+        @param size: number of frames in pool, 0 to disable pooling
+
+        Will throw KeyError if frame class is not known
+        """
+        if size:
+            self.__pools[cid] = FramePool(self.__frames[cid], size)
+        else:
+            self.__pools.pop(cid, None)
 
     def build(self, cid):
         """
@@ -59,8 +112,14 @@ class FrameFactory(object):
         """
         Constructs the desired frame and fills it with provided data
 
+        For pooled CIDs (see set_pool()) a pooled frame is returned.
+
         Will throw KeyError if frame class is not known
         """
+        pool = self.__pools.get(cid)
+        if pool:
+            return pool.get(data)
+
         frame_class = self.__frames[cid]
         frame = frame_class.construct(data)
         return frame
@@ -0,0 +1,302 @@
+import logging
+import queue
+import select
+import socket
+import threading
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class _Request(object):
+    __slots__ = ('cmd', 'done', 'success', 'cancelled', 'sent', 'resent')
+
+    def __init__(self, cmd, wait):
+        self.cmd = cmd
+        self.done = threading.Event() if wait else None
+        self.success = False
+        self.cancelled = False          # Caller stopped waiting, don't send
+        self.sent = None                # Send time in persistent mode
+        self.resent = False             # Queued again after connection was closed
+
+
+class GpsdControl(object):
+    """
+    Connection to gpsd control socket
+
+    Commands are handed to a worker thread that sends them and evaluates
+    the responses. Callers can either wait for the result of a command or
+    just queue it (fire and forget), so that they never wait for gpsd.
+
+    gpsd reads a control connection until the client closes it and treats
+    each read as one command. By default a connection is therefore opened
+    for every command. With persistent=True a single connection is kept
+    open, commands are newline terminated and sent back to back, and the
+    responses are matched in order by a reader thread. This requires a
+    gpsd that handles several commands per connection. A lost connection
+    is reopened with the next command. Commands that gpsd did not answer
+    before it closed the connection are queued once more. If a response
+    is overdue, the order can no longer be trusted: the connection is
+    closed, pending commands fail and the next command opens a new
+    connection.
+
+    Commands the caller stopped waiting for are not sent anymore, the
+    caller typically retries them itself.
+    """
+
+    """ Time to wait for gpsd response to a single command """
+    READ_TIMEOUT = 0.020
+
+    """ Time a caller waits for the result of a queued command """
+    RESPONSE_TIMEOUT = 0.25
+
+    def __init__(self, path, persistent=False):
+        super().__init__()
+
+        self.path = path
+        self.persistent = persistent
+
+        self.accepted = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.connects = 0
+
+        self._requests = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._sock = None               # Persistent connection
+        self._reader = None
+        self._pending = deque()         # Requests waiting for a response
+
+    def send(self, cmd, wait=True):
+        """
+        Sends command to gpsd
+
+        @param cmd: command as bytes, e.g. b'&/dev/ttyS3=b562...'
+        @param wait: wait until gpsd has responded
+        @return: True if gpsd accepted the command. Without wait, True
+                 once the command is queued.
+        """
+        if not self._worker:
+            self._worker = threading.Thread(target=self._work, name='gpsd-control', daemon=True)
+            self._worker.start()
+
+        request = _Request(cmd, wait)
+        self._requests.put(request)
+        if not wait:
+            return True
+
+        if not request.done.wait(__class__.RESPONSE_TIMEOUT):
+            logger.warning('no response from gpsd')
+            request.cancelled = True
+            return False
+
+        return request.success
+
+    def close(self):
+        """
+        Stops worker and closes connection
+
+        Queued commands are sent before the worker terminates.
+        """
+        if self._worker:
+            self._requests.put(None)
+            self._worker.join()
+            self._worker = None
+
+        with self._lock:
+            sock = self._sock
+        if sock:
+            self._disconnect(sock)
+            self._reader.join()
+            self._reader = None
+
+    """
+    Private methods
+    """
+    def _work(self):
+        while True:
+            request = self._requests.get()
+            if request is None:
+                break
+
+            if request.cancelled:
+                logger.debug('skipping command, caller stopped waiting')
+                self.cancelled += 1
+                continue
+
+            if self.persistent:
+                self._send_pipelined(request)
+            else:
+                self._send_single(request)
+
+    def _send_single(self, request):
+        success = False
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(__class__.READ_TIMEOUT)
+                sock.connect(self.path)
+                self.connects += 1
+                sock.sendall(request.cmd)
+
+                # checking for response
+                success = self._accepted(sock.recv(32))
+                sock.shutdown(socket.SHUT_RDWR)
+
+        except socket.error as e:
+            logger.error(e)
+
+        self._complete(request, success)
+
+    def _send_pipelined(self, request):
+        # If gpsd closed the connection, retry once with a new one
+        for _ in range(2):
+            sock = self._connect()
+            if not sock:
+                break
+
+            with self._lock:
+                request.sent = time.monotonic()
+                self._pending.append(request)
+
+            try:
+                sock.sendall(request.cmd + b'\n')
+                return
+            except socket.error as e:
+                logger.warning(f'control connection lost: {e}')
+                with self._lock:
+                    retry = request in self._pending
+                    if retry:
+                        self._pending.remove(request)
+
+                self._disconnect(sock)
+                if not retry:
+                    return
+
+        self._complete(request, False)
+
+    def _connect(self):
+        with self._lock:
+            if self._sock:
+                return self._sock
+
+        if self._reader:
+            self._reader.join()
+
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.connect(self.path)
+        except socket.error as e:
+            logger.error(e)
+            sock.close()
+            return None
+
+        self.connects += 1
+        with self._lock:
+            self._sock = sock
+
+        self._reader = threading.Thread(target=self._read, args=(sock,), name='gpsd-control-rx', daemon=True)
+        self._reader.start()
+        return sock
+
+    def _disconnect(self, sock, resend=False):
+        """
+        Closes connection, all requests without response fail
+
+        @param resend: queue requests without response again instead, once
+        """
+        with self._lock:
+            if self._sock is not sock:
+                return
+
+            self._sock = None
+            pending = list(self._pending)
+            self._pending.clear()
+
+        try:
+            sock.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        sock.close()
+
+        for request in pending:
+            if resend and not request.resent:
+                request.resent = True
+                self._requests.put(request)
+            else:
+                self._complete(request, False)
+
+    def _read(self, sock):
+        """
+        Reader thread, matches responses to pending requests in order
+
+        Closes the connection if the oldest pending request has not been
+        answered within RESPONSE_TIMEOUT.
+        """
+        data = b''
+        closed = False
+        while True:
+            try:
+                readable, _, _ = select.select([sock], [], [], __class__.RESPONSE_TIMEOUT / 4)
+                if not readable:
+                    if self._overdue():
+                        logger.warning('gpsd response overdue, reconnecting')
+                        break
+                    continue
+
+                chunk = sock.recv(4096)
+            except ConnectionResetError:
+                # Closed by gpsd with unread commands
+                closed = True
+                break
+            except (socket.error, ValueError):
+                # ValueError: socket closed by other thread
+                break
+            if not chunk:
+                # Closed by gpsd, commands sent meanwhile were not processed
+                closed = True
+                break
+
+            data += chunk
+            *lines, data = data.split(b'\n')
+            for line in lines:
+                if not line.strip():
+                    continue
+
+                with self._lock:
+                    request = self._pending.popleft() if self._pending else None
+                if request:
+                    self._complete(request, self._accepted(line))
+                else:
+                    logger.warning(f'unexpected response from gpsd: {line}')
+
+        self._disconnect(sock, resend=closed)
+
+    def _overdue(self):
+        with self._lock:
+            if not self._pending:
+                return False
+            return time.monotonic() - self._pending[0].sent > __class__.RESPONSE_TIMEOUT
+
+    def _complete(self, request, success):
+        request.success = success
+        if success:
+            self.accepted += 1
+        else:
+            self.failed += 1
+
+        if request.done:
+            request.done.set()
+
+    @staticmethod
+    def _accepted(response):
+        # 3.23.1 changed the response code from "OK", "ERROR" to JSON {"class":"ACK"} or
+        # {"class":"ERROR"}
+        # From https://gpsd.gitlab.io/gpsd/NEWS
+        #   Control messages to gpsd now return JSON, instead of, sometimes, OK or ERROR.
+        response = response.decode(errors='replace').strip()
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'response: {response}')
+
+        return 'OK' in response or 'ACK' in response
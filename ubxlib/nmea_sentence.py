@@ -0,0 +1,258 @@
+import datetime
+
+
+class NmeaField(object):
+    """
+    Sentence field that is converted on first access
+
+    The converter is called with the text of the given field indices,
+    missing fields are passed as empty strings. The result is cached in
+    the sentence, so each field is converted at most once.
+    """
+    __slots__ = ('name', 'indices', 'convert')
+
+    def __init__(self, indices, convert=str):
+        super().__init__()
+
+        self.name = None
+        self.indices = indices if isinstance(indices, tuple) else (indices, )
+        self.convert = convert
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, sentence, owner=None):
+        if sentence is None:
+            return self
+
+        try:
+            return sentence._values[self.name]
+        except KeyError:
+            fields = sentence.fields
+            texts = [fields[i] if i < len(fields) else '' for i in self.indices]
+            value = self.convert(*texts)
+            sentence._values[self.name] = value
+            return value
+
+
+def to_int(text):
+    return int(text) if text else None
+
+
+def to_float(text):
+    return float(text) if text else None
+
+
+def to_degrees(text, hemisphere):
+    """
+    Converts (d)ddmm.mmmmm and N/S or E/W to signed degrees
+    """
+    if not text:
+        return None
+
+    dot = text.find('.')
+    if dot == -1:
+        dot = len(text)
+    degrees = int(text[:dot - 2]) + float(text[dot - 2:]) / 60.0
+    return -degrees if hemisphere in ('S', 'W') else degrees
+
+
+def to_signed(text, direction):
+    """
+    Value with E/W direction, e.g. magnetic variation, W is negative
+    """
+    if not text:
+        return None
+    return -float(text) if direction == 'W' else float(text)
+
+
+def to_time(text):
+    """
+    Converts hhmmss.ss to datetime.time
+    """
+    if len(text) < 6:
+        return None
+
+    microsecond = round(float(text[6:]) * 1000000) if len(text) > 7 else 0
+    return datetime.time(int(text[0:2]), int(text[2:4]), int(text[4:6]), min(microsecond, 999999))
+
+
+def to_date(text):
+    """
+    Converts ddmmyy to datetime.date
+    """
+    if len(text) != 6:
+        return None
+    return datetime.date(2000 + int(text[4:6]), int(text[2:4]), int(text[0:2]))
+
+
+class NmeaSentence(object):
+    """
+    NMEA sentence
+
+    $GNRMC,155215.00,A,4719.13883,N,...*3E
+    -> talker 'GN', type 'RMC', fields ['155215.00', 'A', '4719.13883', 'N', ...]
+
+    Proprietary sentences ($P...) have talker 'P' and the rest of the
+    address as type, e.g. 'UBX' for $PUBX. raw is the sentence between
+    '$' and '*'. The text is decoded and split into fields only when
+    fields (or a typed field of a derived class) is accessed.
+
+    Derived classes for specific sentence types declare NmeaField
+    attributes and are registered by their TYPE. create() builds the
+    class matching a sentence.
+    """
+    __slots__ = ('raw', 'talker', 'type', '_fields', '_values')
+
+    """ Sentence type handled by derived class """
+    TYPE = None
+
+    _classes = dict()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.TYPE:
+            NmeaSentence._classes[cls.TYPE] = cls
+
+    def __init__(self, raw):
+        super().__init__()
+
+        self.raw = raw
+        self._fields = None
+        self._values = dict()
+
+        comma = raw.find(b',')
+        address = (raw[:comma] if comma != -1 else raw).decode('latin-1')
+        if address[:1] == 'P':
+            self.talker = 'P'
+            self.type = address[1:]
+        else:
+            self.talker = address[:2]
+            self.type = address[2:]
+
+    @staticmethod
+    def create(raw):
+        """
+        Builds sentence object, typed if a class for the sentence type exists
+
+        @param raw: sentence between '$' and '*'
+        """
+        cls = NmeaSentence
+        comma = raw.find(b',')
+        if comma != -1 and raw[:1] != b'P':
+            cls = NmeaSentence._classes.get(raw[2:comma].decode('latin-1'), NmeaSentence)
+        return cls(raw)
+
+    @property
+    def fields(self):
+        if self._fields is None:
+            self._fields = self.raw.decode('latin-1').split(',')[1:]
+        return self._fields
+
+    def __str__(self):
+        return f'{self.talker}{self.type}: {",".join(self.fields)}'
+
+
+class NmeaGga(NmeaSentence):
+    """
+    Global positioning system fix data
+    """
+    __slots__ = ()
+    TYPE = 'GGA'
+
+    time = NmeaField(0, to_time)
+    lat = NmeaField((1, 2), to_degrees)
+    lon = NmeaField((3, 4), to_degrees)
+    quality = NmeaField(5, to_int)
+    numSV = NmeaField(6, to_int)
+    hdop = NmeaField(7, to_float)
+    alt = NmeaField(8, to_float)
+    sep = NmeaField(10, to_float)
+    diffAge = NmeaField(12, to_float)
+    diffStation = NmeaField(13)
+
+
+class NmeaRmc(NmeaSentence):
+    """
+    Recommended minimum data
+    """
+    __slots__ = ()
+    TYPE = 'RMC'
+
+    time = NmeaField(0, to_time)
+    status = NmeaField(1)
+    lat = NmeaField((2, 3), to_degrees)
+    lon = NmeaField((4, 5), to_degrees)
+    spd = NmeaField(6, to_float)
+    cog = NmeaField(7, to_float)
+    date = NmeaField(8, to_date)
+    mv = NmeaField((9, 10), to_signed)
+    posMode = NmeaField(11)
+    navStatus = NmeaField(12)
+
+    @property
+    def valid(self):
+        return self.status == 'A'
+
+    @property
+    def timestamp(self):
+        """
+        Combined UTC date and time, None if either is missing
+        """
+        if self.date is None or self.time is None:
+            return None
+        return datetime.datetime.combine(self.date, self.time, tzinfo=datetime.timezone.utc)
+
+
+def _svids(*texts):
+    return [int(text) for text in texts if text]
+
+
+class NmeaGsa(NmeaSentence):
+    """
+    GNSS DOP and active satellites
+    """
+    __slots__ = ()
+    TYPE = 'GSA'
+
+    opMode = NmeaField(0)
+    navMode = NmeaField(1, to_int)
+    svid = NmeaField(tuple(range(2, 14)), _svids)
+    pdop = NmeaField(14, to_float)
+    hdop = NmeaField(15, to_float)
+    vdop = NmeaField(16, to_float)
+    systemId = NmeaField(17, to_int)
+
+
+class NmeaGsv(NmeaSentence):
+    """
+    GNSS satellites in view
+
+    satellites is a list of (svid, elv, az, cno) tuples, entries are None
+    if not reported.
+    """
+    __slots__ = ()
+    TYPE = 'GSV'
+
+    numMsg = NmeaField(0, to_int)
+    msgNum = NmeaField(1, to_int)
+    numSV = NmeaField(2, to_int)
+
+    @property
+    def satellites(self):
+        try:
+            return self._values['satellites']
+        except KeyError:
+            fields = self.fields
+            count = (len(fields) - 3) // 4
+            satellites = [tuple(to_int(text) for text in fields[3 + i * 4:7 + i * 4]) for i in range(count)]
+            self._values['satellites'] = satellites
+            return satellites
+
+    @property
+    def signalId(self):
+        # Optional last field, NMEA 4.10 and later
+        fields = self.fields
+        if (len(fields) - 3) % 4 == 1:
+            return to_int(fields[-1])
+        return None
@@ -0,0 +1,222 @@
+import logging
+import re
+
+from .parser_nmea import NmeaParser
+from .parser_ubx import UbxChunkParser
+
+logger = logging.getLogger(__name__)
+
+
+def _crc24q_table():
+    table = []
+    for i in range(256):
+        crc = i << 16
+        for _ in range(8):
+            crc <<= 1
+            if crc & 0x1000000:
+                crc ^= 0x1864CFB
+        table.append(crc & 0xFFFFFF)
+    return table
+
+
+class DemuxParser(UbxChunkParser):
+    """
+    Parser that splits a receiver stream into UBX, NMEA and RTCM3 frames
+
+    All frame starts (0xB5 0x62, '$', 0xD3) are located with a single
+    regular expression search. Each candidate is classified once and
+    handed to the decoder of its protocol, which consumes the whole frame.
+    Bytes within a frame are therefore never looked at as a possible
+    frame start of another protocol. In particular UBX sync sequences in
+    NMEA text, e.g. in version strings, no longer cause false UBX frames
+    and checksum errors.
+
+    UBX frames are filtered and queued exactly like UbxChunkParser does.
+    NMEA sentences and RTCM3 messages are counted and passed to the
+    optional nmea_handler and rtcm_handler callables as memoryview of the
+    whole frame, valid during the callback only.
+
+    Counters per protocol:
+    - UBX: frames_rx, crc_errors
+    - NMEA: nmea_rx, nmea_errors (checksum errors)
+    - RTCM3: rtcm_rx, rtcm_errors (CRC errors, also caused by 0xD3 bytes
+      outside of frames)
+    - garbage_bytes: bytes not belonging to any frame
+
+    A stray 0xD3 byte followed by a byte 0x00..0x03 looks like the header
+    of an RTCM3 frame of up to 1029 bytes. Such an incomplete candidate is
+    dropped as soon as a complete UBX frame or NMEA sentence with valid
+    checksum follows its preamble, so that responses and sentences are not
+    held back until enough data arrived.
+    """
+
+    """ NMEA sentence start and RTCM3 preamble """
+    NMEA_START = 0x24
+    RTCM3_PREAMBLE = 0xD3
+
+    """ Maximum NMEA sentence length including '$', checksum and line end """
+    NMEA_MAX_LENGTH = NmeaParser.MAX_LENGTH + 6
+
+    """ RTCM3 header (preamble, length) and CRC size """
+    RTCM3_HEADER_SIZE = 3
+    RTCM3_CRC_SIZE = 3
+
+    _frame_start = re.compile(rb'\xb5\x62|[$\xd3]')
+    _ubx_or_nmea_start = re.compile(rb'\xb5\x62|\$')
+
+    # Sentence characters are printable, '*' starts the checksum. Bytes
+    # above 0x7f are allowed as receivers use Latin-1 in text messages.
+    _nmea_sentence = re.compile(rb'\$([\x20-\x29\x2b-\xff]+)\*([0-9A-Fa-f]{2})\r?\n')
+    _nmea_partial = re.compile(rb'\$[\x20-\x29\x2b-\xff]*(\*[0-9A-Fa-f]{0,2}\r?)?')
+
+    _crc24q = _crc24q_table()
+
+    def __init__(self, crc_error_cid):
+        super().__init__(crc_error_cid)
+
+        self.nmea_handler = None
+        self.rtcm_handler = None
+
+        self.nmea_rx = 0
+        self.nmea_errors = 0
+        self.rtcm_rx = 0
+        self.rtcm_errors = 0
+        self.garbage_bytes = 0
+
+    def process(self, data):
+        buf = self._append(data)
+        view = memoryview(buf)
+        search = __class__._frame_start.search
+
+        pos = 0
+        end = len(buf)
+        while True:
+            match = search(buf, pos)
+            if not match:
+                tail = self._tail(buf)
+                self.garbage_bytes += tail - pos
+                pos = tail
+                break
+
+            start = match.start()
+            self.garbage_bytes += start - pos
+
+            first = buf[start]
+            if first == __class__.NMEA_START:
+                next_pos = self._parse_nmea(buf, view, start, end)
+            elif first == __class__.RTCM3_PREAMBLE:
+                next_pos = self._parse_rtcm3(buf, view, start, end)
+            else:
+                next_pos = self._parse_frame(buf, view, start, end)
+
+            if next_pos is None:
+                # Frame not complete yet
+                pos = start
+                break
+            pos = next_pos
+
+        # Keep incomplete data for next call
+        self.buffer = buf[pos:]
+
+    def _parse_nmea(self, buf, view, start, end):
+        limit = min(end, start + __class__.NMEA_MAX_LENGTH)
+        match = __class__._nmea_sentence.match(buf, start, limit)
+        if not match:
+            if end < start + __class__.NMEA_MAX_LENGTH and __class__._nmea_partial.fullmatch(buf, start, end):
+                return None
+
+            # Not a sentence, resume search after '$'
+            self.garbage_bytes += 1
+            return start + 1
+
+        body, checksum = match.groups()
+        if NmeaParser.checksum(body) == int(checksum, 16):
+            self.nmea_rx += 1
+            if self.nmea_handler:
+                self.nmea_handler(view[start:match.end()])
+        else:
+            logger.warning('checksum error in nmea frame, discarding')
+            self.nmea_errors += 1
+
+        return match.end()
+
+    def _parse_rtcm3(self, buf, view, start, end):
+        if start + __class__.RTCM3_HEADER_SIZE > end:
+            return None
+
+        # 6 reserved bits must be zero, followed by 10 bit length
+        if buf[start + 1] & 0xFC:
+            self.garbage_bytes += 1
+            return start + 1
+
+        length = ((buf[start + 1] & 0x03) << 8) | buf[start + 2]
+        crc_start = start + __class__.RTCM3_HEADER_SIZE + length
+        frame_end = crc_start + __class__.RTCM3_CRC_SIZE
+        if frame_end > end:
+            if self._frame_follows(buf, start + 1, end):
+                # Not an RTCM3 frame, resume search after preamble
+                self.rtcm_errors += 1
+                return start + 1
+            return None
+
+        if self._crc(buf, start, crc_start) != int.from_bytes(buf[crc_start:frame_end], 'big'):
+            # Most likely a 0xD3 byte outside of a frame, resume search after it
+            self.rtcm_errors += 1
+            return start + 1
+
+        self.rtcm_rx += 1
+        if self.rtcm_handler:
+            self.rtcm_handler(view[start:frame_end])
+        return frame_end
+
+    def _frame_follows(self, buf, pos, end):
+        """
+        Checks whether a complete UBX frame or NMEA sentence with valid
+        checksum starts in buf[pos:end]
+        """
+        search = __class__._ubx_or_nmea_start.search
+        while True:
+            match = search(buf, pos, end)
+            if not match:
+                return False
+
+            start = match.start()
+            if buf[start] == __class__.NMEA_START:
+                if self._nmea_valid(buf, start, end):
+                    return True
+            elif self._ubx_valid(buf, start, end):
+                return True
+            pos = start + 1
+
+    def _ubx_valid(self, buf, start, end):
+        if start + UbxChunkParser.HEADER_SIZE > end:
+            return False
+
+        msg_len = buf[start + 4] | (buf[start + 5] << 8)
+        payload_end = start + UbxChunkParser.HEADER_SIZE + msg_len
+        if msg_len > __class__.MAX_MESSAGE_LENGTH or payload_end + UbxChunkParser.CHECKSUM_SIZE > end:
+            return False
+        return self._frame_valid(buf, start + 2, payload_end)
+
+    @staticmethod
+    def _nmea_valid(buf, start, end):
+        limit = min(end, start + DemuxParser.NMEA_MAX_LENGTH)
+        match = DemuxParser._nmea_sentence.match(buf, start, limit)
+        if not match:
+            return False
+
+        body, checksum = match.groups()
+        return NmeaParser.checksum(body) == int(checksum, 16)
+
+    @staticmethod
+    def _crc(buf, start, end):
+        """
+        CRC-24Q as used by RTCM3, computed over header and message
+
+        Table driven, one lookup per byte.
+        """
+        table = DemuxParser._crc24q
+        crc = 0
+        for byte in buf[start:end]:
+            crc = ((crc << 8) & 0xFFFFFF) ^ table[(crc >> 16) ^ byte]
+        return crc
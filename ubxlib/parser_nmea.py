@@ -1,97 +1,159 @@
 import logging
-from enum import Enum
+import operator
+from functools import reduce
+
+try:
+    import numpy
+except ImportError:     # pragma: no cover
+    numpy = None
+
+from .nmea_sentence import NmeaSentence
 
 logger = logging.getLogger(__name__)
 
 
 class NmeaParser(object):
     """
-    Parser that tries to read NMEA frames from arbitrary byte stream
+    Parser that extracts NMEA sentences from arbitrary byte streams
 
     $GNRMC,155215.00,A,4719.13883,N,00758.44996,E,0.259,,171020,2.47,E,A*3E\r\n
+
+    Data is split into lines with bytes.find(). A sentence starts at the
+    last '$' of a line, so binary data in front of it is skipped. The XOR
+    checksum is computed over the whole sentence in one call, for larger
+    batches of sentences with NumPy if available. A sentence at the end of
+    the data is accepted as soon as its checksum is complete, the line end
+    is not required.
+
+    process() only counts sentences, sentences() also returns them as
+    NmeaSentence objects, typed for known sentences (see nmea_sentence.py).
+    """
+
+    """
+    Maximum sentence length between '$' and '*'
+
+    PUBX,03 (satellite status) has about 20 characters per tracked
+    satellite, the limit covers receivers with up to 200 channels.
     """
-    class State(Enum):
-        """ Parser states """
-        WAIT_SYNC = 1
-        DATA = 2
-        CHKSUM1 = 3
-        CHKSUM2 = 4
-        LINEEND = 5
+    MAX_LENGTH = 4096
+
+    """ Batches of at least this many sentences are checked with NumPy if available """
+    NUMPY_THRESHOLD = 16
 
     def __init__(self):
         super().__init__()
 
         self.frames_rx = 0
-        self.state = __class__.State.WAIT_SYNC
-        self._reset()
+        self.crc_errors = 0
+        self.buffer = b''
 
     def restart(self):
-        self.state = __class__.State.INIT
+        self.buffer = b''
 
     def process(self, data):
-        for d in data:
-            char = chr(d)
-            self._process_byte(char)
-
-    def _process_byte(self, data):
-        if data == '$':
-            self._reset()
-            self.state = __class__.State.DATA
+        self._parse(data)
+
+    def sentences(self, data):
+        """
+        Processes data and returns list of NmeaSentence of all valid
+        sentences completed by it
+        """
+        buf, spans = self._parse(data)
+        return [NmeaSentence.create(buf[start:end]) for start, end in spans]
+
+    @staticmethod
+    def checksum(data):
+        """
+        XOR checksum of sentence between '$' and '*'
+        """
+        return reduce(operator.xor, data, 0)
+
+    """
+    Private methods
+    """
+    def _parse(self, data):
+        """
+        Extracts sentences from kept data and new data
+
+        @return: tuple (buffer, list of (start, end) of valid sentences)
+        """
+        if self.buffer:
+            buf = self.buffer + bytes(data)
         else:
-            if self.state == __class__.State.WAIT_SYNC:
-                self._state_wait_sync(data)
-            elif self.state == __class__.State.DATA:
-                self._state_data(data)
-            elif self.state == __class__.State.CHKSUM1:
-                self._state_checksum1(data)
-            elif self.state == __class__.State.CHKSUM2:
-                self._state_checksum2(data)
-            elif self.state == __class__.State.LINEEND:
-                self._state_lineend(data)
-
-    def _state_wait_sync(self, d):
-        if d == '$':
-            self._reset()
-            self.state = __class__.State.DATA
-
-    def _state_data(self, d):
-        if d == '*':
-            self.state = __class__.State.CHKSUM1
+            buf = bytes(data)
+
+        candidates = []         # (body start, '*' position, checksum)
+        pos = 0
+        end = len(buf)
+        while True:
+            nl = buf.find(b'\n', pos)
+            if nl == -1:
+                break
+            self._candidate(buf, pos, nl, candidates)
+            pos = nl + 1
+
+        # Keep incomplete sentence, unless its checksum is already there
+        start = buf.rfind(b'$', pos)
+        if start != -1 and self._candidate(buf, start, end, candidates):
+            self.buffer = b''
+        elif start != -1 and end - start <= __class__.MAX_LENGTH:
+            self.buffer = buf[start:]
         else:
-            self.msg_data += d
-            self.checksum_data ^= ord(d)
-
-    def _state_checksum1(self, d):
-        val = self._to_bin(d)
-        if val != -1:
-            self.checksum = val << 4
-            self.state = __class__.State.CHKSUM2
+            self.buffer = b''
+
+        return buf, self._verify(buf, candidates)
+
+    def _candidate(self, buf, pos, end, candidates):
+        """
+        Adds sentence in line buf[pos:end] to candidates
+
+        @return: True if line contains a sentence with checksum
+        """
+        start = buf.rfind(b'$', pos, end)
+        if start == -1:
+            return False
+
+        star = buf.rfind(b'*', start, end)
+        if star == -1 or star + 3 > end or star - start > __class__.MAX_LENGTH:
+            return False
+
+        hi = self._to_bin(chr(buf[star + 1]))
+        lo = self._to_bin(chr(buf[star + 2]))
+        if hi == -1 or lo == -1:
+            return False
+
+        # Empty sentence is ignored
+        if star > start + 1:
+            candidates.append((start + 1, star, (hi << 4) | lo))
+        return True
+
+    def _verify(self, buf, candidates):
+        """
+        Compares checksums, counts sentences
+
+        @return: list of (start, end) of valid sentences
+        """
+        if numpy and len(candidates) >= __class__.NUMPY_THRESHOLD:
+            # XOR reduce buf[start:end] of all sentences in one call,
+            # results for the gaps between sentences are skipped
+            indices = numpy.array([i for start, end, _ in candidates for i in (start, end)])
+            values = numpy.frombuffer(buf, dtype=numpy.uint8)
+            computed = numpy.bitwise_xor.reduceat(values, indices)[::2].tolist()
         else:
-            self.state = __class__.State.WAIT_SYNC
+            computed = [reduce(operator.xor, buf[start:end], 0) for start, end, _ in candidates]
 
-    def _state_checksum2(self, d):
-        val = self._to_bin(d)
-        if val != -1:
-            self.checksum += val
-
-            if self.checksum == self.checksum_data:
+        valid = []
+        for (start, end, checksum), value in zip(candidates, computed):
+            if value == checksum:
                 self.frames_rx += 1
-                logger.debug(f'{self.msg_data}')
+                valid.append((start, end))
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f'{buf[start:end].decode("latin-1")}')
             else:
+                self.crc_errors += 1
                 logger.warning('checksum error in frame, discarding')
 
-            self.state = __class__.State.LINEEND
-        else:
-            self.state = __class__.State.WAIT_SYNC
-
-    def _state_lineend(self, d):
-        if d == '\n':
-            self.state = __class__.State.WAIT_SYNC
-
-    def _reset(self):
-        self.msg_data = ''
-        self.checksum = 0
-        self.checksum_data = 0
+        return valid
 
     @staticmethod
     def _to_bin(data):
@@ -1,5 +1,7 @@
 import binascii
 import logging
+import struct
+from collections import deque
 from enum import Enum
 
 from .checksum import Checksum
@@ -15,9 +17,8 @@ class UbxParser(object):
 
     Byte streams can also be NMEA or other frames. Unfortunately,
     u-blox frame header also appears in NMEA frames (e.g. version
-    information). Such data will be detected by a checksum error
-
-    TODO: Do more elaborate parsing to filter out such data in advance
+    information). Such data will be detected by a checksum error.
+    DemuxParser skips NMEA sentences as a whole and avoids this.
     """
 
     """ Maximum message length supported """
@@ -39,10 +40,14 @@ class UbxParser(object):
         super().__init__()
 
         self.crc_error_cid = crc_error_cid
-        self.rx_queue = list()
+        self.rx_queue = deque()
         self.wait_cids = None
+        # Filter bitmap, indexed by 16 bit key (class << 8 | id)
+        self.filter_map = bytearray(0x10000)
+        self._filter_keys = []
         self.checksum = Checksum()
         self.frames_rx = 0
+        self.crc_errors = 0
         self.state = __class__.State.INIT
         self._reset()
 
@@ -51,19 +56,26 @@ class UbxParser(object):
 
     def set_filter(self, cid):
         assert isinstance(cid, UbxCID)
-        self.wait_cids = [cid]  # Put single filter in list
+        self.set_filters([cid])    # Put single filter in list
 
     def set_filters(self, cids):
         assert isinstance(cids, list)
         self.wait_cids = cids
 
+        # Update bitmap, clear previous entries only
+        for key in self._filter_keys:
+            self.filter_map[key] = 0
+        self._filter_keys = [(cid.cls << 8) | cid.id for cid in cids]
+        for key in self._filter_keys:
+            self.filter_map[key] = 1
+
     def empty_queue(self):
         self.rx_queue.clear()
 
     def packet(self):
         # Returns (cid, data) or (None, None)
         try:
-            return self.rx_queue.pop(0)
+            return self.rx_queue.popleft()
         except IndexError:
             # No more frames to de-queue
             return (None, None)
@@ -106,22 +118,18 @@ class UbxParser(object):
     def _state_class(self, d):
         # TODO: Could add check for SYNC_1, SYNC_2 here, as both are not valid classes or IDs
         self.msg_class = d
-        self.checksum.add(d)
         self.state = __class__.State.ID
 
     def _state_id(self, d):
         self.msg_id = d
-        self.checksum.add(d)
         self.state = __class__.State.LEN1
 
     def _state_len1(self, d):
         self.msg_len = d
-        self.checksum.add(d)
         self.state = __class__.State.LEN2
 
     def _state_len2(self, d):
         self.msg_len = self.msg_len + (d * 256)
-        self.checksum.add(d)
 
         if self.msg_len == 0:
             self.state = __class__.State.CRC1
@@ -134,7 +142,6 @@ class UbxParser(object):
 
     def _state_data(self, d):
         self.msg_data.append(d)
-        self.checksum.add(d)
         self.ofs += 1
 
         if self.ofs == self.msg_len:
@@ -147,24 +154,28 @@ class UbxParser(object):
     def _state_crc2(self, d):
         self.ckb = d
 
+        # Compute checksum over header and payload in one go
+        self.checksum.reset()
+        self.checksum.update(bytes([self.msg_class, self.msg_id, self.msg_len & 0xFF, self.msg_len >> 8]))
+        self.checksum.update(self.msg_data)
+
         # if checksum matches received checksum ..
         if self.checksum.matches(self.cka, self.ckb):
             self.frames_rx += 1
 
             # .. and frame passes filter ..
-            cid = UbxCID(self.msg_class, self.msg_id)
-
-            if self.wait_cids and cid in self.wait_cids:
+            if self.filter_map[(self.msg_class << 8) | self.msg_id]:
                 # .. queue packet (CID and data)
-                packet = (cid, self.msg_data)
+                packet = (UbxCID(self.msg_class, self.msg_id), self.msg_data)
                 self.rx_queue.append(packet)
             else:
                 if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f'no match - dropping {cid}, {self.msg_len} bytes')
+                    logger.debug(f'no match - dropping {UbxCID(self.msg_class, self.msg_id)}, {self.msg_len} bytes')
         else:
             logger.warning('checksum error in frame, discarding')
             logger.warning(f'{self.msg_class:02x} {self.msg_id:02x} {binascii.hexlify(self.msg_data)}')
 
+            self.crc_errors += 1
             crc_error_message = (self.crc_error_cid, None)
             self.rx_queue.append(crc_error_message)
 
@@ -179,3 +190,144 @@ class UbxParser(object):
         self.ckb = 0
         self.ofs = 0
         self.checksum.reset()
+
+
+class UbxChunkParser(UbxParser):
+    """
+    Parser that extracts UBX frames from whole chunks of data
+
+    Instead of running the byte wise state machine of UbxParser, this
+    engine searches the sync sequence with bytes.find(), decodes the header
+    with a single struct.unpack_from() and slices out the payload in one
+    operation. Incomplete frames at the end of a chunk are kept until the
+    next call to process().
+
+    Frame filters, queue handling and statistics are the same as for
+    UbxParser, so both engines can be used interchangeably.
+
+    Payloads are returned as memoryview slices of the received chunk
+    without copying. Input that is not of type bytes is copied once per
+    chunk, so callers may reuse their receive buffers.
+    """
+
+    """ Frame start sequence """
+    SYNC = bytes([UbxFrame.SYNC_1, UbxFrame.SYNC_2])
+
+    """ Size of header (sync, class, id, length) and trailing checksum """
+    HEADER_SIZE = 6
+    CHECKSUM_SIZE = 2
+
+    _header = struct.Struct('<BBH')
+
+    def __init__(self, crc_error_cid):
+        super().__init__(crc_error_cid)
+
+        self.buffer = b''
+
+    def restart(self):
+        super().restart()
+        self.buffer = b''
+
+    def process(self, data):
+        buf = self._append(data)
+        view = memoryview(buf)
+
+        pos = 0
+        end = len(buf)
+        while True:
+            start = buf.find(__class__.SYNC, pos)
+            if start == -1:
+                pos = self._tail(buf)
+                break
+
+            next_pos = self._parse_frame(buf, view, start, end)
+            if next_pos is None:
+                # Frame not complete yet
+                pos = start
+                break
+            pos = next_pos
+
+        # Keep incomplete data for next call
+        self.buffer = buf[pos:]
+
+    def _append(self, data):
+        """
+        Returns data appended to kept incomplete data
+
+        Payloads reference the result, so it must be immutable.
+        """
+        if self.buffer:
+            return self.buffer + bytes(data)
+        return bytes(data)
+
+    @staticmethod
+    def _tail(buf):
+        """
+        Returns position of data to keep if no more sync sequence is found
+
+        A trailing first sync byte is kept, the second might follow.
+        """
+        if buf[-1:] == UbxChunkParser.SYNC[:1]:
+            return len(buf) - 1
+        return len(buf)
+
+    def _parse_frame(self, buf, view, start, end):
+        """
+        Decodes frame whose sync sequence starts at given position
+
+        @return: position after frame, position to resume search after a
+                 false sync sequence, or None if frame is incomplete
+        """
+        payload_start = start + __class__.HEADER_SIZE
+        if payload_start > end:
+            return None
+
+        msg_class, msg_id, msg_len = __class__._header.unpack_from(buf, start + 2)
+        if msg_len > __class__.MAX_MESSAGE_LENGTH:
+            logger.warning(f'invalid msg len {msg_len}')
+            return start + 2
+
+        payload_end = payload_start + msg_len
+        frame_end = payload_end + __class__.CHECKSUM_SIZE
+        if frame_end > end:
+            return None
+
+        if self._frame_valid(buf, start + 2, payload_end):
+            self._queue_frame(msg_class, msg_id, view, payload_start, payload_end)
+            return frame_end
+
+        logger.warning('checksum error in frame, discarding')
+        logger.warning(f'{msg_class:02x} {msg_id:02x} {binascii.hexlify(view[payload_start:payload_end])}')
+
+        self.crc_errors += 1
+        crc_error_message = (self.crc_error_cid, None)
+        self.rx_queue.append(crc_error_message)
+
+        # Resynchronize right after false sync sequence
+        return start + 2
+
+    @staticmethod
+    def _frame_valid(buf, start, end):
+        """
+        Checks frame checksum
+
+        Checksum is computed over class, id, length and payload and compared
+        with the two bytes following the payload.
+        """
+        cka, ckb = Checksum.compute(buf, start, end)
+        return cka == buf[end] and ckb == buf[end + 1]
+
+    def _queue_frame(self, msg_class, msg_id, buf, start, end):
+        """
+        Queues frame if it passes filter
+
+        Payload is only extracted for frames that pass.
+        """
+        self.frames_rx += 1
+
+        if self.filter_map[(msg_class << 8) | msg_id]:
+            packet = (UbxCID(msg_class, msg_id), buf[start:end])
+            self.rx_queue.append(packet)
+        else:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f'no match - dropping {UbxCID(msg_class, msg_id)}, {end - start} bytes')
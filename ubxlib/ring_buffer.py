@@ -0,0 +1,76 @@
+class RingBuffer(object):
+    """
+    Bounded byte FIFO
+
+    Stores received data until it is processed. If more data is written
+    than fits, the oldest bytes are dropped and counted in overruns.
+
+    Not thread safe, callers must provide locking.
+    """
+    def __init__(self, size):
+        super().__init__()
+
+        assert size > 0
+        self.size = size
+        self.buffer = bytearray(size)
+        self.overruns = 0
+        self._read_pos = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def clear(self):
+        self._read_pos = 0
+        self._count = 0
+
+    def write(self, data):
+        """
+        Appends data, drops oldest bytes on overflow
+
+        @param data: bytes-like object
+        """
+        length = len(data)
+        if length == 0:
+            return
+
+        # Data that can't be stored is dropped right away
+        if length > self.size:
+            self.overruns += length - self.size
+            data = memoryview(data)[length - self.size:]
+            length = self.size
+
+        # Make room by dropping oldest bytes
+        excess = self._count + length - self.size
+        if excess > 0:
+            self.overruns += excess
+            self._read_pos = (self._read_pos + excess) % self.size
+            self._count -= excess
+
+        write_pos = (self._read_pos + self._count) % self.size
+        first = min(length, self.size - write_pos)
+        self.buffer[write_pos:write_pos + first] = data[:first]
+        if first < length:
+            self.buffer[:length - first] = data[first:]
+
+        self._count += length
+
+    def read(self, max_bytes=None):
+        """
+        Removes and returns up to max_bytes (default all) bytes
+
+        @return: bytes, empty if no data is available
+        """
+        length = self._count
+        if max_bytes is not None:
+            length = min(length, max_bytes)
+
+        end = self._read_pos + length
+        if end <= self.size:
+            data = bytes(self.buffer[self._read_pos:end])
+        else:
+            data = bytes(self.buffer[self._read_pos:]) + bytes(self.buffer[:end - self.size])
+
+        self._read_pos = end % self.size
+        self._count -= length
+        return data
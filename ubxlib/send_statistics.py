@@ -0,0 +1,90 @@
+import math
+
+
+class SendStatistics(object):
+    """
+    Timing statistics of periodic messages with time tag
+
+    Each send records the time tag of the message (ms) and the time the
+    backend accepted the message. The jitter of a send is the difference
+    between the interval to the previous send and the interval of the time
+    tags. It shows how well the time tags line up with the real send
+    times, independent of the clock the time tags are derived from.
+
+    The duration of the backend call is recorded as well. Failed sends
+    are counted and restart the jitter measurement.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.failed = 0
+        self.jitter_count = 0
+        self.jitter_min = 0.0
+        self.jitter_max = 0.0
+        self.last_jitter = None
+        self.send_max = 0.0
+        self._jitter_sum = 0.0
+        self._jitter_sum_sq = 0.0
+        self._send_sum = 0.0
+        self._last = None       # (time tag, send time) of previous message
+
+    def record(self, time_tag, t_start, t_end, success):
+        """
+        Records one send
+
+        @param time_tag: time tag of message in ms
+        @param t_start: time before backend call (time.perf_counter())
+        @param t_end: time after backend call
+        @param success: backend result
+        """
+        if not success:
+            self.failed += 1
+            self._last = None
+            return
+
+        self.count += 1
+        duration = t_end - t_start
+        self._send_sum += duration
+        if duration > self.send_max:
+            self.send_max = duration
+
+        if self._last:
+            last_tag, last_time = self._last
+            tag_interval = ((time_tag - last_tag) & 0xFFFFFFFF) / 1000.0
+            jitter = (t_end - last_time) - tag_interval
+
+            if not self.jitter_count or jitter < self.jitter_min:
+                self.jitter_min = jitter
+            if not self.jitter_count or jitter > self.jitter_max:
+                self.jitter_max = jitter
+            self.jitter_count += 1
+            self._jitter_sum += jitter
+            self._jitter_sum_sq += jitter * jitter
+            self.last_jitter = jitter
+
+        self._last = (time_tag, t_end)
+
+    @property
+    def jitter_mean(self):
+        return self._jitter_sum / self.jitter_count if self.jitter_count else None
+
+    @property
+    def jitter_rms(self):
+        return math.sqrt(self._jitter_sum_sq / self.jitter_count) if self.jitter_count else None
+
+    @property
+    def send_mean(self):
+        return self._send_sum / self.count if self.count else None
+
+    def __str__(self):
+        res = f'sent {self.count}, failed {self.failed}'
+        if self.jitter_count:
+            res += f', jitter rms {self.jitter_rms * 1e3:.3f} ms, '
+            res += f'min {self.jitter_min * 1e3:.3f} ms, max {self.jitter_max * 1e3:.3f} ms'
+        if self.count:
+            res += f', send mean {self.send_mean * 1e3:.3f} ms, max {self.send_max * 1e3:.3f} ms'
+        return res
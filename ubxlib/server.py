@@ -1,25 +1,106 @@
 import binascii
 import json
 import logging
+import selectors
 import socket
 
+from .gpsd_control import GpsdControl
 from .server_base import UbxServerBase_
 
 logger = logging.getLogger(__name__)
 
 
-class GnssUBlox(UbxServerBase_):
+class GpsdClient_(object):
+    """
+    Handling of gpsd JSON messages received after ?WATCH request
+
+    Shared by blocking and asyncio gpsd backends. Expects attributes
+    device_name, selected_device, enabled and release in derived class.
+    """
+    def _parse_gpsd_msg(self, data):
+        # Raw receiver data, e.g. ubx frames, can follow the JSON messages
+        # in the same read. Don't fail on it, so the messages are not lost.
+        data_json = data.decode(errors='replace').splitlines()
+        for entry in data_json:
+            try:
+                data_map = json.loads(entry)
+                if 'class' in data_map:
+                    msg_class = data_map['class']
+                    if msg_class == 'VERSION':
+                        self._parse_version(data_map)
+                    elif msg_class == 'DEVICES':
+                        self._parse_devices(data_map)
+            except (json.decoder.JSONDecodeError, TypeError):
+                # Decoding error will happen if NMEA or other
+                # data is received here
+                pass
+
+    def _parse_version(self, data):
+        logger.debug('checking gpsd version')
+        self.release = data['release']
+        logger.debug(f' release: {self.release}')
+
+    def _parse_devices(self, data):
+        logger.debug('checking available devices')
+
+        for device in data['devices']:
+            device_name = device['path']
+            logger.debug(f' {device_name}')
+
+            # If a device was requested, check for it ..
+            if self.device_name:
+                if self.device_name == device_name:
+                    logger.debug(f'found desired device {device_name}')
+                    self.selected_device = self.device_name
+                    self.enabled = True
+                    break
+            # .. otherwise use first device listed
+            else:
+                logger.debug(f'using first found device {device_name}')
+                self.selected_device = device_name
+                self.enabled = True
+                break
+
+        if not self.enabled:
+            logger.error('cannot connect to desired device')
+
+
+class GnssUBlox(UbxServerBase_, GpsdClient_):
+    """ Default gpsd endpoints, can be overridden per instance """
     gpsd_control_socket = '/var/run/gpsd.sock'
     gpsd_data_socket = ('127.0.0.1', 2947)
 
-    def __init__(self, device_name=None):
+    """ Default size of receive buffer for gpsd data socket """
+    RX_BUFFER_SIZE = 65536
+
+    """ Maximum time _receive() waits for data """
+    RX_TIMEOUT = 0.25
+
+    def __init__(self, device_name=None, persistent_control=False, rx_buffer_size=None,
+                 data_socket=None, control_socket=None):
+        """
+        @param device_name: gpsd device path, None to use first device
+        @param persistent_control: keep control socket open, see GpsdControl
+        @param rx_buffer_size: size of receive buffer, default RX_BUFFER_SIZE
+        @param data_socket: (host, port) of gpsd data socket
+        @param control_socket: path of gpsd control socket
+        """
         super().__init__()
 
+        if data_socket:
+            self.gpsd_data_socket = data_socket
+        if control_socket:
+            self.gpsd_control_socket = control_socket
+
         self.device_name = device_name
         self.selected_device = None
         self.cmd_header = None
+        self.control = GpsdControl(self.gpsd_control_socket, persistent_control)
         self.connect_msg = '?WATCH={"enable":true,"raw":2}'.encode()
         self.listen_sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.selector = selectors.DefaultSelector()
+        self.rx_buffer = bytearray(rx_buffer_size or __class__.RX_BUFFER_SIZE)
+        self.rx_view = memoryview(self.rx_buffer)
         self.enabled = False
         self.release = None
 
@@ -40,6 +121,7 @@ class GnssUBlox(UbxServerBase_):
 
     def cleanup(self):
         self.enabled = False
+        self.control.close()
         self._close_port()
         super().cleanup()
 
@@ -52,58 +134,43 @@ class GnssUBlox(UbxServerBase_):
         pass
 
     def _receive(self):
-        # Check if there is data, forward to parser to process
-        try:
-            data = self.listen_sock.recv(128)
-            if data:
-                return data
-        except socket.timeout:
-            pass
+        """
+        Waits until data is available and reads all of it at once
 
-    def _transmit(self, data):
-        assert self.selected_device         # Must be connected
-
-        success = False
+        The returned memoryview references the receive buffer, it is only
+        valid until the next call.
+        """
+        if not self.selector.select(__class__.RX_TIMEOUT):
+            return None
 
         try:
-            self.control_sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
-            self.control_sock.connect(GnssUBlox.gpsd_control_socket)
-            self.control_sock.settimeout(0.020)
-
-            msg_in_ascii = binascii.hexlify(data)
-
-            cmd = self.cmd_header + msg_in_ascii
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f'sending control message {cmd}')
-
-            self.control_sock.sendall(cmd)
-
-            # checking for response
-            data = self.control_sock.recv(32)
-            response = data.decode().strip()
-            if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f'response: {response}')
-
-            # 3.23.1 changed the response code from "OK", "ERROR" to JSON {"class":"ACK"} or
-            # {"class":"ERROR"}
-            # From https://gpsd.gitlab.io/gpsd/NEWS
-            #   Control messages to gpsd now return JSON, instead of, sometimes, OK or ERROR.
-            if 'OK' in response or 'ACK' in response:
-                success = True
-            # else:
-            #    logger.warning(f'command not accepted by gpsd')
+            length = self.listen_sock.recv_into(self.rx_buffer)
+            if length:
+                return self.rx_view[:length]
+        except (socket.timeout, BlockingIOError):
+            pass
 
-            self.control_sock.shutdown(socket.SHUT_RDWR)
-            self.control_sock.close()
+    def _wait_readable(self, timeout_in_s):
+        return bool(self.selector.select(timeout_in_s))
 
-        except socket.error as e:
-            logger.error(e)
+    def _transmit(self, data):
+        return self.control.send(self._control_cmd(data))
 
-        return success
+    def _transmit_nowait(self, data):
+        return self.control.send(self._control_cmd(data), wait=False)
 
     """
     Private methods
     """
+    def _control_cmd(self, data):
+        assert self.selected_device         # Must be connected
+
+        cmd = self.cmd_header + binascii.hexlify(data)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'sending control message {cmd}')
+
+        return cmd
+
     def _open_port(self):
         try:
             self.listen_sock.connect(self.gpsd_data_socket)
@@ -112,8 +179,11 @@ class GnssUBlox(UbxServerBase_):
             # TODO: Error handling
             logger.error(msg)
 
+        self.selector.register(self.listen_sock, selectors.EVENT_READ)
+
     def _close_port(self):
         if self.listen_sock:
+            self.selector.unregister(self.listen_sock)
             self.listen_sock.shutdown(socket.SHUT_RDWR)
             self.listen_sock.close()
             self.listen_sock = None
@@ -132,54 +202,3 @@ class GnssUBlox(UbxServerBase_):
                 pass
 
         logger.debug('connection established')
-
-    def _parse_gpsd_msg(self, data):
-        try:
-            data_json = data.decode().splitlines()
-            for entry in data_json:
-                try:
-                    data_map = json.loads(entry)
-                    if 'class' in data_map:
-                        msg_class = data_map['class']
-                        if msg_class == 'VERSION':
-                            self._parse_version(data_map)
-                        elif msg_class == 'DEVICES':
-                            self._parse_devices(data_map)
-                except json.decoder.JSONDecodeError:
-                    # Decoding error will happen if NMEA or other
-                    # data is received here
-                    pass
-
-        except UnicodeDecodeError:
-            # A decoding error will be thrown when binary data
-            # e.g. ubx frames are received
-            pass
-
-    def _parse_version(self, data):
-        logger.debug('checking gpsd version')
-        self.release = data['release']
-        logger.debug(f' release: {self.release}')
-
-    def _parse_devices(self, data):
-        logger.debug('checking available devices')
-
-        for device in data['devices']:
-            device_name = device['path']
-            logger.debug(f' {device_name}')
-
-            # If a device was requested, check for it ..
-            if self.device_name:
-                if self.device_name == device_name:
-                    logger.debug(f'found desired device {device_name}')
-                    self.selected_device = self.device_name
-                    self.enabled = True
-                    break
-            # .. otherwise use first device listed
-            else:
-                logger.debug(f'using first found device {device_name}')
-                self.selected_device = device_name
-                self.enabled = True
-                break
-
-        if not self.enabled:
-            logger.error('cannot connect to desired device')
@@ -0,0 +1,151 @@
+import asyncio
+import binascii
+import logging
+
+from .server import GpsdClient_
+from .server_base_async import AsyncUbxServerBase_
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGnssUBlox(AsyncUbxServerBase_, GpsdClient_):
+    """
+    asyncio backend for gpsd
+
+    Raw receiver data is read from the gpsd data socket with asyncio
+    streams. Frames are sent via the gpsd control socket.
+    """
+    """ Default gpsd endpoints, can be overridden per instance """
+    gpsd_control_socket = '/var/run/gpsd.sock'
+    gpsd_data_socket = ('127.0.0.1', 2947)
+
+    """ Maximum time to wait for gpsd device list and control responses """
+    CONNECT_TIMEOUT = 5.0
+    CONTROL_TIMEOUT = 0.5
+
+    def __init__(self, device_name=None, data_socket=None, control_socket=None):
+        """
+        @param device_name: gpsd device path, None to use first device
+        @param data_socket: (host, port) of gpsd data socket
+        @param control_socket: path of gpsd control socket
+        """
+        super().__init__()
+
+        if data_socket:
+            self.gpsd_data_socket = data_socket
+        if control_socket:
+            self.gpsd_control_socket = control_socket
+
+        self.device_name = device_name
+        self.selected_device = None
+        self.cmd_header = None
+        self.connect_msg = '?WATCH={"enable":true,"raw":2}'.encode()
+        self.enabled = False
+        self.release = None
+        self.reader = None
+        self.writer = None
+        self._reader_task = None
+
+        logger.info('instantiating AsyncGnssUBlox on gpsd')
+        if self.device_name:
+            logger.info(f'using port {self.device_name}')
+        else:
+            logger.info('using first available port')
+
+    async def setup(self):
+        res = await super().setup()
+
+        host, port = self.gpsd_data_socket
+        self.reader, self.writer = await asyncio.open_connection(host, port)
+        try:
+            await asyncio.wait_for(self._enable(), __class__.CONNECT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.error('cannot connect to desired device')
+            return False
+
+        self.cmd_header = f'&{self.selected_device}='.encode()
+        self._reader_task = asyncio.ensure_future(self._read_loop())
+        return res
+
+    async def cleanup(self):
+        self.enabled = False
+        if self._reader_task:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+
+        if self.writer:
+            await self._close_writer(self.writer)
+            self.writer = None
+
+        await super().cleanup()
+
+    """
+    Base class implementation
+    """
+    async def _transmit(self, data):
+        assert self.selected_device         # Must be connected
+
+        success = False
+        writer = None
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.gpsd_control_socket)
+
+            cmd = self.cmd_header + binascii.hexlify(data)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f'sending control message {cmd}')
+
+            writer.write(cmd)
+            await writer.drain()
+
+            data = await asyncio.wait_for(reader.read(32), __class__.CONTROL_TIMEOUT)
+            response = data.decode().strip()
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f'response: {response}')
+
+            # See GnssUBlox._transmit() for response formats
+            if 'OK' in response or 'ACK' in response:
+                success = True
+        except (OSError, asyncio.TimeoutError) as e:
+            logger.error(e)
+        finally:
+            if writer:
+                await self._close_writer(writer)
+
+        return success
+
+    """
+    Private methods
+    """
+    async def _enable(self):
+        self.enabled = False
+        self.writer.write(self.connect_msg)
+        await self.writer.drain()
+
+        while not self.enabled:
+            line = await self.reader.readline()
+            if not line:
+                raise ConnectionError('gpsd closed connection')
+            self._parse_gpsd_msg(line)
+
+        logger.debug('connection established')
+
+    @staticmethod
+    async def _close_writer(writer):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _read_loop(self):
+        while True:
+            data = await self.reader.read(4096)
+            if not data:
+                logger.warning('gpsd closed connection')
+                break
+
+            self._data_received(data)
@@ -5,8 +5,12 @@ import time
 from .cid import UbxCID
 from .frame import UbxFrame
 from .frame_factory import FrameFactory
-from .parser_ubx import UbxParser
+from .parser_demux import DemuxParser
+from .send_statistics import SendStatistics
+from .subscription import Subscription
+from .timeout_policy import TimeoutPolicy
 from .ubx_ack import UbxAckAck, UbxAckNak
+from .ubx_esf_meas import EsfMeasTemplate
 from .ubx_mga_ack_data0 import UbxMgaAckData0
 
 logger = logging.getLogger(__name__)
@@ -17,10 +21,16 @@ class UbxServerBase_(object):
         super().__init__()
 
         self.cid_crc_error = UbxCID(0x00, 0x02)
-        self.parser = UbxParser(self.cid_crc_error)
+        self.parser = DemuxParser(self.cid_crc_error)
         self.frame_factory = FrameFactory.getInstance()
         self.max_retries = 2
         self.retry_delay_in_ms = 1800
+        self.timeouts = TimeoutPolicy()
+        self.subscriptions = dict()     # CID -> list of Subscription
+        self.esf_stats = SendStatistics()
+        self._request_cids = set()
+        self._late_responses = dict()   # CID -> deadlines of outstanding responses to retried polls
+        self._esf_templates = dict()    # Number of measurements -> EsfMeasTemplate
 
     def setup(self):
         # Register ACK-ACK/ACK-NAK frames, as they are used internally by this module
@@ -76,12 +86,13 @@ class UbxServerBase_(object):
             wait_cids = [frame_poll.CID, UbxAckAck.CID, UbxAckNak.CID]
         else:
             wait_cids = [frame_poll.CID]
-        self.parser.set_filters(wait_cids)
+        self._set_filters(wait_cids)
 
         # Serialize polling frame payload.
         # Only a few polling frames required payload, most come w/o.
         frame_poll.pack()
 
+        sends = 0
         for retry in range(self.max_retries + 1):
             if retry != 0:
                 logger.warning(f'poll: timeout, retrying {retry}')
@@ -90,19 +101,21 @@ class UbxServerBase_(object):
             res = self._send(frame_poll)
 
             if res:
+                sends += 1
                 state = 'wait-response'
                 response = None
-                t_start = time.time()
+                t_start = time.monotonic()
+                time_end = t_start + self._response_timeout(frame_poll.CID, retry)
 
-                self.parser.empty_queue()
+                self._drain_queue()
                 self.parser.restart()
 
                 while state != "ok" and state != 'timeout':
-                    packet = self._wait()
+                    packet = self._wait(max(time_end - time.monotonic(), 0))
                     if packet:
-                        t_duration = time.time() - t_start
+                        t_duration = time.monotonic() - t_start
                         if state == 'wait-response':
-                            check = self._check_poll(frame_poll, packet)
+                            check = self._check_poll(frame_poll, packet) and not self._late_response(frame_poll.CID)
                             if check:
                                 logger.debug(f'response received after {t_duration:.2f} s')
                                 response = packet
@@ -126,12 +139,55 @@ class UbxServerBase_(object):
 
                 if state == 'ok':
                     assert response
+                    self._record_latency(frame_poll.CID, sends, t_duration)
+                    self._expect_late_responses(frame_poll.CID, sends - 1)
                     return response
                 else:
+                    self.timeouts.record_timeout(frame_poll.CID, time.monotonic() - t_start)
                     self._recover()
             else:
                 logger.warning('poll: send failed')
 
+    def poll_many(self, frames_poll):
+        """
+        Poll several receiver states in one batch
+
+        - sends all poll messages back to back
+        - assigns incoming responses to requests by CID, in send order
+          for requests with the same CID
+        - for configuration frames also waits for the matching ACK (ACK
+          clsId/msgId is compared with request CID)
+        - retries only requests that are still unanswered
+
+        Returns list of response frames in order of requests. Entries are
+        None for requests that could not be completed.
+        """
+        self._set_filters(self._prepare_batch(frames_poll))
+
+        responses = [None] * len(frames_poll)
+        states = ['wait-response'] * len(frames_poll)
+
+        self._flush_input()
+        self._drain_queue()
+        self.parser.restart()
+
+        for retry in range(self.max_retries + 1):
+            pending = self._pending_requests(states)
+            if not pending:
+                break
+
+            if retry != 0:
+                logger.warning(f'poll_many: timeout, retrying {len(pending)} requests ({retry})')
+                self._recover()
+
+            for i in pending:
+                if not self._send(frames_poll[i]):
+                    logger.warning('poll_many: send failed')
+
+            self._wait_batch(frames_poll, pending, states, responses, retry)
+
+        return self._batch_results(states, responses)
+
     def set(self, frame_set):
         """
         Send a set message to modem and wait for acknowledge
@@ -144,11 +200,12 @@ class UbxServerBase_(object):
         logger.debug(f"setting {frame_set.NAME}")
 
         # Wait for ACK-ACK / ACK-NAK
-        self.parser.set_filters([UbxAckAck.CID, UbxAckNak.CID])
+        self._set_filters([UbxAckAck.CID, UbxAckNak.CID])
 
         # Get frame data (header, cls, id, len, payload, checksum a/b)
         frame_set.pack()
 
+        sends = 0
         for retry in range(self.max_retries + 1):
             if retry != 0:
                 logger.warning(f'set: timeout, retrying {retry}')
@@ -156,22 +213,26 @@ class UbxServerBase_(object):
             self._flush_input()
             res = self._send(frame_set)
             if res:
-                t_start = time.time()
+                sends += 1
+                t_start = time.monotonic()
 
-                self.parser.empty_queue()
+                self._drain_queue()
                 self.parser.restart()
 
-                packet = self._wait()
+                packet = self._wait(self._response_timeout(frame_set.CID, retry))
                 if packet:
-                    t_duration = time.time() - t_start
+                    t_duration = time.monotonic() - t_start
                     check = self._check_ack_nak(frame_set, packet)
                     if check == 'ACK':
                         logger.debug(f'ACK received after {t_duration:.2f} s')
+                        self._record_latency(frame_set.CID, sends, t_duration)
                         return packet
                     elif check == 'NAK':
                         logger.debug(f'NAK received after {t_duration:.2f} s')
+                        self._record_latency(frame_set.CID, sends, t_duration)
                         return packet
                 else:
+                    self.timeouts.record_timeout(frame_set.CID, time.monotonic() - t_start)
                     self._recover()
             else:
                 logger.warning('set: send failed')
@@ -192,11 +253,12 @@ class UbxServerBase_(object):
         logger.debug(f"setting mga {frame_set_mga.NAME}")
 
         # Wait for special MGA ACK frame
-        self.parser.set_filter(UbxMgaAckData0.CID)
+        self._set_filters([UbxMgaAckData0.CID])
 
         # Get frame data (header, cls, id, len, payload, checksum a/b)
         frame_set_mga.pack()
 
+        sends = 0
         for retry in range(self.max_retries + 1):
             if retry != 0:
                 logger.warning(f'set_mga: timeout, retrying {retry}')
@@ -204,19 +266,22 @@ class UbxServerBase_(object):
             self._flush_input()
             res = self._send(frame_set_mga)
             if res:
-                t_start = time.time()
+                sends += 1
+                t_start = time.monotonic()
 
-                self.parser.empty_queue()
+                self._drain_queue()
                 self.parser.restart()
 
-                packet = self._wait()
+                packet = self._wait(self._response_timeout(frame_set_mga.CID, retry))
                 if packet:
-                    t_duration = time.time() - t_start
+                    t_duration = time.monotonic() - t_start
                     check = self._check_mga(frame_set_mga, packet)
                     if check:
                         logger.debug(f'MGA-ACK received after {t_duration:.2f} s')
+                        self._record_latency(frame_set_mga.CID, sends, t_duration)
                         return packet
                 else:
+                    self.timeouts.record_timeout(frame_set_mga.CID, time.monotonic() - t_start)
                     self._recover()
             else:
                 logger.warning('set_mga: send failed')
@@ -234,7 +299,111 @@ class UbxServerBase_(object):
         logger.debug(f"firing {frame_set.NAME}")
 
         frame_set.pack()
-        self._send(frame_set)
+        self._send(frame_set, wait=False)
+
+    def send_esf_meas(self, time_tag, measurements):
+        """
+        Sends sensor measurements (UBX-ESF-MEAS) to the receiver
+
+        Intended for periodic injection of external sensor data, e.g. speed
+        or wheel ticks. The message is prepared from a preallocated
+        template, see EsfMeasTemplate, and sent like fire_and_forget()
+        without waiting for a confirmation. The gpsd backend opens a
+        control connection per message. persistent_control=True avoids
+        that, but only works with gpsd builds that handle newline
+        terminated, pipelined commands; stock gpsd reads a control
+        connection until EOF. Send timing and jitter are recorded in
+        esf_stats.
+
+        @param time_tag: time tag in ms
+        @param measurements: list of (data type, value) tuples
+        @return: True if message was sent
+        """
+        msg = self._esf_meas_message(time_tag, measurements)
+
+        t_start = time.perf_counter()
+        res = self._transmit_nowait(msg)
+        self.esf_stats.record(time_tag, t_start, time.perf_counter(), res)
+        if not res:
+            logger.warning('sensor measurements could not be sent')
+
+        return res
+
+    def subscribe(self, cid_or_class, callback=None, max_frames=100):
+        """
+        Subscribe to periodic frames
+
+        @param cid_or_class: frame class (gets registered for decoding) or UbxCID
+        @param callback: optional function called with each received frame,
+                         otherwise frames are queued in the subscription
+        @param max_frames: queue size, oldest frames are dropped when full
+        @return: Subscription object
+
+        Frames are dispatched while waiting for responses of poll() and
+        set() requests and during listen().
+        """
+        if isinstance(cid_or_class, type):
+            self._register_response(cid_or_class)
+            cid = cid_or_class.CID
+        else:
+            assert isinstance(cid_or_class, UbxCID)
+            cid = cid_or_class
+
+        subscription = Subscription(cid, callback, max_frames)
+        self.subscriptions.setdefault(cid, []).append(subscription)
+        self._set_filters(self._request_cids)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscriptions = self.subscriptions[subscription.cid]
+        subscriptions.remove(subscription)
+        if not subscriptions:
+            del self.subscriptions[subscription.cid]
+        self._set_filters(self._request_cids)
+
+    def set_frame_pool(self, cid_or_class, size=1):
+        """
+        Reuse frame objects for received frames of one CID
+
+        Intended for high rate periodic frames such as ESF-MEAS. Instead of
+        constructing a new frame per received frame, size frame objects are
+        decoded again in turn. Frames passed to callbacks or returned by
+        poll() are thus only valid until size more frames of the CID are
+        received. Consumers that keep frames must call frame.copy(). With
+        queued subscriptions, size must exceed max_frames.
+
+        @param cid_or_class: frame class (gets registered for decoding) or UbxCID
+        @param size: number of frame objects, 0 to construct frames again
+        """
+        if isinstance(cid_or_class, type):
+            self._register_response(cid_or_class)
+            cid = cid_or_class.CID
+        else:
+            assert isinstance(cid_or_class, UbxCID)
+            cid = cid_or_class
+
+        self.frame_factory.set_pool(cid, size)
+
+    def listen(self, duration_in_s):
+        """
+        Receive data for given duration and dispatch frames to subscribers
+        """
+        time_end = time.monotonic() + duration_in_s
+        while True:
+            remaining = time_end - time.monotonic()
+            if remaining <= 0:
+                break
+
+            if self._wait_readable(remaining):
+                data = self._receive()
+                if data:
+                    self.parser.process(data)
+
+            while True:
+                cid, data = self.parser.packet()
+                if not cid:
+                    break
+                self._handle_packet(cid, data)
 
     @DeprecationWarning
     def send(self, message):
@@ -286,6 +455,28 @@ class UbxServerBase_(object):
         """
         raise NotImplementedError
 
+    def _wait_readable(self, timeout_in_s):
+        """
+        This method can be implemented by a derived backend
+
+        If implemented, it shall block until data can be received or the
+        timeout expires, e.g. with select() on a file descriptor or socket.
+        Return True if data is available, False on timeout.
+
+        The default lets _receive() do the waiting.
+        """
+        return True
+
+    def _transmit_nowait(self, data):
+        """
+        This method can be implemented by a derived backend
+
+        Same as _transmit(), but used for fire and forget frames. Backends
+        whose transmission is confirmed by a response can skip waiting for
+        it here.
+        """
+        return self._transmit(data)
+
     def _flush_input(self):
         """
         This method can be implemented by a derived backend
@@ -301,54 +492,273 @@ class UbxServerBase_(object):
     def _register_response(self, frame_type):
         self.frame_factory.register(frame_type)
 
-    def _send(self, ubx_message):
+    def _esf_meas_message(self, time_tag, measurements):
+        num_meas = len(measurements)
+        template = self._esf_templates.get(num_meas)
+        if not template:
+            template = EsfMeasTemplate(num_meas)
+            self._esf_templates[num_meas] = template
+
+        return template.build(time_tag, measurements)
+
+    def _response_timeout(self, cid, retry=0):
+        """
+        Returns time to wait for response to request with given CID
+
+        Learned from previous responses, retry_delay_in_ms is used as
+        fallback and upper limit. Retries escalate to retry_delay_in_ms,
+        so that a slow response is not missed again.
+        """
+        if retry:
+            return self.retry_delay_in_ms / 1000.0
+        return self.timeouts.timeout(cid, self.retry_delay_in_ms / 1000.0)
+
+    def _batch_timeout(self, requests, retry=0):
+        """
+        Returns time to wait for responses to requests sent back to back
+        """
+        cids = [request.CID for request in requests]
+        return self.timeouts.batch_timeout(cids, self.retry_delay_in_ms / 1000.0, escalate=retry != 0)
+
+    def _record_latency(self, cid, sends, t_duration):
+        """
+        Records latency of completed request, if it was sent only once
+
+        After a retry the response may belong to an earlier send, so its
+        latency is not known.
+        """
+        if sends == 1:
+            self.timeouts.record(cid, t_duration)
+
+    def _expect_late_responses(self, cid, count):
+        """
+        Registers responses to earlier sends of a completed poll
+
+        These responses are still on their way and must not be taken as
+        response to the next poll with the same CID, see _late_response().
+        They are expected within retry_delay_in_ms.
+        """
+        if count > 0:
+            deadline = time.monotonic() + self.retry_delay_in_ms / 1000.0
+            self._late_responses.setdefault(cid, []).extend([deadline] * count)
+
+    def _late_response(self, cid):
+        """
+        Checks whether a received poll response is a late response to an
+        earlier, retried poll and consumes it
+
+        @return: True if response shall be ignored
+        """
+        deadlines = self._late_responses.get(cid)
+        if not deadlines:
+            return False
+
+        now = time.monotonic()
+        while deadlines and deadlines[0] < now:
+            deadlines.pop(0)
+        if not deadlines:
+            del self._late_responses[cid]
+            return False
+
+        deadlines.pop(0)
+        logger.debug(f'ignoring late response {cid} to earlier request')
+        return True
+
+    def _send(self, ubx_message, wait=True):
         """
         Send ubx frame to modem via backend driver
+
+        @param wait: False to not wait for backend confirmation
         """
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f'sending {ubx_message}')
 
         msg_in_binary = ubx_message.to_bytes()
-        res = self._transmit(msg_in_binary)
+        if wait:
+            res = self._transmit(msg_in_binary)
+        else:
+            res = self._transmit_nowait(msg_in_binary)
         if not res:
             logger.warning('command could not be sent')
 
         return res
 
-    def _wait(self):
-        retry_delay_in_s = self.retry_delay_in_ms / 1000.0
+    def _wait(self, timeout_in_s=None):
+        if timeout_in_s is None:
+            retry_delay_in_s = self.retry_delay_in_ms / 1000.0
+        else:
+            retry_delay_in_s = timeout_in_s
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f'waiting {retry_delay_in_s}s for response')
 
         # self.parser.empty_queue()
         # self.parser.restart()
 
-        time_end = time.time() + retry_delay_in_s
-        while time.time() < time_end:
-            data = self._receive()
-            if data:
-                # process() places all decoded frames in rx queue
-                self.parser.process(data)
+        time_end = time.monotonic() + retry_delay_in_s
+        while True:
+            # Handle all frames decoded so far
+            while True:
+                cid, data = self.parser.packet()
+                if not cid:
+                    break
+
+                frame = self._handle_packet(cid, data)
+                if frame:
+                    return frame
+
+            remaining = time_end - time.monotonic()
+            if remaining <= 0:
+                break
+
+            # Sleep until backend has data, process() places all decoded
+            # frames in rx queue
+            if self._wait_readable(remaining):
+                data = self._receive()
+                if data:
+                    self.parser.process(data)
+
+        logger.warning('timeout...')
 
-            # Check if process could decode one or more frames
-            # Loop exists when no more frames are to handle
+    def _handle_packet(self, cid, data):
+        """
+        Decodes received packet and dispatches it to subscribers
+
+        @return: frame if it is expected by current request, None otherwise
+        """
+        if cid == self.cid_crc_error:
+            logger.warning("checksum error in frame, discarding")
+            return None
+
+        ff = FrameFactory.getInstance()
+        try:
+            frame = ff.build_with_data(cid, data)
+        except KeyError:
+            # We can't parse the frame, is it registered()
+            logger.warning(f'frame not registered, cannot decode: {binascii.hexlify(data)}')
+            return None
+
+        subscriptions = self.subscriptions.get(cid)
+        if subscriptions:
+            for subscription in subscriptions:
+                subscription.deliver(frame)
+
+        if cid in self._request_cids:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f'received expected frame {cid}')
+            return frame
+
+    def _drain_queue(self):
+        """
+        Empties parser queue before a new request
+
+        Stale responses are discarded, frames of subscribed CIDs are
+        still delivered to their subscriptions.
+        """
+        while True:
             cid, data = self.parser.packet()
-            if cid:
-                if cid != self.cid_crc_error:
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f'received expected frame {cid}')
-
-                    ff = FrameFactory.getInstance()
-                    try:
-                        frame = ff.build_with_data(cid, data)
-                        return frame
-                    except KeyError:
-                        # We can't parse the frame, is it registered()
-                        logger.warning(f'frame not registered, cannot decode: {binascii.hexlify(data)}')
-                else:
-                    logger.warning("checksum error in frame, discarding")
+            if not cid:
+                break
 
-        logger.warning('timeout...')
+            if cid in self.subscriptions:
+                self._handle_packet(cid, data)
+
+    def _set_filters(self, cids):
+        """
+        Sets frames expected by current request
+
+        Parser lets these and all subscribed frames pass.
+        """
+        self._request_cids = set(cids)
+        self.parser.set_filters(list(self._request_cids | self.subscriptions.keys()))
+
+    def _prepare_batch(self, requests):
+        """
+        Registers response frames and packs requests of a batch
+
+        @return: list of CIDs to wait for
+        """
+        assert isinstance(requests, list)
+        logger.debug(f"polling {len(requests)} frames")
+
+        wait_cids = []
+        for request in requests:
+            assert isinstance(request, UbxFrame)
+            self._register_response(request._cls_response())
+            wait_cids.append(request.CID)
+            if request.CID.cls == UbxCID.CLASS_CFG:
+                wait_cids += [UbxAckAck.CID, UbxAckNak.CID]
+
+            request.pack()
+        return wait_cids
+
+    @staticmethod
+    def _pending_requests(states):
+        return [i for i, state in enumerate(states) if state.startswith('wait')]
+
+    @staticmethod
+    def _batch_results(states, responses):
+        return [response if state == 'ok' else None for state, response in zip(states, responses)]
+
+    def _wait_batch(self, requests, pending, states, responses, retry):
+        """
+        Waits for responses to sent requests of a batch until all are
+        complete or the batch times out
+        """
+        t_start = time.monotonic()
+        time_end = t_start + self._batch_timeout([requests[i] for i in pending], retry)
+        while self._pending_requests(states):
+            remaining = time_end - time.monotonic()
+            if remaining <= 0:
+                break
+
+            packet = self._wait(remaining)
+            if packet:
+                self._assign_packet(requests, states, responses, packet, time.monotonic() - t_start, retry + 1)
+
+        self._record_batch_timeouts(requests, pending, states, time.monotonic() - t_start)
+
+    def _record_batch_timeouts(self, requests, pending, states, waited):
+        for i in pending:
+            if states[i].startswith('wait'):
+                self.timeouts.record_timeout(requests[i].CID, waited)
+
+    def _assign_packet(self, requests, states, responses, packet, t_duration, sends=1):
+        """
+        Assigns received frame to first matching request of a batch
+
+        @param sends: number of times the pending requests were sent
+        """
+        if packet.CID == UbxAckAck.CID or packet.CID == UbxAckNak.CID:
+            ack_cid = UbxCID(packet.f.clsId, packet.f.msgId)
+            for i, request in enumerate(requests):
+                if request.CID != ack_cid:
+                    continue
+
+                if packet.CID == UbxAckAck.CID and states[i] == 'wait-ack':
+                    logger.debug(f'ACK for {request.NAME} received after {t_duration:.2f} s')
+                    states[i] = 'ok'
+                    self._record_latency(request.CID, sends, t_duration)
+                    return
+                elif packet.CID == UbxAckNak.CID and states[i].startswith('wait'):
+                    logger.warning(f'request {request.CID} rejected, NAK received')
+                    states[i] = 'nak'
+                    return
+
+            logger.debug(f'ACK/NAK {ack_cid} does not match any pending request')
+        elif not self._late_response(packet.CID):
+            for i, request in enumerate(requests):
+                if states[i] == 'wait-response' and request.CID == packet.CID:
+                    logger.debug(f'response for {request.NAME} received after {t_duration:.2f} s')
+                    responses[i] = packet
+                    self._expect_late_responses(request.CID, sends - 1)
+                    if request.CID.cls == UbxCID.CLASS_CFG:
+                        states[i] = 'wait-ack'
+                    else:
+                        states[i] = 'ok'
+                        self._record_latency(request.CID, sends, t_duration)
+                    return
+
+            logger.debug(f'response {packet.CID} does not match any pending request')
 
     def _check_poll(self, request, res):
         """ Check if response is for requested frame """
@@ -0,0 +1,422 @@
+import asyncio
+import binascii
+import logging
+import time
+from contextlib import contextmanager
+
+from .cid import UbxCID
+from .frame import UbxFrame
+from .server_base import UbxServerBase_
+from .ubx_ack import UbxAckAck, UbxAckNak
+from .ubx_mga_ack_data0 import UbxMgaAckData0
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncUbxServerBase_(UbxServerBase_):
+    """
+    asyncio variant of the ubx server
+
+    Backends push received data with _data_received(). Decoded frames are
+    routed by CID to subscriber queues. poll(), set() and set_mga() wait
+    on such a queue, so the event loop is never blocked. frames() provides
+    a stream of frames for a set of CIDs.
+
+    Frame matching, retries and ACK handling are the same as in the
+    blocking server.
+    """
+
+    """ Maximum number of frames buffered for a frames() stream """
+    STREAM_QUEUE_SIZE = 100
+
+    def __init__(self):
+        super().__init__()
+
+        self.stream_dropped = 0     # Frames dropped by full frames() queues
+        self._subscribers = []      # List of (cids, queue)
+
+    async def setup(self):
+        return super().setup()
+
+    async def cleanup(self):
+        super().cleanup()
+
+    async def poll(self, frame_poll):
+        """
+        Poll a receiver status
+
+        See UbxServerBase_.poll()
+        """
+        assert isinstance(frame_poll, UbxFrame)
+        logger.debug(f"polling {frame_poll.NAME}")
+
+        response_class = frame_poll._cls_response()
+        self._register_response(response_class)
+
+        if frame_poll.CID.cls == UbxCID.CLASS_CFG:
+            wait_cids = [frame_poll.CID, UbxAckAck.CID, UbxAckNak.CID]
+        else:
+            wait_cids = [frame_poll.CID]
+
+        frame_poll.pack()
+
+        with self._subscription(wait_cids, None) as queue:
+            sends = 0
+            for retry in range(self.max_retries + 1):
+                if retry != 0:
+                    logger.warning(f'poll: timeout, retrying {retry}')
+
+                res = await self._send(frame_poll)
+                if res:
+                    sends += 1
+                    response = await self._wait_poll(queue, frame_poll, retry, sends)
+                    if response:
+                        return response
+                    await self._recover()
+                else:
+                    logger.warning('poll: send failed')
+
+    async def poll_many(self, frames_poll):
+        """
+        Poll several receiver states in one batch
+
+        See UbxServerBase_.poll_many()
+        """
+        wait_cids = self._prepare_batch(frames_poll)
+
+        responses = [None] * len(frames_poll)
+        states = ['wait-response'] * len(frames_poll)
+
+        with self._subscription(wait_cids, None) as queue:
+            for retry in range(self.max_retries + 1):
+                pending = self._pending_requests(states)
+                if not pending:
+                    break
+
+                if retry != 0:
+                    logger.warning(f'poll_many: timeout, retrying {len(pending)} requests ({retry})')
+                    await self._recover()
+
+                for i in pending:
+                    if not await self._send(frames_poll[i]):
+                        logger.warning('poll_many: send failed')
+
+                await self._wait_batch_queue(queue, frames_poll, pending, states, responses, retry)
+
+        return self._batch_results(states, responses)
+
+    async def set(self, frame_set):
+        """
+        Send a set message to modem and wait for acknowledge
+
+        See UbxServerBase_.set()
+        """
+        assert isinstance(frame_set, UbxFrame)
+        logger.debug(f"setting {frame_set.NAME}")
+
+        frame_set.pack()
+
+        with self._subscription([UbxAckAck.CID, UbxAckNak.CID], None) as queue:
+            sends = 0
+            for retry in range(self.max_retries + 1):
+                if retry != 0:
+                    logger.warning(f'set: timeout, retrying {retry}')
+
+                res = await self._send(frame_set)
+                if res:
+                    sends += 1
+                    loop = asyncio.get_running_loop()
+                    t_start = loop.time()
+                    deadline = t_start + self._response_timeout(frame_set.CID, retry)
+
+                    while True:
+                        packet = await self._wait_queue(queue, deadline)
+                        if not packet:
+                            break
+
+                        t_duration = loop.time() - t_start
+                        check = self._check_ack_nak(frame_set, packet)
+                        if check == 'ACK':
+                            logger.debug(f'ACK received after {t_duration:.2f} s')
+                            self._record_latency(frame_set.CID, sends, t_duration)
+                            return packet
+                        elif check == 'NAK':
+                            logger.debug(f'NAK received after {t_duration:.2f} s')
+                            self._record_latency(frame_set.CID, sends, t_duration)
+                            return packet
+
+                    self.timeouts.record_timeout(frame_set.CID, loop.time() - t_start)
+                    await self._recover()
+                else:
+                    logger.warning('set: send failed')
+
+    async def set_mga(self, frame_set_mga):
+        """
+        Send an MGA set message to modem and wait for acknowledge
+
+        See UbxServerBase_.set_mga()
+        """
+        assert isinstance(frame_set_mga, UbxFrame)
+        assert frame_set_mga.CID.cls == UbxCID.CLASS_MGA
+        logger.debug(f"setting mga {frame_set_mga.NAME}")
+
+        frame_set_mga.pack()
+
+        with self._subscription([UbxMgaAckData0.CID], None) as queue:
+            sends = 0
+            for retry in range(self.max_retries + 1):
+                if retry != 0:
+                    logger.warning(f'set_mga: timeout, retrying {retry}')
+
+                res = await self._send(frame_set_mga)
+                if res:
+                    sends += 1
+                    loop = asyncio.get_running_loop()
+                    t_start = loop.time()
+                    deadline = t_start + self._response_timeout(frame_set_mga.CID, retry)
+
+                    while True:
+                        packet = await self._wait_queue(queue, deadline)
+                        if not packet:
+                            break
+
+                        t_duration = loop.time() - t_start
+                        if self._check_mga(frame_set_mga, packet):
+                            logger.debug(f'MGA-ACK received after {t_duration:.2f} s')
+                            self._record_latency(frame_set_mga.CID, sends, t_duration)
+                            return packet
+
+                    self.timeouts.record_timeout(frame_set_mga.CID, loop.time() - t_start)
+                    await self._recover()
+                else:
+                    logger.warning('set_mga: send failed')
+
+    async def fire_and_forget(self, frame_set):
+        """
+        Send a set message to modem without waiting for a response
+        """
+        assert isinstance(frame_set, UbxFrame)
+        logger.debug(f"firing {frame_set.NAME}")
+
+        frame_set.pack()
+        await self._send(frame_set)
+
+    async def send_esf_meas(self, time_tag, measurements):
+        """
+        Sends sensor measurements (UBX-ESF-MEAS) to the receiver
+
+        See UbxServerBase_.send_esf_meas()
+        """
+        msg = self._esf_meas_message(time_tag, measurements)
+
+        t_start = time.perf_counter()
+        res = await self._transmit(msg)
+        self.esf_stats.record(time_tag, t_start, time.perf_counter(), res)
+        if not res:
+            logger.warning('sensor measurements could not be sent')
+
+        return res
+
+    async def listen(self, duration_in_s):
+        """
+        Receive data for given duration and dispatch frames to subscribers
+
+        Frames are dispatched by the backend as data arrives, this just
+        waits. Unlike the blocking listen(), other tasks keep running.
+        """
+        await asyncio.sleep(duration_in_s)
+
+    async def frames(self, filter):
+        """
+        Asynchronous iterator over received frames
+
+        @param filter: list of frame classes or UbxCID objects. Frame classes
+                       are registered, so that they can be decoded.
+
+        Usage:
+          async for frame in ubx.frames([UbxEsfStatus, UbxNavStatus]):
+              ...
+
+        If the consumer falls behind, the oldest frames are dropped. Queued
+        frames are detached from the receive buffer.
+        """
+        cids = []
+        for entry in filter:
+            if isinstance(entry, type):
+                self._register_response(entry)
+                cids.append(entry.CID)
+            else:
+                assert isinstance(entry, UbxCID)
+                cids.append(entry)
+
+        with self._subscription(cids, __class__.STREAM_QUEUE_SIZE) as queue:
+            while True:
+                frame = await queue.get()
+                yield frame
+
+    """
+    Overrides to be provided by backend implementation
+    """
+    async def _recover(self):
+        """
+        Perform actions required to recover communication link.
+        """
+        pass
+
+    async def _transmit(self, data):
+        """
+        This method must be implemented by a derived backend implementation
+
+        It shall send the binary ubx message to the modem.
+        In case of success True shall be returned, False otherwise
+        """
+        raise NotImplementedError
+
+    """
+    Private methods
+    """
+    def _set_filters(self, cids):
+        # Filter is maintained by subscriptions, see _update_filter()
+        self._update_filter()
+
+    def _data_received(self, data):
+        """
+        Feeds received data to parser and dispatches decoded frames
+
+        Must be called by backend whenever data arrives.
+        """
+        self.parser.process(data)
+
+        while True:
+            cid, payload = self.parser.packet()
+            if not cid:
+                break
+
+            if cid == self.cid_crc_error:
+                logger.warning("checksum error in frame, discarding")
+                continue
+
+            try:
+                frame = self.frame_factory.build_with_data(cid, payload)
+            except KeyError:
+                logger.warning(f'frame not registered, cannot decode: {binascii.hexlify(payload)}')
+                continue
+
+            for subscription in self.subscriptions.get(cid, ()):
+                subscription.deliver(frame)
+
+            for cids, queue in self._subscribers:
+                if cid in cids:
+                    if queue.full():
+                        self.stream_dropped += 1
+                        if self.stream_dropped % 100 == 1:
+                            logger.warning(f'subscriber queue full, {self.stream_dropped} frames dropped')
+                        queue.get_nowait()
+                    queue.put_nowait(frame.detach())
+
+    @contextmanager
+    def _subscription(self, cids, max_frames):
+        """
+        Registers a queue that receives all frames with given CIDs
+
+        The parser filter is the union of all active subscriptions.
+        """
+        queue = asyncio.Queue(maxsize=max_frames or 0)
+        subscriber = (frozenset(cids), queue)
+        self._subscribers.append(subscriber)
+        self._update_filter()
+        try:
+            yield queue
+        finally:
+            self._subscribers.remove(subscriber)
+            self._update_filter()
+
+    def _update_filter(self):
+        cids = set(self.subscriptions)
+        for subscriber_cids, _ in self._subscribers:
+            cids |= subscriber_cids
+        self.parser.set_filters(list(cids))
+
+    async def _send(self, ubx_message):
+        """
+        Send ubx frame to modem via backend driver
+        """
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f'sending {ubx_message}')
+
+        msg_in_binary = ubx_message.to_bytes()
+        res = await self._transmit(msg_in_binary)
+        if not res:
+            logger.warning('command could not be sent')
+
+        return res
+
+    async def _wait_poll(self, queue, frame_poll, retry, sends):
+        """
+        Waits for response to poll request and, for configuration frames,
+        the ACK that follows it
+
+        @param sends: number of times the request was sent
+        @return: response or None on timeout
+        """
+        state = 'wait-response'
+        response = None
+        loop = asyncio.get_running_loop()
+        t_start = loop.time()
+        deadline = t_start + self._response_timeout(frame_poll.CID, retry)
+
+        while state != 'ok':
+            packet = await self._wait_queue(queue, deadline)
+            if not packet:
+                self.timeouts.record_timeout(frame_poll.CID, loop.time() - t_start)
+                return None
+
+            t_duration = loop.time() - t_start
+            if state == 'wait-response':
+                if self._check_poll(frame_poll, packet) and not self._late_response(frame_poll.CID):
+                    logger.debug(f'response received after {t_duration:.2f} s')
+                    response = packet
+                    state = 'wait-ack' if frame_poll.CID.cls == UbxCID.CLASS_CFG else 'ok'
+            else:
+                check = self._check_ack_nak(frame_poll, packet)
+                if check == 'ACK':
+                    logger.debug(f'ACK received after {t_duration:.2f} s')
+                    state = 'ok'
+                elif check == 'NAK':
+                    logger.warning(f"NAK received\n{packet}")
+
+        self._record_latency(frame_poll.CID, sends, t_duration)
+        self._expect_late_responses(frame_poll.CID, sends - 1)
+        return response
+
+    async def _wait_batch_queue(self, queue, requests, pending, states, responses, retry):
+        """
+        Waits for responses to sent requests of a batch, see _wait_batch()
+        """
+        loop = asyncio.get_running_loop()
+        t_start = loop.time()
+        deadline = t_start + self._batch_timeout([requests[i] for i in pending], retry)
+        while self._pending_requests(states):
+            packet = await self._wait_queue(queue, deadline)
+            if not packet:
+                break
+
+            self._assign_packet(requests, states, responses, packet, loop.time() - t_start, retry + 1)
+
+        self._record_batch_timeouts(requests, pending, states, loop.time() - t_start)
+
+    async def _wait_queue(self, queue, deadline):
+        """
+        Waits for next frame in queue until deadline (loop time)
+
+        @return: frame or None on timeout
+        """
+        timeout = deadline - asyncio.get_running_loop().time()
+        if timeout <= 0:
+            return None
+
+        try:
+            return await asyncio.wait_for(queue.get(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning('timeout...')
+            return None
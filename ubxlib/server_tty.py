@@ -1,31 +1,59 @@
 import logging
+import select
+import threading
 import time
+from contextlib import contextmanager
 
 from serial import Serial
 from serial.serialutil import SerialException
 
-from .parser_nmea import NmeaParser
-from .parser_ubx import UbxParser
+from .parser_demux import DemuxParser
+from .ring_buffer import RingBuffer
 from .server_base import UbxServerBase_
 
 logger = logging.getLogger(__name__)
 
 
 class GnssUBlox(UbxServerBase_):
-    def __init__(self, device_name, baudrate=115200):
+    """
+    Backend for direct tty access
+
+    With reader_thread=True a dedicated thread drains the tty with large
+    reads into a bounded ring buffer. Receive calls then wait on a
+    condition variable for data instead of reading byte by byte. The
+    reader is paused while the port is flushed or reconfigured, so that
+    data read before a flush can't end up in the ring after it.
+    """
+
+    """ Size of receive ring buffer in reader thread mode """
+    RX_BUFFER_SIZE = 65536
+
+    def __init__(self, device_name, baudrate=115200, reader_thread=False):
         super().__init__()
 
         self.device_name = device_name
         self.baudrate = baudrate
         self.serial_port = Serial()
 
+        self.reader_thread = reader_thread
+        self._reader = None
+        self._reader_stop = threading.Event()
+        self._reader_resume = threading.Event()
+        self._port_lock = threading.Lock()     # Held by reader during read and append
+        self._rx_ring = RingBuffer(GnssUBlox.RX_BUFFER_SIZE)
+        self._rx_cond = threading.Condition()
+
         logger.info('instantiating GnssUBlox on tty')
         logger.info(f'using device {device_name}')
+        if reader_thread:
+            logger.info('using reader thread')
 
     def setup(self):
         res = super().setup()
         if res:
             res = self._open_port()
+            if res and self.reader_thread:
+                self._start_reader()
             return res
 
     def cleanup(self):
@@ -33,9 +61,10 @@ class GnssUBlox(UbxServerBase_):
         super().cleanup()
 
     def set_baudrate(self, baud):
-        # Making sure all data are sent before switching
-        self.serial_port.flush()
-        self.serial_port.baudrate = baud
+        with self._reader_paused():
+            # Making sure all data are sent before switching
+            self.serial_port.flush()
+            self.serial_port.baudrate = baud
 
     def scan(self, interval_in_s=1.500):
         """
@@ -46,28 +75,23 @@ class GnssUBlox(UbxServerBase_):
 
         Worst case scan interval has been empirically determined to 1.2 s
         """
-        parser_ubx = UbxParser(None)
-        parser_nmea = NmeaParser()
-
-        ubx_frames = parser_ubx.frames_rx
-        nmea_frames = parser_nmea.frames_rx
+        parser = DemuxParser(None)
 
         self._flush_input()
 
-        t_start = time.time()
+        t_start = time.monotonic()
         t_end = t_start + interval_in_s
-        while time.time() < t_end:
+        while time.monotonic() < t_end:
             data = self._receive()
             if data:
-                t_duration = time.time() - t_start
+                t_duration = time.monotonic() - t_start
 
-                parser_ubx.process(data)
-                if parser_ubx.frames_rx - ubx_frames >= 2:
+                parser.process(data)
+                if parser.frames_rx >= 2:
                     logger.info(f'ubx frames received within {t_duration:.3f} s')
                     return True
 
-                parser_nmea.process(data)
-                if parser_nmea.frames_rx - nmea_frames >= 2:
+                if parser.nmea_rx >= 2:
                     logger.info(f'nmea frames received within {t_duration:.3f} s')
                     return True
 
@@ -86,21 +110,50 @@ class GnssUBlox(UbxServerBase_):
         #   SPRZ360I AM335x Errata
         #   Advisory 1.0.35 - UART: Transactions to MDR1 Register May Cause Undesired Effect
         #                     on UART Operation
-        current_br = self.serial_port.baudrate
-        self.serial_port.baudrate = 9600
-        self.serial_port.baudrate = current_br
+        with self._reader_paused():
+            current_br = self.serial_port.baudrate
+            self.serial_port.baudrate = 9600
+            self.serial_port.baudrate = current_br
 
     def _receive(self):
         assert self.serial_port.is_open
 
-        # Read single bytes only, so that parser can stop at last byte
-        # of a frame. When reading large blocks, read() blocks until timeout
-        # when no (more) data arrives.
+        if self._reader:
+            # Wait for reader thread to provide data
+            with self._rx_cond:
+                if not self._rx_ring:
+                    self._rx_cond.wait(self.serial_port.timeout)
+                return self._rx_ring.read()
+
+        # Read only what the driver has buffered. When reading more than
+        # is available, read() blocks until timeout when no (more) data
+        # arrives. If nothing is buffered, wait for a single byte.
         # see _open_port() for read timeout
-        data = self.serial_port.read(1)
+        data = self.serial_port.read(self.serial_port.in_waiting or 1)
 
         return data
 
+    def _wait_readable(self, timeout_in_s):
+        assert self.serial_port.is_open
+
+        if self._reader:
+            with self._rx_cond:
+                if not self._rx_ring:
+                    self._rx_cond.wait(timeout_in_s)
+                return bool(self._rx_ring)
+
+        if self.serial_port.in_waiting:
+            return True
+
+        try:
+            fd = self.serial_port.fileno()
+        except AttributeError:
+            # No file descriptor (Windows), let _receive() wait
+            return True
+
+        readable, _, _ = select.select([fd], [], [], timeout_in_s)
+        return bool(readable)
+
     def _transmit(self, data):
         assert self.serial_port.is_open
 
@@ -112,7 +165,10 @@ class GnssUBlox(UbxServerBase_):
     def _flush_input(self):
         assert self.serial_port.is_open
 
-        self.serial_port.reset_input_buffer()
+        with self._reader_paused():
+            self.serial_port.reset_input_buffer()
+            with self._rx_cond:
+                self._rx_ring.clear()
 
     """
     Private methods
@@ -138,5 +194,62 @@ class GnssUBlox(UbxServerBase_):
             pass
 
     def _close_port(self):
+        self._stop_reader()
         if self.serial_port and self.serial_port.is_open:
             self.serial_port.close()
+
+    def _start_reader(self):
+        self._reader_stop.clear()
+        self._reader_resume.set()
+        self._reader = threading.Thread(target=self._reader_loop, name='ubx-tty-reader', daemon=True)
+        self._reader.start()
+
+    def _stop_reader(self):
+        if self._reader:
+            self._reader_stop.set()
+            self._reader_resume.set()
+            self._reader.join()
+            self._reader = None
+
+    @contextmanager
+    def _reader_paused(self):
+        """
+        Keeps reader thread away from the port
+
+        A pending read is cancelled. Once the reader has stored what it
+        read, it waits until the block is left.
+        """
+        if not self._reader:
+            yield
+            return
+
+        self._reader_resume.clear()
+        self.serial_port.cancel_read()
+        try:
+            with self._port_lock:
+                yield
+        finally:
+            self._reader_resume.set()
+
+    def _reader_loop(self):
+        """
+        Reader thread
+
+        Blocks for the first byte (up to the port timeout), then drains
+        everything the driver has buffered with a single read.
+        """
+        port = self.serial_port
+        while not self._reader_stop.is_set():
+            self._reader_resume.wait()
+            with self._port_lock:
+                try:
+                    data = port.read(port.in_waiting or 1)
+                except (SerialException, OSError, TypeError) as e:
+                    # TypeError/OSError are raised by pyserial when port is closed while reading
+                    logger.error(f'reader thread stopped: {e}')
+                    break
+
+                if data:
+                    with self._rx_cond:
+                        self._rx_ring.write(data)
+                        self._rx_cond.notify_all()
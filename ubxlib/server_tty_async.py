@@ -0,0 +1,108 @@
+import asyncio
+import logging
+import os
+
+from serial import Serial
+from serial.serialutil import SerialException
+
+from .server_base_async import AsyncUbxServerBase_
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncGnssUBlox(AsyncUbxServerBase_):
+    """
+    asyncio backend for direct tty access
+
+    The tty is opened non-blocking and registered with loop.add_reader(),
+    so received data is processed whenever the fd becomes readable.
+    """
+
+    """ Maximum number of bytes read per readable event """
+    READ_SIZE = 4096
+
+    def __init__(self, device_name, baudrate=115200):
+        super().__init__()
+
+        self.device_name = device_name
+        self.baudrate = baudrate
+        self.serial_port = Serial()
+        self._loop = None
+
+        logger.info('instantiating AsyncGnssUBlox on tty')
+        logger.info(f'using device {device_name}')
+
+    async def setup(self):
+        res = await super().setup()
+        if res:
+            res = self._open_port()
+            if res:
+                self._loop = asyncio.get_running_loop()
+                self._loop.add_reader(self.serial_port.fileno(), self._on_readable)
+            return res
+
+    async def cleanup(self):
+        self._close_port()
+        await super().cleanup()
+
+    def set_baudrate(self, baud):
+        self.serial_port.flush()
+        self.serial_port.baudrate = baud
+
+    """
+    Base class implementation
+    """
+    async def _recover(self):
+        assert self.serial_port.is_open
+
+        # See GnssUBlox._recover() in server_tty for details
+        logger.warning("server_tty_async() performing recovery")
+        current_br = self.serial_port.baudrate
+        self.serial_port.baudrate = 9600
+        self.serial_port.baudrate = current_br
+
+    async def _transmit(self, data):
+        assert self.serial_port.is_open
+
+        bytes_sent = self.serial_port.write(data)
+        return bytes_sent == len(data)
+
+    """
+    Private methods
+    """
+    def _on_readable(self):
+        try:
+            data = os.read(self.serial_port.fileno(), __class__.READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            logger.error(e)
+            self._loop.remove_reader(self.serial_port.fileno())
+            return
+
+        if data:
+            self._data_received(data)
+
+    def _open_port(self):
+        self.serial_port.port = self.device_name
+        self.serial_port.timeout = 0        # Non-blocking
+        self.serial_port.xonxoff = False
+        self.serial_port.dsrdtr = False
+        self.serial_port.rtscts = False
+        self.serial_port.exclusive = True
+
+        try:
+            self.serial_port.open()
+            # Configure baudrate only after port has been opened.
+            # See GnssUBlox._open_port() in server_tty
+            self.serial_port.baudrate = self.baudrate
+            return self.serial_port.is_open
+        except SerialException:
+            pass
+
+    def _close_port(self):
+        if self.serial_port and self.serial_port.is_open:
+            if self._loop:
+                self._loop.remove_reader(self.serial_port.fileno())
+                self._loop = None
+            self.serial_port.close()
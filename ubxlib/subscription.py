@@ -0,0 +1,59 @@
+import logging
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class Subscription(object):
+    """
+    Receiver of periodic frames of one CID
+
+    Frames are either passed to a callback or stored in a bounded queue.
+    When the queue is full, the oldest frame is dropped and counted, so
+    a consumer can detect that it falls behind.
+
+    Queued frames are detached (see UbxFrame.detach()), so that they don't
+    keep the parser's receive chunk alive. Callbacks get the frame as
+    received, its payload is only valid during the callback.
+    """
+    def __init__(self, cid, callback=None, max_frames=100):
+        super().__init__()
+
+        assert max_frames > 0
+        self.cid = cid
+        self.callback = callback
+        self.queue = deque(maxlen=max_frames)
+        self.received = 0
+        self.dropped = 0
+
+    def deliver(self, frame):
+        self.received += 1
+        if self.callback:
+            self.callback(frame)
+            return
+
+        if len(self.queue) == self.queue.maxlen:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f'subscriber for {self.cid} falls behind, {self.dropped} frames dropped')
+
+        self.queue.append(frame.detach())
+
+    def get(self):
+        """
+        Returns oldest queued frame or None if queue is empty
+        """
+        try:
+            return self.queue.popleft()
+        except IndexError:
+            return None
+
+    def __len__(self):
+        return len(self.queue)
+
+    def __iter__(self):
+        """
+        Iterates over (and removes) all queued frames
+        """
+        while self.queue:
+            yield self.queue.popleft()
@@ -0,0 +1,175 @@
+import bisect
+
+
+class LatencyHistogram(object):
+    """
+    Histogram of response latencies with logarithmic bins
+    """
+
+    """ Upper bin edges in seconds, last bin collects everything above """
+    EDGES = (0.001, 0.002, 0.005, 0.010, 0.020, 0.050, 0.100, 0.200, 0.500, 1.0, 2.0, 5.0, 10.0)
+
+    def __init__(self):
+        super().__init__()
+        self.bins = [0] * (len(__class__.EDGES) + 1)
+        self.count = 0
+        self.timeouts = 0
+        self.max = 0.0
+
+    def add(self, latency_in_s):
+        self.bins[bisect.bisect_left(__class__.EDGES, latency_in_s)] += 1
+        self.count += 1
+        if latency_in_s > self.max:
+            self.max = latency_in_s
+
+    def percentile(self, fraction):
+        """
+        Returns upper edge of bin that contains given fraction of samples
+
+        The last bin has no upper edge, the maximum latency is used.
+        """
+        if not self.count:
+            return None
+
+        needed = fraction * self.count
+        total = 0
+        for i, entries in enumerate(self.bins):
+            total += entries
+            if total >= needed:
+                break
+
+        if i < len(__class__.EDGES):
+            return min(__class__.EDGES[i], self.max)
+        return self.max
+
+
+class TimeoutPolicy(object):
+    """
+    Response timeouts learned from observed latencies
+
+    Each server backend owns a policy that records the response latency of
+    every request by CID. Once enough samples exist, the timeout for a CID
+    is a high percentile of its latencies plus a margin, but never more
+    than the static fallback (retry_delay_in_ms). Until then, or with
+    adaptive = False, the static fallback is used.
+
+    A timeout puts the CID in backoff: the static fallback is used again
+    until the next response to a first attempt is recorded. The expired
+    wait is added as sample, as the latency was at least that long, so
+    the learned timeout widens right away. Retries always use the static
+    fallback, see UbxServerBase_._response_timeout().
+    """
+
+    """ Samples required before timeout is adapted """
+    MIN_SAMPLES = 10
+
+    """ Fraction of responses that shall arrive within timeout """
+    PERCENTILE = 0.99
+
+    """ Added to percentile latency """
+    MARGIN_IN_S = 0.100
+
+    def __init__(self):
+        super().__init__()
+        self.adaptive = True
+        self.histograms = dict()
+        self._backoff = set()           # CIDs with timeout since last response
+
+    def timeout(self, cid, fallback_in_s):
+        """
+        Returns timeout for response to request with given CID
+
+        @param fallback_in_s: static timeout, also upper limit
+        """
+        histogram = self._learned(cid)
+        if not histogram:
+            return fallback_in_s
+
+        learned = histogram.percentile(__class__.PERCENTILE) + __class__.MARGIN_IN_S
+        return min(learned, fallback_in_s)
+
+    def batch_timeout(self, cids, fallback_in_s, escalate=False):
+        """
+        Returns timeout for responses to requests that are sent back to back
+
+        The receiver answers one request after the other. The longest single
+        timeout is therefore extended by the typical (median) latency of
+        every request in the batch. Requests without learned latency add
+        nothing, their timeout is the static fallback already.
+
+        @param cids: CIDs of outstanding requests
+        @param fallback_in_s: static timeout of a single request
+        @param escalate: start from static timeout instead of learned ones (retry)
+        """
+        if escalate:
+            timeout = fallback_in_s
+        else:
+            timeout = max(self.timeout(cid, fallback_in_s) for cid in cids)
+        for cid in cids:
+            histogram = self._learned(cid)
+            if histogram:
+                timeout += histogram.percentile(0.5)
+        return min(timeout, fallback_in_s * len(cids))
+
+    def record(self, cid, latency_in_s):
+        """
+        Records latency of response to first attempt of a request
+
+        Responses after retries must not be recorded, they may belong to an
+        earlier attempt. The CID leaves backoff.
+        """
+        self._histogram(cid).add(latency_in_s)
+        self._backoff.discard(cid)
+
+    def record_timeout(self, cid, waited_in_s=None):
+        """
+        Records timeout of request, CID enters backoff
+
+        @param waited_in_s: expired wait, added as lower bound of latency
+        """
+        histogram = self._histogram(cid)
+        histogram.timeouts += 1
+        if waited_in_s is not None:
+            histogram.add(waited_in_s)
+        self._backoff.add(cid)
+
+    def reset(self):
+        self.histograms.clear()
+        self._backoff.clear()
+
+    def statistics(self):
+        """
+        Returns dictionary with latency statistics per CID
+
+        Latencies are in seconds, percentiles are bin upper edges.
+        """
+        res = dict()
+        for cid, histogram in self.histograms.items():
+            res[cid] = {
+                'count': histogram.count,
+                'timeouts': histogram.timeouts,
+                'p50': histogram.percentile(0.5),
+                'p99': histogram.percentile(0.99),
+                'max': histogram.max,
+            }
+        return res
+
+    def _learned(self, cid):
+        """
+        Returns histogram of CID if timeout can be learned from it, else None
+        """
+        if not self.adaptive or cid in self._backoff:
+            return None
+
+        histogram = self.histograms.get(cid)
+        if not histogram or histogram.count < __class__.MIN_SAMPLES:
+            return None
+        return histogram
+
+    def _histogram(self, cid):
+        try:
+            return self.histograms[cid]
+        except KeyError:
+            histogram = LatencyHistogram()
+            self.histograms[cid] = histogram
+            return histogram
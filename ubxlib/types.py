@@ -1,13 +1,60 @@
 import struct
+from collections import OrderedDict, namedtuple
+
+
+_structs = dict()
+
+
+def compiled_struct(fmt):
+    """
+    Returns compiled little endian struct for format string
+
+    Compiled structs are cached, so that all frames sharing the same
+    layout use the same struct object.
+    """
+    try:
+        return _structs[fmt]
+    except KeyError:
+        compiled = struct.Struct('<' + fmt)     # use little endian mode
+        _structs[fmt] = compiled
+        return compiled
 
 
 class Item(object):
+    """
+    Base class of all field types
+
+    The value of an item is stored in a list slot. Once the item is added
+    to a Fields collection, the slot is part of the collection's value list.
+    """
+    __slots__ = ('order', 'name', '_values', '_slot')
+
     fmt = ''
 
     def __init__(self, name, value=None):
         self.order = -1
         self.name = name
-        self.value = value
+        self._values = [value]
+        self._slot = 0
+
+    @property
+    def value(self):
+        return self._values[self._slot]
+
+    @value.setter
+    def value(self, value):
+        self._values[self._slot] = value
+
+    def _bind(self, values):
+        """
+        Moves value into provided value list
+
+        @return: slot index of value in list
+        """
+        values.append(self.value)
+        self._values = values
+        self._slot = len(values) - 1
+        return self._slot
 
     def pack(self):
         """
@@ -15,22 +62,36 @@ class Item(object):
 
         @return: bytearray with value packed as defined by type
         """
-        fmt_string = '<' + self.fmt    # use little endian mode
-        data = struct.pack(fmt_string, self.value)
+        data = compiled_struct(self.fmt).pack(self._to_raw())
         return data
 
-    def unpack(self, data):
+    def unpack(self, data, offset=0):
         """
         Unpacks value, whose type is defined by class
 
-        @param data: bytearray to extract data from
+        @param data: bytes-like object to extract data from
+        @param offset: position of value in data
         @return: number of bytes consumed
         """
-        fmt_string = '<' + self.fmt    # use little endian mode
-        length = struct.calcsize(fmt_string)
-        results = struct.unpack(fmt_string, data[:length])
-        self.value = results[0]
-        return length
+        item_struct = compiled_struct(self.fmt)
+        if len(data) - offset < item_struct.size:
+            raise ValueError
+
+        results = item_struct.unpack_from(data, offset)
+        self._from_raw(results[0])
+        return item_struct.size
+
+    def _to_raw(self):
+        """
+        Returns value as expected by struct.pack() for fmt
+        """
+        return self.value
+
+    def _from_raw(self, raw):
+        """
+        Sets value from result of struct.unpack() for fmt
+        """
+        self.value = raw
 
     def __str__(self):
         if hasattr(self, 'fmt_string'):
@@ -40,9 +101,12 @@ class Item(object):
 
 
 class Padding(Item):
+    __slots__ = ('length', 'fmt')
+
     def __init__(self, length, name):
         super().__init__(name, value=0)
         self.length = length
+        self.fmt = f'{length}x'
 
     def pack(self):
         """
@@ -52,7 +116,7 @@ class Padding(Item):
         """
         return bytearray(b'\x00') * self.length
 
-    def unpack(self, data):
+    def unpack(self, data, offset=0):
         """
         Dedicated unpack method for padding bytes
 
@@ -62,40 +126,34 @@ class Padding(Item):
 
 
 class CH(Item):
+    __slots__ = ('length', 'fmt')
+
     def __init__(self, length, name):
         super().__init__(name, value='')
         self.length = length
+        self.fmt = f'{length}s'
 
-    def pack(self):
+    def _to_raw(self):
         """
-        Dedicated pack method for fixed-sized strings
+        Encodes fixed-sized string
 
-        Inserts 0x00 padding bytes if required
+        struct inserts 0x00 padding bytes if required
         """
         data = self.value.encode()
-        if len(data) < self.length:
-            data = data + bytes(self.length - len(data))
-        elif len(data) > self.length:
+        if len(data) > self.length:
             raise ValueError
 
-        return data[0:self.length]
+        return data
 
-    def unpack(self, data):
+    def _from_raw(self, raw_text):
         """
-        Dedicated unpack method for fixed-sized strings
+        Decodes fixed-sized string
 
-        Extracts ISO 8859-1 text directly from data and converts it
-        to Python string (Unicode). Trailing zeroes (padding) at end
-        of string are removed.
-        Advances buffer by fixed size of text.
+        Converts ISO 8859-1 text to Python string (Unicode). Trailing
+        zeroes (padding) at end of string are removed.
         """
-        # Check that we have enough payload to process
-        if len(data) < self.length:
-            raise ValueError
-
         # Check string is valid, for simplicty raise ValueError so caller
         # does not need to know about Unicode conversion
-        raw_text = data[:self.length]
         try:
             text = raw_text.decode()
         except UnicodeDecodeError:
@@ -105,10 +163,10 @@ class CH(Item):
         text = text.rstrip('\x00')
         self.value = text
 
-        return self.length
-
 
 class U1(Item):
+    __slots__ = ()
+
     fmt = 'B'
 
     def __init__(self, name):
@@ -116,6 +174,8 @@ class U1(Item):
 
 
 class U2(Item):
+    __slots__ = ()
+
     fmt = 'H'
 
     def __init__(self, name):
@@ -123,6 +183,8 @@ class U2(Item):
 
 
 class U4(Item):
+    __slots__ = ()
+
     fmt = 'I'
 
     def __init__(self, name):
@@ -130,6 +192,8 @@ class U4(Item):
 
 
 class I1(Item):
+    __slots__ = ()
+
     fmt = 'b'
 
     def __init__(self, name):
@@ -137,6 +201,8 @@ class I1(Item):
 
 
 class I2(Item):
+    __slots__ = ()
+
     fmt = 'h'
 
     def __init__(self, name):
@@ -144,6 +210,8 @@ class I2(Item):
 
 
 class I4(Item):
+    __slots__ = ()
+
     fmt = 'i'
 
     def __init__(self, name):
@@ -151,6 +219,8 @@ class I4(Item):
 
 
 class X1(Item):
+    __slots__ = ()
+
     fmt = 'B'
     fmt_string = '02x'
 
@@ -159,6 +229,8 @@ class X1(Item):
 
 
 class X2(Item):
+    __slots__ = ()
+
     fmt = 'H'
     fmt_string = '04x'
 
@@ -167,6 +239,8 @@ class X2(Item):
 
 
 class X4(Item):
+    __slots__ = ()
+
     fmt = 'I'
     fmt_string = '08x'
 
@@ -174,74 +248,348 @@ class X4(Item):
         super().__init__(name, value=0)
 
 
+class _FieldValue(object):
+    """
+    Descriptor for named access to a value slot of Fields
+    """
+    __slots__ = ('slot',)
+
+    def __init__(self, slot):
+        self.slot = slot
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._values[self.slot]
+
+    def __set__(self, obj, value):
+        obj._values[self.slot] = value
+
+
+class _FieldItem(object):
+    """
+    Descriptor for named access to items without value slot (padding)
+    """
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            return self
+        return obj._fields[self.name].value
+
+    def __set__(self, obj, value):
+        obj._fields[self.name].value = value
+
+
 class Fields(object):
+    """
+    Ordered collection of frame fields
+
+    Field values are stored in a single list, addressed by slot index.
+    Named access (fields.name) is provided by descriptors on a class that
+    is derived from Fields for each field layout. The class is selected on
+    the first named access after fields were added, so it depends on the
+    finished layout only. Classes are cached (up to MAX_CLASSES, least
+    recently used are dropped), so all frames with the same fields share
+    one class.
+
+    As long as all fields have a fixed size, pack() and unpack() use a
+    single compiled struct for the whole collection. Fields with dynamic
+    size (e.g. configuration key/values) are processed one by one.
+    """
+    __slots__ = ('_fields', '_items', '_values', '_decoders', '_encoders', '_fmt', '_struct', '_next')
+
+    """ Maximum number of cached derived classes """
+    MAX_CLASSES = 256
+
+    """ Cache of derived classes, key is layout ((name, slot) of all fields) """
+    _classes = OrderedDict()
+
     def __init__(self):
         super().__init__()
         self._fields = dict()
+        self._items = list()        # All fields in pack/unpack order
+        self._values = list()       # Values of all fields except padding
+        self._decoders = list()     # Fields that convert unpacked values
+        self._encoders = list()     # Fields that convert values before packing
+        self._fmt = ''              # Combined struct format, None if not fixed size
+        self._struct = None
         self._next = 0
 
     def add(self, field):
-        # Insert order (1, 2, 3, ..) in Item object, so that we can later
-        # pack/unpack in correct order
-        field.order = self.next_ord()
-
         # Create named entry in dictionary for value
-        if field.name not in self._fields:
-            self._fields[field.name] = field
-        else:
+        if field.name in self._fields:
             raise KeyError
 
+        self._append(field)
+        if type(self) is not Fields:
+            # Layout changed, class is selected again on next named access
+            self.__class__ = Fields
+
+        # Extend layout, it gets compiled on next pack/unpack
+        if self._fmt is not None and field.fmt:
+            self._fmt += field.fmt
+        else:
+            self._fmt = None
+        self._struct = None
+
+    def extend(self, fields, fields_class, fmt):
+        """
+        Adds a list of fields at once
+
+        Faster variant of add() for layouts built before (see RepeatedLayout),
+        fields_class and fmt must be the class _derive() selected and the
+        struct format of the same fields. Names are not checked for duplicates.
+        """
+        for field in fields:
+            self._append(field)
+
+        self.__class__ = fields_class
+        self._fmt = fmt
+        self._struct = None
+
     def get(self, field):
         return self._fields[field]
 
+    def __getattr__(self, name):
+        # Only called if name is not found, i.e. if no class was derived yet
+        if name[0] != '_' and type(self) is Fields and name in self._fields:
+            self._derive()
+            return getattr(self, name)
+        raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        # Derived classes use object.__setattr__, see _derive()
+        if name[0] != '_' and name in self._fields:
+            self._derive()
+        object.__setattr__(self, name, value)
+
     def unpack(self, data):
-        work_data = data
-        for (_, v) in sorted(self._fields.items(), key=lambda item: item[1].order):
-            consumed = v.unpack(work_data)
-            work_data = work_data[consumed:]
+        """
+        Unpacks all fields from data
 
-        return work_data
+        @param data: bytes-like object to extract data from
+        @return: memoryview of remaining, not consumed data
+        """
+        layout = self._layout()
+        if layout:
+            if len(data) < layout.size:
+                raise ValueError
+
+            self._load(layout.unpack_from(data))
+            return memoryview(data)[layout.size:]
+
+        offset = 0
+        for item in self._items:
+            offset += item.unpack(data, offset)
+
+        return memoryview(data)[offset:]
 
     def pack(self):
+        layout = self._layout()
+        if layout:
+            values = self._values
+            if self._encoders:
+                values = list(values)
+                for item in self._encoders:
+                    values[item._slot] = item._to_raw()
+
+            work_data = bytearray(layout.size)
+            layout.pack_into(work_data, 0, *values)
+            return work_data
+
         work_data = bytearray()
-        for (_, v) in sorted(self._fields.items(), key=lambda item: item[1].order):
-            work_data += v.pack()
+        for item in self._items:
+            work_data += item.pack()
 
         return work_data
 
-    def next_ord(self):
-        ret = self._next
-        self._next += 1
-        return ret
+    def _append(self, field):
+        """
+        Appends field to items and binds its value
 
-    def __setattr__(self, name, value):
+        @return: slot index of value, None for padding
         """
-        Overload to allow direct access to fields
+        # Insert order (1, 2, 3, ..) in Item object, so that we can later
+        # pack/unpack in correct order
+        field.order = self.next_ord()
+        self._fields[field.name] = field
+        self._items.append(field)
+
+        if isinstance(field, Padding):
+            return None
 
-        If variable <name> is found in _fields set its value
+        cls = type(field)
+        if cls._from_raw is not Item._from_raw:
+            self._decoders.append(field)
+        if cls._to_raw is not Item._to_raw:
+            self._encoders.append(field)
+        return field._bind(self._values)
+
+    def _load(self, values):
         """
-        if '_fields' in self.__dict__ and name in self.__dict__['_fields']:
-            self.__dict__['_fields'][name].value = value
-        else:
-            return super().__setattr__(name, value)
+        Sets all values from raw (unpacked) values and decodes them
+        """
+        self._values[:] = values
+        for item in self._decoders:
+            item._from_raw(self._values[item._slot])
 
-    def __getattribute__(self, name):
+    def _layout(self):
+        """
+        Returns compiled struct for all fields or None if size is dynamic
         """
-        Overload to allow direct access to field entries
+        if self._struct is None and self._fmt is not None:
+            self._struct = compiled_struct(self._fmt)
+
+        return self._struct
+
+    def _derive(self):
         """
-        obj_dict = object.__getattribute__(self, '__dict__')
-        if '_fields' in obj_dict:
-            _fields = object.__getattribute__(self, '_fields')
-            if name in _fields:
-                value = _fields[name].value
-                return value
+        Switches to class with named accessors for the current layout
 
-        return super().__getattribute__(name)
+        Fields without value slot (padding) are accessed via their item.
+        Names that collide with Fields attributes are only accessible
+        with get().
+
+        @return: derived class
+        """
+        key = tuple((item.name, None if isinstance(item, Padding) else item._slot) for item in self._items)
+        classes = Fields._classes
+        try:
+            derived = classes[key]
+            classes.move_to_end(key)
+        except KeyError:
+            attrs = {'__slots__': (), '__setattr__': object.__setattr__}
+            for name, slot in key:
+                if not hasattr(Fields, name):
+                    attrs[name] = _FieldItem(name) if slot is None else _FieldValue(slot)
+            derived = type('Fields', (Fields,), attrs)
+            classes[key] = derived
+            while len(classes) > Fields.MAX_CLASSES:
+                classes.popitem(last=False)
+
+        self.__class__ = derived
+        return derived
+
+    def next_ord(self):
+        ret = self._next
+        self._next += 1
+        return ret
 
     def __str__(self):
         res = ''
-        for (_, v) in sorted(self._fields.items(), key=lambda item: item[1].order):
+        for v in self._items:
             if not isinstance(v, Padding):
                 res += f'\n  {v}'
 
         return res
+
+
+class RepeatedLayout(object):
+    """
+    Layout of a payload with a header followed by N records of equal size
+
+    Header and record are declared as lists of field specifications
+    (item class, [length,] name), e.g. (U1, 'numSens') or (Padding, 2, 'res1').
+    N is taken from the header field named by count, or from the payload
+    length if count is None.
+
+    unpack() decodes the header with one struct call and the records with
+    Struct.iter_unpack(). The records are returned as named tuples of the
+    decoded record values (without padding). In addition the values are
+    available in Fields with the flat names of the original frames
+    (name_0, name_1, ..). These Fields depend on the number of records
+    only, they are reused if passed to the next unpack().
+    """
+
+    def __init__(self, header, record, count=None):
+        super().__init__()
+
+        self.header = header
+        self.record = record
+        self.count = count
+
+        header_items = [cls(*args) for cls, args in map(self._spec, header)]
+        record_items = [cls(*args) for cls, args in map(self._spec, record)]
+        header_names = [item.name for item in header_items if not isinstance(item, Padding)]
+        record_names = [item.name for item in record_items if not isinstance(item, Padding)]
+
+        self.header_struct = compiled_struct(''.join(item.fmt for item in header_items))
+        self.record_struct = compiled_struct(''.join(item.fmt for item in record_items))
+        self.record_type = namedtuple('Record', record_names)
+
+        self._header_values = len(header_names)
+        self._count_slot = header_names.index(count) if count else None
+
+        # Per number of records: Fields class, struct format and item specifications
+        self._layouts = dict()
+
+    def fields(self, num_records):
+        """
+        Returns new Fields with header and flat record fields
+        """
+        try:
+            fields_class, fmt, specs = self._layouts[num_records]
+        except KeyError:
+            specs = [self._spec(spec) for spec in self.header]
+            for i in range(num_records):
+                specs.extend(self._spec(spec, i) for spec in self.record)
+
+            f = Fields()
+            for cls, args in specs:
+                f.add(cls(*args))
+            self._layouts[num_records] = (f._derive(), f._fmt, specs)
+            return f
+
+        f = Fields()
+        f.extend([cls(*args) for cls, args in specs], fields_class, fmt)
+        return f
+
+    def unpack(self, data, fields=None):
+        """
+        Unpacks header and records
+
+        @param data: payload
+        @param fields: Fields of a previous unpack(), reused if the number of records is the same
+        @return: tuple (fields, list of records)
+        """
+        header_size = self.header_struct.size
+        record_size = self.record_struct.size
+        if len(data) < header_size:
+            raise ValueError
+
+        values = list(self.header_struct.unpack_from(data))
+        if self._count_slot is not None:
+            num_records = values[self._count_slot]
+        else:
+            num_records = (len(data) - header_size) // record_size
+
+        end = header_size + num_records * record_size
+        if len(data) < end:
+            raise ValueError
+
+        for record in self.record_struct.iter_unpack(memoryview(data)[header_size:end]):
+            values.extend(record)
+
+        if fields is None or len(fields._items) != len(self.header) + num_records * len(self.record):
+            fields = self.fields(num_records)
+        fields._load(values)
+
+        decoded = fields._values
+        make = self.record_type._make
+        step = len(self.record_type._fields)
+        records = [make(decoded[i:i + step]) for i in range(self._header_values, len(decoded), step)]
+        return fields, records
+
+    @staticmethod
+    def _spec(spec, index=None):
+        """
+        Returns item class and constructor arguments, name with index suffix for records
+        """
+        cls, *args, name = spec
+        if index is not None:
+            name = f'{name}_{index}'
+        return cls, (*args, name)
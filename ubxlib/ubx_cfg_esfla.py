@@ -1,6 +1,6 @@
 from .cid import UbxCID
 from .frame import UbxFrame
-from .types import I2, U1, Fields, Padding
+from .types import I2, U1, Padding, RepeatedLayout
 
 
 class UbxCfgEsfla_(UbxFrame):
@@ -30,43 +30,20 @@ class UbxCfgEsfla(UbxCfgEsfla_):
     def __init__(self):
         super().__init__()
 
-        # fields defined in unpack()
+        # fields defined in unpack(), configurations also as list of records
+        self.records = []
 
     def unpack(self):
-        # Dynamically build fields based on message length
-        self.f = Fields()
-        self.f.add(U1('version'))
-        self.f.add(U1('numConfigs'))
-        self.f.add(Padding(2, 'res1'))
-
-        # Extract upto this place to read number of level arm configurations
-        super().unpack()
+        self.f, self.records = _layout.unpack(self.data, self.f)
 
         assert self.f.numConfigs <= 5
 
-        # Build final list
-        for lever in range(self.f.numConfigs):
-            self.f.add(U1_LeverArmType(f'leverArmType_{lever}'))
-            self.f.add(Padding(1, f'res2_{lever}'))
-            self.f.add(I2(f'leverArmX_{lever}'))
-            self.f.add(I2(f'leverArmY_{lever}'))
-            self.f.add(I2(f'leverArmZ_{lever}'))
-
-        super().unpack()
-
     def lever_arm(self, armType):
-        data = None
-        for lever in range(self.f.numConfigs):
-            x = self.f.get(f'leverArmType_{lever}')
-            if x.value == armType:
-                data = {
-                    'x': self.f.get(f'leverArmX_{lever}').value,
-                    'y': self.f.get(f'leverArmY_{lever}').value,
-                    'z': self.f.get(f'leverArmZ_{lever}').value
-                }
-                break
+        for record in self.records:
+            if record.leverArmType == armType:
+                return {'x': record.leverArmX, 'y': record.leverArmY, 'z': record.leverArmZ}
 
-        return data
+        return None
 
 
 class UbxCfgEsflaSet(UbxCfgEsfla_):
@@ -102,6 +79,8 @@ class UbxCfgEsflaSet(UbxCfgEsfla_):
 
 
 class U1_LeverArmType(U1):
+    __slots__ = ()
+
     type_names = [
         'VRP-to-Antenna', 'VRP-to-IMU', 'IMU-to-Antenna', 'IMU-to-VRP', 'IMU-to-CRP'
     ]
@@ -117,3 +96,9 @@ class U1_LeverArmType(U1):
             res += '<invalid>'
 
         return res
+
+
+_layout = RepeatedLayout(
+    header=[(U1, 'version'), (U1, 'numConfigs'), (Padding, 2, 'res1')],
+    record=[(U1_LeverArmType, 'leverArmType'), (Padding, 1, 'res2'), (I2, 'leverArmX'), (I2, 'leverArmY'), (I2, 'leverArmZ')],
+    count='numConfigs')
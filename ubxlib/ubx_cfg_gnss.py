@@ -1,6 +1,6 @@
 from .cid import UbxCID
 from .frame import UbxFrame
-from .types import U1, X4, Fields, Padding
+from .types import U1, X4, Padding, RepeatedLayout
 
 
 class UbxCfgGnss_(UbxFrame):
@@ -31,35 +31,11 @@ class UbxCfgGnss(UbxCfgGnss_):
     def __init__(self):
         super().__init__()
 
-        # fields defined in unpack as they are dynamic
+        # fields defined in unpack as they are dynamic, config blocks also as list of records
+        self.records = []
 
     def unpack(self):
-        # Dynamically build fields based on message length
-        self.f = Fields()
-        self.f.add(U1('msgVer'))
-        self.f.add(U1('numTrkChHw'))
-        self.f.add(U1('numTrkChUse'))
-        self.f.add(U1('numConfigBlocks'))
-
-        # Extract upto this place to read number of config blocks
-        super().unpack()
-
-        # TODO: Check extra length against numConfigBlocks
-        # TODO: raise on mismatch
-        """
-        extra_length = len(self.data) - 40
-        extra_info = int(extra_length / 30)
-        """
-
-        # TODO: check nested fields -> unit test
-        for i in range(self.f.numConfigBlocks):
-            self.f.add(U1_GnssId(f'gnssId_{i}'))
-            self.f.add(U1(f'resTrkCh_{i}'))
-            self.f.add(U1(f'maxTrkCh_{i}'))
-            self.f.add(Padding(1, f'res1_{i}'))
-            self.f.add(X4_Flags(f'flags_{i}'))
-
-        super().unpack()
+        self.f, self.records = _layout.unpack(self.data, self.f)
 
     def gps_glonass(self):
         self.enable_gnss(UbxCfgGnss.GNSS_GPS)
@@ -108,6 +84,8 @@ class UbxCfgGnss(UbxCfgGnss_):
 
 
 class U1_GnssId(U1):
+    __slots__ = ()
+
     gnss_system_names = ['gps', 'sbas', 'galileo', 'beidou', 'imes', 'qzss', 'glonass', 'irnss']
 
     def __init__(self, name):
@@ -123,6 +101,8 @@ class U1_GnssId(U1):
 
 
 class X4_Flags(X4):
+    __slots__ = ()
+
     def __init__(self, name):
         super().__init__(name)
 
@@ -138,3 +118,9 @@ class X4_Flags(X4):
         res = self.name + ': '
         res += 'enabled' if enabled else 'disabled'
         return res
+
+
+_layout = RepeatedLayout(
+    header=[(U1, 'msgVer'), (U1, 'numTrkChHw'), (U1, 'numTrkChUse'), (U1, 'numConfigBlocks')],
+    record=[(U1_GnssId, 'gnssId'), (U1, 'resTrkCh'), (U1, 'maxTrkCh'), (Padding, 1, 'res1'), (X4_Flags, 'flags')],
+    count='numConfigBlocks')
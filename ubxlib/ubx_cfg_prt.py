@@ -39,12 +39,13 @@ class UbxCfgPrtUart(UbxCfgPrt_):
 
 
 class X2_Proto(X2):
+    __slots__ = ()
+
     def __init__(self, name):
         super().__init__(name)
 
-    def unpack(self, data):
-        len = super().unpack(data)
-
+    @property
+    def protocols(self):
         res = ''
         if self.value & 0x01:
             res = self.concat(res, 'UBX')
@@ -53,8 +54,7 @@ class X2_Proto(X2):
         if self.value & 0x04:
             res = self.concat(res, 'RTCM')
 
-        self.protocols = res
-        return len
+        return res
 
     @staticmethod
     def concat(text, add):
@@ -69,6 +69,8 @@ class X2_Proto(X2):
 
 
 class X4_Mode(X4):
+    __slots__ = ()
+
     def __init__(self, name):
         super().__init__(name)
 
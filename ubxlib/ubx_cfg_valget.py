@@ -56,6 +56,9 @@ class UbxCfgValGet(UbxCfgValGet_):
     def __init__(self):
         super().__init__()
 
+        # key/values defined in unpack(), also as list of CfgKeyData records
+        self.records = []
+
     def unpack(self):
         # TODO: Error check, minimal frame length
 
@@ -66,20 +69,20 @@ class UbxCfgValGet(UbxCfgValGet_):
         self.f.add(U2('position'))
         work_data = super().unpack()
 
-        # Parse variable content of response
+        # Parse variable content of response, records have different sizes
+        # so they can't be unpacked with a RepeatedLayout
+        self.records = []
         item = 0
-        while len(work_data) >= 4:
-            # logger.info(f'{len(work_data)}, {work_data}')
-
+        offset = 0
+        while len(work_data) - offset >= 4:
             # Extract one cfg key/data pair and add to object
             cfgkey = CfgKeyData(f'data{item}')
-            consumed_bytes = cfgkey.unpack(work_data)
-            # logger.info(cfgkey)
+            consumed_bytes = cfgkey.unpack(work_data, offset)
             self.f.add(cfgkey)
+            self.records.append(cfgkey)
 
             # Advance to next entry
             item += 1
-            work_data = work_data[consumed_bytes:]
-            # logger.info(f'consumed bytes {consumed_bytes}')
+            offset += consumed_bytes
 
         # TODO: Error check, no extra data
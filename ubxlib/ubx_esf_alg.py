@@ -42,22 +42,21 @@ class UbxEsfResetAlgAction(UbxFrame):
 
 
 class U1_Flags(U1):
+    __slots__ = ()
+
     status_strings = ['0: user defined/fixed angles', '1: roll/pitch alignment', '2: roll/pitch/yaw',
                       '3: coarse', '4: fine', '5', '6', '7']
 
     def __init__(self, name):
         super().__init__(name)
 
-        self.status = 0
-        self.autoMntAlgOn = 0
-
-    def unpack(self, data):
-        len = super().unpack(data)
-
-        self.status = (self.value >> 1) & 0x07
-        self.autoMntAlgOn = (self.value >> 0) & 0x01
+    @property
+    def status(self):
+        return (self.value >> 1) & 0x07
 
-        return len
+    @property
+    def autoMntAlgOn(self):
+        return (self.value >> 0) & 0x01
 
     def __str__(self):
         res = self.name + ': '
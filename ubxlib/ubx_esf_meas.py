@@ -1,6 +1,9 @@
+from itertools import accumulate
+
+from .checksum import Checksum
 from .cid import UbxCID
 from .frame import UbxFrame
-from .types import U2, U4, X2, X4, Fields
+from .types import U2, U4, X2, X4, Fields, compiled_struct
 
 
 class UbxEsfMeas_(UbxFrame):
@@ -17,3 +20,67 @@ class UbxEsfMeas(UbxEsfMeas_):
         self.f.add(X2('flags'))
         self.f.add(U2('id'))
         self.f.add(X4('data'))
+
+
+class EsfMeasTemplate(object):
+    """
+    Preserialized UBX-ESF-MEAS message for high rate sensor injection
+
+    The complete message for a fixed number of measurements is allocated
+    once, flags and id are constant. build() writes the payload with a
+    single pack_into() and continues the precomputed checksum of the frame
+    header (class, id, length) over the payload.
+    """
+
+    """ Offset of payload in message """
+    PAYLOAD_OFFSET = 6
+
+    """ Maximum number of measurements (5 bit numMeas in flags) """
+    MAX_MEAS = 31
+
+    _header = compiled_struct('BBBBH')
+
+    def __init__(self, num_meas, flags=0, id=0):
+        """
+        @param num_meas: number of measurements per message
+        @param flags: time mark bits (0..2) of flags, no calibration time tag
+        @param id: identification number of data provider
+        """
+        super().__init__()
+        assert 1 <= num_meas <= __class__.MAX_MEAS
+
+        self.num_meas = num_meas
+        length = 8 + 4 * num_meas
+        self.message = bytearray(6 + length + 2)
+        __class__._header.pack_into(self.message, 0, UbxFrame.SYNC_1, UbxFrame.SYNC_2,
+                                    UbxEsfMeas_.CID.cls, UbxEsfMeas_.CID.id, length)
+
+        # timeTag, flags, id, data words
+        self._payload = compiled_struct(f'IHH{num_meas}I')
+        self._flags = (flags & 0x07) | (num_meas << 11)
+        self._id = id
+        self._end = __class__.PAYLOAD_OFFSET + length
+
+        # Checksum of header is constant. Continued over n payload bytes it
+        # gives cka + sum(payload) and ckb + n * cka + sum of running sums.
+        cka, ckb = Checksum.compute(self.message, 2, __class__.PAYLOAD_OFFSET)
+        self._cka = cka
+        self._ckb = ckb + length * cka
+
+    def build(self, time_tag, measurements):
+        """
+        Updates message with new measurements
+
+        @param time_tag: time tag in ms, 32 bit
+        @param measurements: list of (data type, value) tuples, value is the
+                             24 bit data field, negative values are allowed
+        @return: message, the buffer is reused by the next call
+        """
+        msg = self.message
+        self._payload.pack_into(msg, __class__.PAYLOAD_OFFSET, time_tag & 0xFFFFFFFF, self._flags, self._id,
+                                *[(data_type << 24) | (value & 0xFFFFFF) for data_type, value in measurements])
+
+        payload = msg[__class__.PAYLOAD_OFFSET:self._end]
+        msg[-2] = (self._cka + sum(payload)) & 0xFF
+        msg[-1] = (self._ckb + sum(accumulate(payload))) & 0xFF
+        return msg
@@ -1,6 +1,6 @@
 from .cid import UbxCID
 from .frame import UbxFrame
-from .types import U1, U4, X1, Fields, Padding
+from .types import U1, U4, X1, Padding, RepeatedLayout
 
 
 class UbxEsfStatus_(UbxFrame):
@@ -22,34 +22,17 @@ class UbxEsfStatus(UbxEsfStatus_):
     def __init__(self):
         super().__init__()
 
-        # fields defined in unpack()
+        # fields defined in unpack(), sensors also as list of records
+        self.records = []
 
     def unpack(self):
-        # Dynamically build fields based on message length
-        self.f = Fields()
-        self.f.add(U4('iTow'))
-        self.f.add(U1('version'))
-        self.f.add(X1_InitStatus1('initStatus1'))
-        self.f.add(X1_InitStatus2('initStatus2'))
-        self.f.add(Padding(5, 'res1'))
-        self.f.add(U1_FusionMode('fusionMode'))
-        self.f.add(Padding(2, 'res2'))
-        self.f.add(U1('numSens'))
-
-        # Extract upto this place to read number of sensors
-        super().unpack()
-
-        # Build final list
-        for sensor in range(self.f.numSens):
-            self.f.add(X1_SensStatus1(f'sensStatus1_{sensor}'))
-            self.f.add(X1_SensStatus2(f'sensStatus2_{sensor}'))
-            self.f.add(U1(f'freq_{sensor}'))
-            self.f.add(X1(f'faults_{sensor}'))
-
-        super().unpack()
+        # Fields depend on number of sensors, they are rebuilt only if it changes
+        self.f, self.records = _layout.unpack(self.data, self.f)
 
 
 class X1_InitStatus1(X1):
+    __slots__ = ()
+
     wt_init_strings = ['off', 'initializing', 'initialized', '<invalid>']
     mnt_alg_strings = ['off', 'initializing', 'initialized', 'initialized',
                        '<invalid>', '<invalid>', '<invalid>', '<invalid>']
@@ -58,18 +41,17 @@ class X1_InitStatus1(X1):
     def __init__(self, name):
         super().__init__(name)
 
-        self.insInitStatus = 0
-        self.mntAlgStatus = 0
-        self.wtInitStatus = 0
-
-    def unpack(self, data):
-        len = super().unpack(data)
+    @property
+    def insInitStatus(self):
+        return (self.value >> 5) & 0x03
 
-        self.insInitStatus = (self.value >> 5) & 0x03
-        self.mntAlgStatus = (self.value >> 2) & 0x07
-        self.wtInitStatus = (self.value >> 0) & 0x03
+    @property
+    def mntAlgStatus(self):
+        return (self.value >> 2) & 0x07
 
-        return len
+    @property
+    def wtInitStatus(self):
+        return (self.value >> 0) & 0x03
 
     def __str__(self):
         res = self.name + ': '
@@ -80,19 +62,16 @@ class X1_InitStatus1(X1):
 
 
 class X1_InitStatus2(X1):
+    __slots__ = ()
+
     imu_init_strings = ['off', 'initializing', 'initialized', '<invalid>']
 
     def __init__(self, name):
         super().__init__(name)
 
-        self.ins_init_status = 0
-
-    def unpack(self, data):
-        len = super().unpack(data)
-
-        self.ins_init_status = (self.value >> 0) & 0x03
-
-        return len
+    @property
+    def ins_init_status(self):
+        return (self.value >> 0) & 0x03
 
     def __str__(self):
         res = self.name + ': '
@@ -101,6 +80,8 @@ class X1_InitStatus2(X1):
 
 
 class U1_FusionMode(U1):
+    __slots__ = ()
+
     fusion_mode_strings = ['init', 'fusion', 'suspend', 'disabled']
 
     def __init__(self, name):
@@ -116,6 +97,8 @@ class U1_FusionMode(U1):
 
 
 class X1_SensStatus1(X1):
+    __slots__ = ()
+
     sensor_types = ['none', '', '', '', '',
                     'gyro-z',
                     'front-left wt', 'front-right wt', 'rear-left wt', 'rear-right wt',
@@ -128,18 +111,17 @@ class X1_SensStatus1(X1):
     def __init__(self, name):
         super().__init__(name)
 
-        self.type = 0
-        self.used = 0
-        self.ready = 0
-
-    def unpack(self, data):
-        len = super().unpack(data)
+    @property
+    def type(self):
+        return (self.value >> 0) & 0x3F
 
-        self.type = (self.value >> 0) & 0x3F
-        self.used = (self.value >> 6) & 0x01
-        self.ready = (self.value >> 7) & 0x01
+    @property
+    def used(self):
+        return (self.value >> 6) & 0x01
 
-        return len
+    @property
+    def ready(self):
+        return (self.value >> 7) & 0x01
 
     def __str__(self):
         res = self.name + ': '
@@ -153,25 +135,31 @@ class X1_SensStatus1(X1):
 
 
 class X1_SensStatus2(X1):
+    __slots__ = ()
+
     calib_strings = ['not calibrated', 'calibrating', 'calibrated', 'calibrated 2']
     time_strings = ['no data', 'first byte', 'event input', 'time tag']
 
     def __init__(self, name):
         super().__init__(name)
 
-        self.calibStatus = 0
-        self.timeStatus = 0
-
-    def unpack(self, data):
-        len = super().unpack(data)
+    @property
+    def calibStatus(self):
+        return (self.value >> 0) & 0x03
 
-        self.calibStatus = (self.value >> 0) & 0x03
-        self.timeStatus = (self.value >> 2) & 0x03
-
-        return len
+    @property
+    def timeStatus(self):
+        return (self.value >> 2) & 0x03
 
     def __str__(self):
         res = self.name + ': '
         res += f'calibStatus: {X1_SensStatus2.calib_strings[self.calibStatus]}, '
         res += f'timeStatus: {X1_SensStatus2.time_strings[self.timeStatus]}'
         return res
+
+
+_layout = RepeatedLayout(
+    header=[(U4, 'iTow'), (U1, 'version'), (X1_InitStatus1, 'initStatus1'), (X1_InitStatus2, 'initStatus2'),
+            (Padding, 5, 'res1'), (U1_FusionMode, 'fusionMode'), (Padding, 2, 'res2'), (U1, 'numSens')],
+    record=[(X1_SensStatus1, 'sensStatus1'), (X1_SensStatus2, 'sensStatus2'), (U1, 'freq'), (X1, 'faults')],
+    count='numSens')
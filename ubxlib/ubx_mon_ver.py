@@ -1,6 +1,6 @@
 from .cid import UbxCID
 from .frame import UbxFrame
-from .types import CH, Fields
+from .types import CH, RepeatedLayout
 
 
 class UbxMonVer_(UbxFrame):
@@ -22,17 +22,14 @@ class UbxMonVer(UbxMonVer_):
     def __init__(self):
         super().__init__()
 
-        # fields defined in unpack as they are dynamic
+        # fields defined in unpack as they are dynamic, extensions also as list of records
+        self.records = []
 
     def unpack(self):
-        # Dynamically build fields based on message length
-        self.f = Fields()
-        self.f.add(CH(30, 'swVersion'))
-        self.f.add(CH(10, 'hwVersion'))
+        # Number of extensions is given by message length
+        self.f, self.records = _layout.unpack(self.data, self.f)
 
-        extra_length = len(self.data) - 40
-        extra_info = int(extra_length / 30)
-        for i in range(extra_info):
-            self.f.add(CH(30, f'extension_{i}'))
 
-        super().unpack()
+_layout = RepeatedLayout(
+    header=[(CH, 30, 'swVersion'), (CH, 10, 'hwVersion')],
+    record=[(CH, 30, 'extension')])
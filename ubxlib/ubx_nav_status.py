@@ -34,6 +34,8 @@ class UbxNavStatus(UbxNavStatus_):
 
 
 class U1_GpsFix(U1):
+    __slots__ = ()
+
     gps_fix_strings = ['no fix', 'DR only', '2D-fix', '3D-fix', 'GPS+DR fix', 'Time only fix']
 
     def __init__(self, name):
@@ -49,23 +51,28 @@ class U1_GpsFix(U1):
 
 
 class X1_Flags(X1):
+    __slots__ = ()
+
     def __init__(self, name):
         super().__init__(name)
 
-        self.gpsFixOk = False   # 1 = position and velocity valid and within DOP and ACC Masks.
-        self.diffSoln = False   # 1 = differential corrections were applied
-        self.wknSet = False
-        self.twoSet = False
+    @property
+    def gpsFixOk(self):
+        # 1 = position and velocity valid and within DOP and ACC Masks.
+        return ((self.value >> 0) & 0x01) == 0x01
 
-    def unpack(self, data):
-        len = super().unpack(data)
+    @property
+    def diffSoln(self):
+        # 1 = differential corrections were applied
+        return ((self.value >> 1) & 0x01) == 0x01
 
-        self.gpsFixOk = ((self.value >> 0) & 0x01) == 0x01
-        self.diffSoln = ((self.value >> 1) & 0x01) == 0x01
-        self.wknSet = ((self.value >> 2) & 0x01) == 0x01
-        self.twoSet = ((self.value >> 3) & 0x01) == 0x01
+    @property
+    def wknSet(self):
+        return ((self.value >> 2) & 0x01) == 0x01
 
-        return len
+    @property
+    def twoSet(self):
+        return ((self.value >> 3) & 0x01) == 0x01
 
     def __str__(self):
         res = self.name + ': '